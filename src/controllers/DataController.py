@@ -2,6 +2,8 @@ from .BaseController import BaseController
 from .ProjectController import ProjectController
 from fastapi import UploadFile
 from models import ResponseSignal
+import aiofiles
+import hashlib
 import re
 import os
 
@@ -17,6 +19,8 @@ class DataController(BaseController):
     generate_unique_filepath: This method generates a unique file path for the uploaded file
 
     clean_filename: This method cleans the filename by removing all special characters
+
+    write_uploaded_file: This method streams the uploaded file to disk and returns its SHA-256
     '''
 
     def __init__(self):
@@ -39,13 +43,13 @@ class DataController(BaseController):
         
         return True, ResponseSignal.FILE_UPLOAD_SUCCESS.value, file.content_type
 
-    def generate_unique_filepath(self, file: UploadFile, project_id: str):
+    def generate_unique_filepath(self, file_name: str, project_id: str):
 
         random_key = self.generate_random_string()
 
         project_control = ProjectController()
         project_dir = project_control.get_project_path(project_id)
-        file_name = self.clean_filename(file.filename)
+        file_name = self.clean_filename(file_name)
         file_path = os.path.join(
             project_dir,
             f"{random_key}_{file_name}"
@@ -55,9 +59,9 @@ class DataController(BaseController):
             random_key = self.generate_random_string()
             file_path = os.path.join(
                 project_dir,
-                f"{random_key}_{file.filename}"
+                f"{random_key}_{file_name}"
             )
-        return file_path, f'{random_key}_{file.filename}'
+        return file_path, f'{random_key}_{file_name}'
 
     def clean_filename(self, filename: str):
         '''
@@ -67,3 +71,17 @@ class DataController(BaseController):
         cleaned_filename = re.sub(r'[^\w_.]', '', filename.strip())
 
         return cleaned_filename
+
+    async def write_uploaded_file(self, file: UploadFile, file_path: str):
+        '''
+        This method writes the uploaded file in chunks of FILE_DEFAULT_CHUNK bytes
+        The content hash is computed while writing so the file is read only once
+        '''
+        file_hash = hashlib.sha256()
+
+        async with aiofiles.open(file_path, 'wb') as f:
+            while chunk := await file.read(self.app_settings.FILE_DEFAULT_CHUNK):
+                file_hash.update(chunk)
+                await f.write(chunk)
+
+        return file_hash.hexdigest()
@@ -0,0 +1,190 @@
+from .BaseController import BaseController
+from models import JobModel
+from models.db_schemas import Job
+from models.enums import JobStatusEnum
+
+from sqlalchemy import func
+
+from typing import Callable, Dict
+from logging import getLogger
+import asyncio
+import time
+
+
+class JobProgress:
+    '''
+    This class tracks the progress of one running job
+    Counters (files, chunks, vectors, ...) and the handler checkpoint are kept in the job_progress column,
+    so a job that is restarted can continue from its last checkpoint instead of starting over
+
+    increment: This method adds to one or more progress counters
+    add_error: This method records an error without stopping the job
+    save: This method persists the progress, it is throttled by the checkpoint interval unless forced
+    '''
+
+    def __init__(self, job_model: JobModel, job: Job, checkpoint_interval: float = 1.0):
+        self.job_model = job_model
+        self.job_id = job.job_id
+        self.checkpoint_interval = checkpoint_interval
+
+        self.values = dict(job.job_progress or {})
+        self.checkpoint = dict(self.values.pop('checkpoint', {}))
+        self.errors = list(job.job_errors or [])
+
+        self.last_saved_at = 0.0
+
+    def increment(self, **counters):
+        for key, value in counters.items():
+            self.values[key] = self.values.get(key, 0) + value
+
+    def add_error(self, error: str):
+        self.errors.append(error)
+
+    async def save(self, force: bool = False):
+
+        if not force and time.monotonic() - self.last_saved_at < self.checkpoint_interval:
+            return False
+
+        self.last_saved_at = time.monotonic()
+
+        return await self.job_model.update_job(
+            job_id=self.job_id,
+            job_progress={
+                **self.values,
+                'checkpoint': self.checkpoint
+            },
+            job_errors=self.errors
+        )
+
+
+class JobController(BaseController):
+    '''
+    This is the JobController class, it runs the long operations (processing, index push) as background jobs
+    The jobs run inside the application event loop, at most max_concurrency jobs at the same time
+    It has the following methods:
+
+    register_handler: This method registers the coroutine that executes a job type
+
+    submit_job: This method stores a new job and schedules it, it returns immediately
+
+    run_job: This method claims the job before executing it, so a job resumed by several workers runs once
+
+    resume_unfinished_jobs: This method schedules again the jobs that were queued or running when the server stopped
+
+    shutdown: This method cancels the running jobs, they stay unfinished and are resumed on the next startup
+    '''
+
+    def __init__(self, job_model: JobModel, max_concurrency: int = 2):
+        super().__init__()
+
+        self.job_model = job_model
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.handlers: Dict[str, Callable] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+        self.logger = getLogger('uvicorn')
+
+    def register_handler(self, job_type: str, handler: Callable):
+        '''
+        The handler is called as handler(job=job, progress=progress)
+        '''
+        self.handlers[job_type] = handler
+
+    async def submit_job(self, job_type: str, project_id: int, payload: dict = None):
+
+        job = await self.job_model.create_job(
+            job=Job(
+                job_type=job_type,
+                job_status=JobStatusEnum.QUEUED.value,
+                job_payload=payload or {},
+                job_progress={},
+                job_errors=[],
+                job_project_id=project_id
+            )
+        )
+
+        self.schedule_job(job=job)
+
+        return job
+
+    def schedule_job(self, job: Job):
+
+        task = asyncio.create_task(self.run_job(job=job))
+        self.tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job.job_id, None))
+
+        return task
+
+    async def run_job(self, job: Job):
+
+        async with self.semaphore:
+            async with self.job_model.claim_job(job_id=job.job_id) as claimed_job:
+
+                if claimed_job is None:
+                    self.logger.info(f'Skipping job {job.job_uuid}, it runs in another process or has finished')
+                    return
+
+                await self.execute_job(job=claimed_job)
+
+    async def execute_job(self, job: Job):
+        '''
+        The job is claimed by run_job, its status is already running
+        '''
+        progress = JobProgress(
+            job_model=self.job_model,
+            job=job,
+            checkpoint_interval=self.app_settings.JOB_CHECKPOINT_INTERVAL
+        )
+
+        handler = self.handlers.get(job.job_type)
+        if handler is None:
+            progress.add_error(f'No handler registered for job type {job.job_type}')
+            await progress.save(force=True)
+            await self.job_model.update_job(
+                job_id=job.job_id,
+                job_status=JobStatusEnum.FAILED.value,
+                finished_at=func.now()
+            )
+            return
+
+        self.logger.info(f'Starting job {job.job_uuid} of type {job.job_type}')
+
+        try:
+            await handler(job=job, progress=progress)
+            job_status = JobStatusEnum.COMPLETED.value
+        except asyncio.CancelledError:
+            # The job keeps its running status, so it is resumed from its checkpoint on the next startup
+            await asyncio.shield(progress.save(force=True))
+            raise
+        except Exception as e:
+            self.logger.error(f'Job {job.job_uuid} failed: {e}')
+            progress.add_error(str(e))
+            job_status = JobStatusEnum.FAILED.value
+
+        await progress.save(force=True)
+        await self.job_model.update_job(
+            job_id=job.job_id,
+            job_status=job_status,
+            finished_at=func.now()
+        )
+
+        self.logger.info(f'Finished job {job.job_uuid} with status {job_status}')
+
+    async def resume_unfinished_jobs(self):
+
+        jobs = await self.job_model.get_unfinished_jobs()
+
+        for job in jobs:
+            self.logger.info(f'Resuming job {job.job_uuid} of type {job.job_type}')
+            self.schedule_job(job=job)
+
+        return len(jobs)
+
+    async def shutdown(self):
+
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,14 +1,17 @@
 from .BaseController import BaseController
-from stores.llm import LLMFactoryProvider
+from .ProcessController import ProcessController
+from stores.llm import LLMFactoryProvider, EmbeddingScheduler, EmbeddingCache
 from stores.llm.templates import TemplateParser
 from stores.vectordb import VectorDBFactoryProvider
 
-from models.db_schemas import DataChunk
-
 from stores.llm.LLMEnums import DocumentTypeEnums
+from models.enums import ChunkStorageEnum
 
+import os
 import json
-from typing import List
+import time
+import asyncio
+from typing import AsyncIterator, Callable, List
 
 from logging import getLogger
 
@@ -18,13 +21,39 @@ class NLPController(BaseController):
     def __init__(self, vectordb_client: VectorDBFactoryProvider,
                  generation_model: LLMFactoryProvider,
                  embedding_model: LLMFactoryProvider,
-                 template_parser: TemplateParser):
+                 template_parser: TemplateParser,
+                 chunk_model=None):
         super().__init__()
 
         self.vectordb_client = vectordb_client
         self.generation_model = generation_model
         self.embedding_model = embedding_model
         self.template_parser = template_parser
+        self.chunk_model = chunk_model
+
+        # The document embeddings go through the scheduler, it packs and runs them within the provider limits
+        self.embedding_scheduler = EmbeddingScheduler(
+            embedding_model=embedding_model,
+            max_concurrency=self.app_settings.EMBEDDING_MAX_CONCURRENCY,
+            max_batch_size=self.app_settings.EMBEDDING_MAX_BATCH_SIZE,
+            max_batch_characters=self.app_settings.EMBEDDING_MAX_BATCH_CHARACTERS,
+            target_latency=self.app_settings.EMBEDDING_TARGET_LATENCY
+        )
+
+        self.embedding_cache = None
+        if self.app_settings.EMBEDDING_CACHE_ENABLED:
+            self.embedding_cache = EmbeddingCache(
+                db_path=os.path.join(
+                    self.get_db_path(db_name='embedding_cache'),
+                    'embeddings.sqlite3'
+                ),
+                max_entries=self.app_settings.EMBEDDING_CACHE_MAX_ENTRIES
+            )
+
+        # In the offsets storage mode the collection does not keep a copy of the chunk texts,
+        # unless the hybrid search needs them for its full-text column
+        self.store_texts = self.app_settings.CHUNK_STORAGE_MODE != ChunkStorageEnum.OFFSETS.value \
+            or self.app_settings.VECTOR_DB_PG_HYBRID_SEARCH
 
         self.logger = getLogger('uvicorn')
 
@@ -35,6 +64,13 @@ class NLPController(BaseController):
         collection_name = self.create_collection_name(project_id=project_id)
         return await self.vectordb_client.delete_collection(collection_name=collection_name)
 
+    async def delete_vector_db_chunks(self, project_id: int, chunk_ids: List[int]):
+        collection_name = self.create_collection_name(project_id=project_id)
+        return await self.vectordb_client.delete_by_vector_ids(
+            collection_name=collection_name,
+            vector_ids=chunk_ids
+        )
+
     async def get_vector_db_info(self, project_id: int):
         collection_name = self.create_collection_name(project_id=project_id)
         collection_info = await self.vectordb_client.get_collection_info(
@@ -44,40 +80,210 @@ class NLPController(BaseController):
             json.dumps(collection_info, default=lambda x: x.__dict__)
         )
 
-    async def index_into_vector_db(self, project_id: int, chunks: List[DataChunk],
-                                   chunk_ids: List[int],
-                                   do_reset: bool = False):
+    async def get_embeddings(self, texts: List[str], document_type: str):
+        '''
+        This method returns the vectors of the texts, only the texts missing from the embedding cache are sent to the provider
+        Identical texts of the same call are embedded once
+        The documents go through the embedding scheduler, the queries are sent directly so they never wait behind an index push
+        '''
+        if self.embedding_cache is None:
+            return await self.embed_with_provider(texts=texts, document_type=document_type)
+
+        # The key is computed on the text the provider actually receives (truncated and stripped)
+        keys = [
+            EmbeddingCache.make_key(
+                provider=self.app_settings.EMBEDDING_BACKEND,
+                model_id=self.embedding_model.embedding_model_id,
+                document_type=document_type,
+                text=processed_text
+            )
+            for processed_text in self.embedding_model.process_text(texts)
+        ]
 
-        collection_name = self.create_collection_name(project_id=project_id)
+        first_indexes = {}
+        for idx, key in enumerate(keys):
+            first_indexes.setdefault(key, idx)
+        self.embedding_cache.counters['deduplicated'] += len(keys) - len(first_indexes)
 
-        texts = [c.chunk_text for c in chunks]
-        metadata = [c.chunk_metadata for c in chunks]
-        vectors = self.embedding_model.get_embedding(
-            text=texts, document_type=DocumentTypeEnums.DOCUMENT.value)
+        vectors = await asyncio.to_thread(self.embedding_cache.get_many, list(first_indexes))
 
-        _ = await self.vectordb_client.create_collection(
-            collection_name=collection_name,
-            embedding_dim=self.embedding_model.embedding_size,
-            do_reset=do_reset
-        )
+        missing_keys = [key for key in first_indexes if key not in vectors]
+        if missing_keys:
+            missing_vectors = await self.embed_with_provider(
+                texts=[texts[first_indexes[key]] for key in missing_keys],
+                document_type=document_type
+            )
+            if missing_vectors is None:
+                return None
 
-        _ = await self.vectordb_client.insert_batch(
-            collection_name=collection_name,
-            vectors=vectors,
-            texts=texts,
-            metadata=metadata,
-            vector_ids=chunk_ids
-        )
+            missing_vectors = dict(zip(missing_keys, missing_vectors))
+            await asyncio.to_thread(self.embedding_cache.set_many, missing_vectors)
+            vectors.update(missing_vectors)
+
+        return [vectors[key] for key in keys]
+
+    async def embed_with_provider(self, texts: List[str], document_type: str):
+
+        if document_type == DocumentTypeEnums.DOCUMENT.value:
+            return await self.embedding_scheduler.embed(texts=texts, document_type=document_type)
+
+        # A batch of queries larger than the provider accepts is sent in provider-sized requests
+        max_batch_size = getattr(self.embedding_model, 'max_embedding_batch_size', None) or len(texts)
+
+        batches = await asyncio.gather(*[
+            self.embedding_model.aget_embedding(
+                text=texts[start:start + max_batch_size],
+                document_type=document_type
+            )
+            for start in range(0, len(texts), max_batch_size)
+        ])
+
+        vectors = [vector for batch in batches if batch for vector in batch]
+        if len(vectors) != len(texts):
+            return None
+
+        return vectors
+
+    async def index_into_vector_db_pipeline(self, project_id: int, chunk_pages: AsyncIterator[list],
+                                            get_texts: Callable[[list], List[str]] = None,
+                                            do_reset: bool = False,
+                                            on_batch_indexed: Callable = None,
+                                            embedding_workers: int = None,
+                                            queue_size: int = None,
+                                            index_params: dict = None,
+                                            storage_type: str = None):
+        '''
+        This method indexes the pages of chunk_pages with three concurrent stages:
+        reader (pages + texts) -> embedding_workers pages in the embedding cache/scheduler -> one vector writer
+        The bounded queues between the stages give backpressure, so a slow stage pauses the stages before it
+        The writer inserts the batches in the page order, an error (read or embedding) is raised when the writer
+        reaches its batch, so every batch before it is inserted and reported to on_batch_indexed(chunks) and none after it
+        The vector index is not maintained during the load, it is built at the end with index_params
+        storage_type is applied when the collection is created (or reset)
+        '''
+        collection_name = self.create_collection_name(project_id=project_id)
 
-        return True
+        embedding_workers = embedding_workers or self.app_settings.INDEX_PUSH_EMBEDDING_WORKERS
+        queue_size = queue_size or self.app_settings.INDEX_PUSH_QUEUE_SIZE
+
+        embed_queue = asyncio.Queue(maxsize=queue_size)
+        write_queue = asyncio.Queue(maxsize=queue_size)
+
+        async def read_chunks():
+            seq = 0
+            try:
+                async for chunks in chunk_pages:
+                    texts = get_texts(chunks) if get_texts else [c.chunk_text for c in chunks]
+                    await embed_queue.put((seq, chunks, texts, None))
+                    seq += 1
+            except Exception as e:
+                await embed_queue.put((seq, None, None, e))
+
+            for _ in range(embedding_workers):
+                await embed_queue.put(None)
+
+        async def embed_chunks():
+            while (item := await embed_queue.get()) is not None:
+                seq, chunks, texts, error = item
+                vectors = None
+
+                if error is None:
+                    try:
+                        vectors = await self.get_embeddings(
+                            texts=texts,
+                            document_type=DocumentTypeEnums.DOCUMENT.value
+                        )
+                        if vectors is None:
+                            raise RuntimeError(f'Embedding failed for {len(texts)} chunks')
+                    except Exception as e:
+                        error = e
+
+                await write_queue.put((seq, chunks, texts, vectors, error))
+
+            await write_queue.put(None)
+
+        async def write_vectors():
+            pending = {}
+            next_seq = 0
+            finished_workers = 0
+            is_collection_ready = False
+            indexed_count = 0
+
+            while finished_workers < embedding_workers:
+                item = await write_queue.get()
+                if item is None:
+                    finished_workers += 1
+                    continue
+
+                pending[item[0]] = item
+
+                while next_seq in pending:
+                    _, chunks, texts, vectors, error = pending.pop(next_seq)
+                    if error is not None:
+                        raise error
+
+                    if not is_collection_ready:
+                        _ = await self.vectordb_client.create_collection(
+                            collection_name=collection_name,
+                            embedding_dim=self.embedding_model.embedding_size,
+                            do_reset=do_reset,
+                            storage_type=storage_type
+                        )
+                        is_collection_ready = True
+
+                    _ = await self.vectordb_client.insert_batch(
+                        collection_name=collection_name,
+                        vectors=vectors,
+                        texts=texts if self.store_texts else [None] * len(texts),
+                        metadata=[c.chunk_metadata for c in chunks],
+                        vector_ids=[c.chunk_id for c in chunks],
+                        asset_ids=[c.chunk_asset_id for c in chunks],
+                        build_index=False
+                    )
+                    indexed_count += len(chunks)
+
+                    if on_batch_indexed is not None:
+                        await on_batch_indexed(chunks)
+
+                    next_seq += 1
+
+            return indexed_count
+
+        stages = [asyncio.create_task(read_chunks())] + [
+            asyncio.create_task(embed_chunks())
+            for _ in range(embedding_workers)
+        ]
+
+        try:
+            indexed_count = await write_vectors()
+        finally:
+            # After an error the other stages may be blocked on a full queue
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+        # The vector index is built once after the bulk load (it is a no-op if the collection already has it),
+        # a push that was interrupted before this point builds it when it is resumed
+        if indexed_count > 0 or await self.vectordb_client.is_collection_exist(collection_name=collection_name):
+            _ = await self.vectordb_client.create_vector_index(
+                collection_name=collection_name,
+                index_params=index_params
+            )
+
+        return indexed_count
 
-    async def search_vector_db_collection(self, project_id: int, text: str, limit: int = 10):
+    async def search_vector_db_collection(self, project_id: int, text: str, limit: int = 10,
+                                          search_params: dict = None, filters: dict = None):
+        '''
+        filters restrict the search to chunk ids (min_chunk_id, max_chunk_id), assets (asset_ids)
+        and metadata values (metadata, e.g. {'source': 'file.pdf'})
+        '''
 
         collection_name = self.create_collection_name(project_id=project_id)
 
         query_vector = None
-        vectors = self.embedding_model.get_embedding(
-            text=text, document_type=DocumentTypeEnums.QUERY.value)
+        vectors = await self.get_embeddings(
+            texts=[text], document_type=DocumentTypeEnums.QUERY.value)
 
         if not vectors or len(vectors) == 0:
             return False
@@ -91,22 +297,116 @@ class NLPController(BaseController):
         results = await self.vectordb_client.search_by_vector(
             vector=query_vector,
             collection_name=collection_name,
-            top_k=limit
+            top_k=limit,
+            search_params=search_params,
+            filters=filters,
+            text=text
         )
 
         if not results:
             return False
 
-        return results
+        return await self.resolve_retrieved_texts(
+            project_id=project_id,
+            documents=results
+        )
+
+    async def search_vector_db_collection_batch(self, project_id: int, texts: List[str], limit: int = 10,
+                                                search_params: dict = None, filters: dict = None):
+        '''
+        This method searches many queries at once: the queries are embedded together and searched in one
+        vector database request, it returns the results of every query and the timings of the batch
+        The per query latency is the batch time shared by its queries, they are not timed one by one
+        '''
+        collection_name = self.create_collection_name(project_id=project_id)
+
+        started_at = time.monotonic()
+        vectors = await self.get_embeddings(
+            texts=texts, document_type=DocumentTypeEnums.QUERY.value)
+
+        if not vectors or len(vectors) != len(texts):
+            return False, None
+
+        embedded_at = time.monotonic()
+        batch_results = await self.vectordb_client.search_by_vector_batch(
+            vectors=vectors,
+            collection_name=collection_name,
+            top_k=limit,
+            search_params=search_params,
+            filters=filters,
+            texts=texts
+        )
+
+        if batch_results is None:
+            return False, None
+
+        # The texts missing from the collection are read once for all the queries
+        _ = await self.resolve_retrieved_texts(
+            project_id=project_id,
+            documents=[doc for results in batch_results for doc in results]
+        )
+        finished_at = time.monotonic()
+
+        timings = {
+            'queries': len(texts),
+            'embedding_seconds': round(embedded_at - started_at, 4),
+            'search_seconds': round(finished_at - embedded_at, 4),
+            'total_seconds': round(finished_at - started_at, 4),
+            'per_query_seconds': round((finished_at - started_at) / len(texts), 4)
+        }
+
+        return [
+            [doc for doc in results if doc.text is not None]
+            for results in batch_results
+        ], timings
+
+    async def resolve_retrieved_texts(self, project_id: int, documents: list):
+        '''
+        This method fills the text of the retrieved documents that were stored without it (offsets storage mode)
+        from the chunks table or the extracted text of their asset
+        '''
+        missing_chunk_ids = [
+            doc.chunk_id
+            for doc in documents
+            if doc.text is None and doc.chunk_id is not None
+        ]
+
+        if len(missing_chunk_ids) == 0 or self.chunk_model is None:
+            return documents
+
+        records = await self.chunk_model.get_chunks_with_asset_names(
+            chunk_ids=missing_chunk_ids
+        )
+
+        texts = ProcessController(project_id=project_id).get_chunks_texts(
+            chunks=records,
+            asset_names={
+                record.chunk_asset_id: record.asset_name
+                for record in records
+            }
+        )
+        chunk_texts = {
+            record.chunk_id: text
+            for record, text in zip(records, texts)
+        }
+
+        for doc in documents:
+            if doc.text is None:
+                doc.text = chunk_texts.get(doc.chunk_id)
+
+        return [doc for doc in documents if doc.text is not None]
 
-    async def answer_rag_question(self, project_id: int, query: str, limit: int = 10):
+    async def answer_rag_question(self, project_id: int, query: str, limit: int = 10,
+                                  search_params: dict = None, filters: dict = None):
 
         full_prompt, chat_history, answer = None, None, None
 
         retrieved_documents = await self.search_vector_db_collection(
             project_id=project_id,
             text=query,
-            limit=limit
+            limit=limit,
+            search_params=search_params,
+            filters=filters
         )
 
         if not retrieved_documents or len(retrieved_documents) == 0:
@@ -154,7 +454,7 @@ class NLPController(BaseController):
             ]
         )
 
-        answer = self.generation_model.generate_text(
+        answer = await self.generation_model.agenerate_text(
             prompt=full_prompt,
             chat_history=chat_history,
         )
@@ -1,12 +1,13 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
 import os
+import mmap
+import hashlib
 from langchain_community.document_loaders import TextLoader, PyMuPDFLoader
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from helpers import TextSplitter
 
-from typing import List
 from models import ProcessEnum
+from models.enums import ChunkStorageEnum
 
 
 class ProcessController(BaseController):
@@ -22,12 +23,38 @@ class ProcessController(BaseController):
 
     get_file_content: This method gets the content of the file
 
+    get_file_pages: This method lazily yields the pages of the file one by one
+
+    get_text_splitter: This method builds the splitter used to chunk the file content
+
     get_file_chunks: This method gets the chunks of the file content
 
+    iter_page_chunks: This method streams the chunks of the file page by page, as texts or as offsets into the extracted text
+
+    get_text_windows: This method reads a text file in windows of FILE_DEFAULT_CHUNK characters
+
+    iter_text_chunks: This method streams the chunks of a text file window by window
+
+    iter_file_chunks: This method streams the chunks of the file in fixed-size batches
+
+    read_chunk_text: This method reads the text of an offsets chunk from the memory-mapped extracted text
+
+    get_chunks_texts: This method returns the texts of a list of chunks whatever their storage mode
+
     get_file_name_from_metadata: This method gets the file name from the metadata
 
+    get_file_hash: This method computes the SHA-256 of the file content
+
+    get_processing_config: This method builds the config an asset is processed with, it is used to skip unchanged assets
+
+    process_file: This static method loads and splits one file, it is the unit of work sent to the process pool
+
     '''
 
+    # Bump this version whenever the splitting output changes, so all the assets get re-chunked
+    # TextSplitter produces the same chunks as RecursiveCharacterTextSplitter, so the version is kept
+    SPLITTER_VERSION = 'recursive-character-v1'
+
     def __init__(self, project_id: int):
         super().__init__()
 
@@ -44,6 +71,42 @@ class ProcessController(BaseController):
         '''
         return os.path.basename(metadata['source']).split('_', 1)[-1]
 
+    def get_file_hash(self, file_id: str):
+        '''
+        This method computes the SHA-256 of the file by reading it in chunks of FILE_DEFAULT_CHUNK bytes
+        '''
+        file_path = os.path.join(
+            self.project_path,
+            file_id
+        )
+
+        if not os.path.exists(file_path):
+            return None
+
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(self.app_settings.FILE_DEFAULT_CHUNK):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+    def get_processing_config(self, file_hash: str, chunk_size: int, overlap_len: int,
+                              storage_mode: str = ChunkStorageEnum.TEXT.value):
+
+        processing_config = {
+            'sha256': file_hash,
+            'chunk_size': chunk_size,
+            'overlap_size': overlap_len,
+            'splitter_version': self.SPLITTER_VERSION
+        }
+
+        # The storage mode is only recorded when it is not the default one, so the assets processed
+        # before the offsets mode existed keep a matching config
+        if storage_mode != ChunkStorageEnum.TEXT.value:
+            processing_config['storage_mode'] = storage_mode
+
+        return processing_config
+
     def get_file_loader(self, file_id: str):
 
         self.file_path = os.path.join(
@@ -77,52 +140,25 @@ class ProcessController(BaseController):
 
         return None
 
-    def get_file_chunks_with_custom_split(self, texts: List[str],
-                                          metadatas: List[dict],
-                                          chunk_size: int,
-                                          splitting_tag: str = '\n'
-                                          ) -> List[Document]:
-
-        chunks = []
-        current_chunk_text = ''
-        current_chunk_metadatas = []
+    def get_file_pages(self, file_id: str):
+        '''
+        This method yields the pages of the file one at a time using the loader lazy_load
+        so only the current page is kept in memory instead of the whole document
+        '''
+        loader = self.get_file_loader(file_id=file_id)
 
-        print(texts, len(texts), metadatas, len(metadatas))
+        if loader is None:
+            return None
 
-        for text, metadata in zip(texts, metadatas):
+        return loader.lazy_load()
 
-            lines = [
-                line.strip()
-                for line in text.split(splitting_tag) if len(line.strip()) > 1
-            ]
-            for line in lines:
-                current_chunk_text += line + splitting_tag
-                current_chunk_metadatas.append(metadata)
-                if len(current_chunk_text) >= chunk_size:
-                    print(f'Creating chunk of size: {len(current_chunk_text)}')
-                    print(f'Current chunk text preview: {current_chunk_text}')
-                    print(
-                        f'Current chunk metadatas: {current_chunk_metadatas}')
-                    merged_metadata = {
-                        'source': list(dict.fromkeys(meta.get('source', 'unknown_source') for meta in current_chunk_metadatas))
-                    }
-                    chunks.append(Document(
-                        page_content=current_chunk_text.strip(),
-                        metadata=merged_metadata
-                    ))
-                    current_chunk_text = ''
-                    current_chunk_metadatas = []
-
-        if len(current_chunk_text) > 0:
-            merged_metadata = {
-                'source': list(dict.fromkeys(meta.get('source', 'unknown_source') for meta in current_chunk_metadatas))
-            }
-            chunks.append(Document(
-                page_content=current_chunk_text.strip(),
-                metadata=merged_metadata
-            ))
+    def get_text_splitter(self, chunk_size: int = 100, overlap_len: int = 10):
 
-        return chunks
+        return TextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=overlap_len,
+            separators=["\n\n", "\n", " ", ""]
+        )
 
     def get_file_chunks(self, file_content: list,
                         chunk_size: int = 100, overlap_len: int = 10):
@@ -139,17 +175,9 @@ class ProcessController(BaseController):
             for rec in file_content
         ]
 
-        # chunks = self.get_file_chunks_with_custom_split(
-        #     texts=file_content_texts,
-        #     metadatas=file_content_metadata,
-        #     chunk_size=chunk_size,
-        # ) >> I will try to ignore this technique for now because it does not seem to work well
-
-        text_splitter = RecursiveCharacterTextSplitter(
+        text_splitter = self.get_text_splitter(
             chunk_size=chunk_size,
-            chunk_overlap=overlap_len,
-            separators=["\n\n", "\n", " ", ""],
-            length_function=len
+            overlap_len=overlap_len
         )
 
         chunks = text_splitter.create_documents(
@@ -157,3 +185,268 @@ class ProcessController(BaseController):
             metadatas=file_content_metadata
         )
         return chunks
+
+    def get_extracted_text_path(self, file_id: str):
+        '''
+        This method returns the path of the extracted-text blob of a file (the UTF-8 text of all its pages)
+        The chunks stored as offsets point into this blob
+        '''
+        extracted_dir = os.path.join(
+            self.project_path,
+            '.extracted'
+        )
+        if not os.path.exists(extracted_dir):
+            os.makedirs(extracted_dir, exist_ok=True)
+
+        return os.path.join(
+            extracted_dir,
+            f'{file_id}.txt'
+        )
+
+    def iter_page_chunks(self, file_id: str,
+                         chunk_size: int = 100, overlap_len: int = 10,
+                         storage_mode: str = ChunkStorageEnum.TEXT.value):
+        '''
+        This method streams the file page by page through the splitter and yields one (text, metadata, start, end) tuple per chunk
+        In the text storage mode start and end are None
+        In the offsets storage mode the page texts are written to the extracted-text blob, text is None
+        and start/end are the byte offsets of the chunk in that blob
+        '''
+        if self.get_file_extension(file_id=file_id) == ProcessEnum.TXT.value:
+            yield from self.iter_text_chunks(file_id=file_id,
+                                             chunk_size=chunk_size,
+                                             overlap_len=overlap_len,
+                                             storage_mode=storage_mode)
+            return
+
+        pages = self.get_file_pages(file_id=file_id)
+
+        if pages is None:
+            return
+
+        text_splitter = self.get_text_splitter(
+            chunk_size=chunk_size,
+            overlap_len=overlap_len
+        )
+
+        if storage_mode != ChunkStorageEnum.OFFSETS.value:
+            for page in pages:
+                metadata = {
+                    'source': self.get_file_name_from_metadata(page.metadata)
+                }
+                for chunk_text in text_splitter.split_text(page.page_content):
+                    yield chunk_text, dict(metadata), None, None
+            return
+
+        # The blob is written next to the old one and swapped at the end, so the readers of the old blob are not affected
+        extracted_path = self.get_extracted_text_path(file_id=file_id)
+
+        with open(f'{extracted_path}.tmp', 'wb') as extracted_file:
+
+            page_byte_offset = 0
+            for page in pages:
+                metadata = {
+                    'source': self.get_file_name_from_metadata(page.metadata)
+                }
+                page_text = page.page_content
+
+                # Starts and ends are increasing on their own, so each one gets its own converter
+                start_to_bytes = self.get_byte_offset_converter(page_text)
+                end_to_bytes = self.get_byte_offset_converter(page_text)
+
+                for start, end in text_splitter.split_offsets(page_text):
+                    yield None, dict(metadata), page_byte_offset + start_to_bytes(start), page_byte_offset + end_to_bytes(end)
+
+                page_bytes = page_text.encode('utf-8')
+                extracted_file.write(page_bytes)
+                page_byte_offset += len(page_bytes)
+
+        os.replace(f'{extracted_path}.tmp', extracted_path)
+
+    def get_text_windows(self, file_path: str):
+        '''
+        This method yields the text of the file in windows of FILE_DEFAULT_CHUNK characters,
+        it decodes the file the way TextLoader does (UTF-8, universal newlines)
+        '''
+        with open(file_path, encoding='utf-8') as f:
+            while window := f.read(self.app_settings.FILE_DEFAULT_CHUNK):
+                yield window
+
+    def iter_text_chunks(self, file_id: str,
+                         chunk_size: int = 100, overlap_len: int = 10,
+                         storage_mode: str = ChunkStorageEnum.TEXT.value):
+        '''
+        This method is iter_page_chunks for the .txt files: TextLoader loads the whole file as one page,
+        here the file is read in windows and the splitter carries the unfinished chunk and its overlap from one window
+        to the next, so the memory does not grow with the file size and the chunks are the ones of the whole text
+        The file is read twice, the first pass finds the separator the whole text is split on
+        '''
+        file_path = os.path.join(
+            self.project_path,
+            file_id
+        )
+
+        if not os.path.exists(file_path):
+            return
+
+        text_splitter = self.get_text_splitter(
+            chunk_size=chunk_size,
+            overlap_len=overlap_len
+        )
+
+        metadata = {
+            'source': self.get_file_name_from_metadata({'source': file_path})
+        }
+
+        separator, new_separators = text_splitter.get_separators(
+            self.get_text_windows(file_path=file_path))
+
+        windows = text_splitter.split_windows(
+            self.get_text_windows(file_path=file_path), separator, new_separators)
+
+        if storage_mode != ChunkStorageEnum.OFFSETS.value:
+            for text, _, spans in windows:
+                for start, end in spans:
+                    yield text[start:end], dict(metadata), None, None
+            return
+
+        extracted_path = self.get_extracted_text_path(file_id=file_id)
+
+        with open(f'{extracted_path}.tmp', 'wb') as extracted_file:
+
+            # The text of a window is written once the next window starts after it, the carried part is written with the next one
+            text_byte_offset, previous_text, previous_offset = 0, '', 0
+            for text, offset, spans in windows:
+
+                written_bytes = previous_text[:offset - previous_offset].encode('utf-8')
+                extracted_file.write(written_bytes)
+                text_byte_offset += len(written_bytes)
+
+                start_to_bytes = self.get_byte_offset_converter(text)
+                end_to_bytes = self.get_byte_offset_converter(text)
+
+                for start, end in spans:
+                    yield None, dict(metadata), text_byte_offset + start_to_bytes(start), text_byte_offset + end_to_bytes(end)
+
+                previous_text, previous_offset = text, offset
+
+            extracted_file.write(previous_text.encode('utf-8'))
+
+        os.replace(f'{extracted_path}.tmp', extracted_path)
+
+    def get_byte_offset_converter(self, text: str):
+        '''
+        This method returns a function that maps a character offset of the text to its UTF-8 byte offset
+        The chunk offsets are (almost always) increasing, so the encoded length is accumulated from the last
+        converted offset instead of encoding the whole prefix every time
+        '''
+        if text.isascii():
+            return lambda char_offset: char_offset
+
+        cursor = [0, 0]
+
+        def to_bytes(char_offset: int):
+            char_cursor, byte_cursor = cursor
+            if char_offset < char_cursor:
+                char_cursor, byte_cursor = 0, 0
+            byte_cursor += len(text[char_cursor:char_offset].encode('utf-8'))
+            cursor[0], cursor[1] = char_offset, byte_cursor
+            return byte_cursor
+
+        return to_bytes
+
+    def read_chunk_text(self, file_id: str, start: int, end: int, extracted_maps: dict = None):
+        '''
+        This method reads the text of an offsets chunk from the memory-mapped extracted-text blob of its file
+        extracted_maps lets the caller reuse the maps across many chunks, the caller closes them
+        '''
+        if file_id is None or start is None or end is None:
+            return None
+
+        owns_maps = extracted_maps is None
+        extracted_maps = {} if owns_maps else extracted_maps
+
+        try:
+            extracted_map = extracted_maps.get(file_id)
+
+            if extracted_map is None:
+                extracted_path = self.get_extracted_text_path(file_id=file_id)
+                if not os.path.exists(extracted_path) or os.path.getsize(extracted_path) == 0:
+                    return None
+                with open(extracted_path, 'rb') as extracted_file:
+                    extracted_map = mmap.mmap(
+                        extracted_file.fileno(), 0, access=mmap.ACCESS_READ)
+                extracted_maps[file_id] = extracted_map
+
+            return extracted_map[start:end].decode('utf-8', errors='ignore')
+        finally:
+            if owns_maps:
+                for extracted_map in extracted_maps.values():
+                    extracted_map.close()
+
+    def get_chunks_texts(self, chunks: list, asset_names: dict):
+        '''
+        This method returns the texts of the chunks, reading the offsets chunks from their extracted-text blobs
+        asset_names maps the chunk_asset_id to the asset name (the file id)
+        '''
+        extracted_maps = {}
+
+        try:
+            return [
+                chunk.chunk_text
+                if chunk.chunk_text is not None
+                else self.read_chunk_text(
+                    file_id=asset_names.get(chunk.chunk_asset_id),
+                    start=chunk.chunk_start,
+                    end=chunk.chunk_end,
+                    extracted_maps=extracted_maps
+                )
+                for chunk in chunks
+            ]
+        finally:
+            for extracted_map in extracted_maps.values():
+                extracted_map.close()
+
+    def iter_file_chunks(self, file_id: str,
+                         chunk_size: int = 100, overlap_len: int = 10,
+                         batch_size: int = 200,
+                         storage_mode: str = ChunkStorageEnum.TEXT.value):
+        '''
+        This method streams the chunks of iter_page_chunks in lists of at most batch_size chunks
+        Pages are split independently (the same way get_file_chunks does), so the peak memory depends on the batch size and not on the document size
+        '''
+        batch = []
+        for chunk in self.iter_page_chunks(file_id=file_id,
+                                           chunk_size=chunk_size,
+                                           overlap_len=overlap_len,
+                                           storage_mode=storage_mode):
+            batch.append(chunk)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+    @staticmethod
+    def process_file(project_id: int, asset_id: int, file_id: str,
+                     chunk_size: int = 100, overlap_len: int = 10,
+                     storage_mode: str = ChunkStorageEnum.TEXT.value):
+        '''
+        This method loads and splits a single file and returns the chunks as plain (text, metadata, start, end) tuples
+        It is executed inside the process pool workers, so it only receives and returns picklable values
+        '''
+        process_controller = ProcessController(project_id=project_id)
+
+        if process_controller.get_file_loader(file_id=file_id) is None:
+            return asset_id, file_id, None
+
+        return asset_id, file_id, list(
+            process_controller.iter_page_chunks(
+                file_id=file_id,
+                chunk_size=chunk_size,
+                overlap_len=overlap_len,
+                storage_mode=storage_mode
+            )
+        )
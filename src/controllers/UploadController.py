@@ -0,0 +1,175 @@
+from .BaseController import BaseController
+from .ProjectController import ProjectController
+from models import ResponseSignal
+
+from typing import AsyncIterator, List, Tuple
+import aiofiles
+import hashlib
+import shutil
+import json
+import uuid
+import os
+
+
+class UploadController(BaseController):
+    '''
+    This is the UploadController class, it handles the resumable upload sessions of large files
+    A session is a directory under <project>/.uploads/<upload_id> that holds:
+    - session.json: the name, content type and size declared by the client
+    - data: the target file, pre-allocated to the declared size, every range is written at its own offset
+    - ranges/: one empty marker file "<start>-<end>" per received range, so parallel requests never share state
+
+    It has the following methods:
+
+    create_session: This method validates the declared file and creates the session directory
+
+    get_session: This method loads the manifest of a session, it returns None if the session does not exist
+
+    write_range: This method streams a byte range of the request body to its offset in the data file
+
+    get_received_ranges: This method returns the merged received ranges and the missing ones
+
+    finalize_session: This method checks that every byte was received and returns the data file path and its SHA-256
+
+    delete_session: This method removes the session directory
+    '''
+
+    def __init__(self, project_id: int):
+        super().__init__()
+
+        self.project_id = project_id
+        self.project_path = ProjectController().get_project_path(project_id=project_id)
+        self.size_convert = 1 << 20
+
+    def get_session_path(self, upload_id: str):
+        return os.path.join(
+            self.project_path,
+            '.uploads',
+            upload_id
+        )
+
+    def create_session(self, file_name: str, file_size: int, content_type: str):
+
+        if content_type not in self.app_settings.FILE_ALLOWED_TYPES:
+            return None, ResponseSignal.FILE_TYPE_NOT_SUPPORTED.value
+
+        if file_size <= 0 or file_size > self.app_settings.FILE_ALLOWED_SIZE*self.size_convert:
+            return None, ResponseSignal.FILE_SIZE_EXCEEDED.value
+
+        upload_id = uuid.uuid4().hex
+        session_path = self.get_session_path(upload_id=upload_id)
+        os.makedirs(os.path.join(session_path, 'ranges'))
+
+        # Sparse pre-allocation, the ranges are written in place and never copied afterwards
+        with open(os.path.join(session_path, 'data'), 'wb') as f:
+            f.truncate(file_size)
+
+        with open(os.path.join(session_path, 'session.json'), 'w') as f:
+            json.dump({
+                'upload_id': upload_id,
+                'file_name': file_name,
+                'file_size': file_size,
+                'content_type': content_type
+            }, f)
+
+        return upload_id, ResponseSignal.UPLOAD_SESSION_CREATED.value
+
+    def get_session(self, upload_id: str):
+
+        # upload_id comes from the url, only the ids created by create_session are accepted
+        try:
+            upload_id = uuid.UUID(hex=upload_id).hex
+        except ValueError:
+            return None
+
+        manifest_path = os.path.join(
+            self.get_session_path(upload_id=upload_id),
+            'session.json'
+        )
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    async def write_range(self, session: dict, offset: int, body: AsyncIterator[bytes]):
+        '''
+        The body is written chunk by chunk, it is never held in memory as a whole
+        The range marker is created only after all of its bytes are on disk
+        '''
+        if offset < 0 or offset >= session['file_size']:
+            return None
+
+        session_path = self.get_session_path(upload_id=session['upload_id'])
+        end = offset
+
+        async with aiofiles.open(os.path.join(session_path, 'data'), 'r+b') as f:
+            await f.seek(offset)
+            async for chunk in body:
+                if end + len(chunk) > session['file_size']:
+                    return None
+                await f.write(chunk)
+                end += len(chunk)
+
+        if end > offset:
+            marker_path = os.path.join(session_path, 'ranges', f'{offset}-{end}')
+            open(marker_path, 'wb').close()
+
+        return offset, end
+
+    def get_received_ranges(self, session: dict):
+
+        ranges_path = os.path.join(
+            self.get_session_path(upload_id=session['upload_id']),
+            'ranges'
+        )
+
+        ranges = sorted(
+            tuple(map(int, marker.split('-')))
+            for marker in os.listdir(ranges_path)
+        )
+
+        received: List[Tuple[int, int]] = []
+        for start, end in ranges:
+            if received and start <= received[-1][1]:
+                received[-1] = (received[-1][0], max(received[-1][1], end))
+            else:
+                received.append((start, end))
+
+        missing = []
+        cursor = 0
+        for start, end in received:
+            if start > cursor:
+                missing.append((cursor, start))
+            cursor = end
+        if cursor < session['file_size']:
+            missing.append((cursor, session['file_size']))
+
+        return received, missing
+
+    def finalize_session(self, session: dict, file_path: str):
+        '''
+        The data file is moved (not copied) to file_path, the hash is computed with a streaming read
+        '''
+        _, missing = self.get_received_ranges(session=session)
+        if missing:
+            return None
+
+        session_path = self.get_session_path(upload_id=session['upload_id'])
+        data_path = os.path.join(session_path, 'data')
+
+        file_hash = hashlib.sha256()
+        with open(data_path, 'rb') as f:
+            while chunk := f.read(self.app_settings.FILE_DEFAULT_CHUNK):
+                file_hash.update(chunk)
+
+        os.replace(data_path, file_path)
+        self.delete_session(session=session)
+
+        return file_hash.hexdigest()
+
+    def delete_session(self, session: dict):
+        shutil.rmtree(
+            self.get_session_path(upload_id=session['upload_id']),
+            ignore_errors=True
+        )
@@ -1 +1,2 @@
 from .config import get_settings, Settings
+from .text_splitter import TextSplitter
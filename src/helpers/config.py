@@ -14,6 +14,20 @@ class Settings(BaseSettings):
     FILE_ALLOWED_SIZE: int
     FILE_DEFAULT_CHUNK: int
 
+    UPLOAD_MAX_CONCURRENCY: int = 8
+
+    PROCESS_MAX_WORKERS: int = 4
+    PROCESS_STREAM_BATCH_SIZE: int = 200
+
+    CHUNK_STORAGE_MODE: str = 'text'
+
+    JOB_MAX_CONCURRENCY: int = 2
+    JOB_CHECKPOINT_INTERVAL: float = 1.0
+
+    INDEX_PUSH_PAGE_SIZE: int = 50
+    INDEX_PUSH_EMBEDDING_WORKERS: int = 4
+    INDEX_PUSH_QUEUE_SIZE: int = 4
+
     POSTGRES_USERNAME: str
     POSTGRES_PASSWORD: str
     POSTGRES_HOST: str
@@ -34,15 +48,56 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_ID: str
     EMBEDDING_SIZE: int
 
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_MAX_BATCH_SIZE: int = None
+    EMBEDDING_MAX_BATCH_CHARACTERS: int = None
+    EMBEDDING_TARGET_LATENCY: float = 2.0
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500000
+
     DEFAULT_INPUT_MAX_CHARACTERS: int = None
     DEFAULT_MAX_NEW_TOKENS: int = None
     DEFAULT_TEMPERATURE: float = None
 
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP_TIMEOUT: float = 60.0
+
+    LLM_MAX_RETRIES: int = 5
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 60.0
+
+    OPENAI_REQUESTS_PER_MINUTE: int = None
+    OPENAI_TOKENS_PER_MINUTE: int = None
+    COHERE_REQUESTS_PER_MINUTE: int = None
+    COHERE_TOKENS_PER_MINUTE: int = None
+    GOOGLE_REQUESTS_PER_MINUTE: int = None
+    GOOGLE_TOKENS_PER_MINUTE: int = None
+
     VECTOR_DB_BACKEND_LITERAL: List[str] = None
     VECTOR_DB_BACKEND: str
     VECTOR_DB_PATH: str
     VECTOR_DB_DISTANCE_METHOD: str
     VECTOR_DB_PG_INDEXING_THRESHOLD: int
+    VECTOR_DB_PG_INDEX_TYPE: str = 'hnsw'
+    VECTOR_DB_PG_HNSW_M: int = 16
+    VECTOR_DB_PG_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_DB_PG_IVFFLAT_LISTS: int = None
+    VECTOR_DB_PG_INDEX_MAINTENANCE_WORK_MEM: str = None
+    VECTOR_DB_PG_INDEX_PARALLEL_WORKERS: int = None
+    VECTOR_DB_PG_COPY_INSERT: bool = True
+    VECTOR_DB_PG_HNSW_EF_SEARCH: int = None
+    VECTOR_DB_PG_IVFFLAT_PROBES: int = None
+    VECTOR_DB_STORAGE_TYPE: str = 'vector'
+    VECTOR_DB_BIT_RESCORE_FACTOR: int = 4
+    VECTOR_DB_PG_ITERATIVE_SCAN: str = 'relaxed_order'
+    VECTOR_DB_PG_HYBRID_SEARCH: bool = False
+    VECTOR_DB_PG_TEXT_SEARCH_CONFIG: str = 'simple'
+    VECTOR_DB_PG_HYBRID_CANDIDATES_FACTOR: int = 4
+    VECTOR_DB_PG_HYBRID_RRF_K: int = 60
+    VECTOR_DB_COLLECTION_CACHE_TTL: float = 60.0
 
     DEFAULT_LANGUAGE: str = 'en'
     PRIMARY_LANGUAGE: str
@@ -0,0 +1,223 @@
+from langchain_core.documents import Document
+
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+import copy
+import re
+
+
+class TextSplitter:
+    '''
+    TextSplitter Class for splitting the file contents into chunks
+    It keeps the chunk_size/chunk_overlap semantics of langchain RecursiveCharacterTextSplitter
+    (separators kept at the start of the pieces, whitespace stripped, length measured with len),
+    but it works on (start, end) offsets into the source string and only builds the strings at the end
+
+    split_offsets: This method returns the (start, end) offsets of the chunks of the text
+    split_text: This method returns the chunks of the text as strings
+    create_documents: This method splits a list of texts into langchain Documents with their metadata
+    get_separators: This method picks the separators of a text read in windows
+    split_windows: This method splits a text read in windows, without holding the whole text in memory
+    '''
+
+    def __init__(self, chunk_size: int = 100, chunk_overlap: int = 10,
+                 separators: List[str] = None):
+
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f'Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller.')
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or ["\n\n", "\n", " ", ""]
+
+        self._patterns = {}
+
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
+        spans = []
+        self._split(text, 0, len(text), self.separators, spans)
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        return [
+            text[start:end]
+            for start, end in self.split_offsets(text)
+        ]
+
+    def create_documents(self, texts: List[str], metadatas: List[dict] = None) -> List[Document]:
+        metadatas = metadatas or [{}] * len(texts)
+        return [
+            Document(page_content=chunk, metadata=copy.deepcopy(metadata))
+            for text, metadata in zip(texts, metadatas)
+            for chunk in self.split_text(text)
+        ]
+
+    def get_separators(self, windows: Iterable[str]) -> Tuple[str, List[str]]:
+        '''
+        This method returns the separator the text is split on first (the first one found in the whole text)
+        and the separators of the pieces that are too long, the windows of the text are read once
+        '''
+        candidates = [separator for separator in self.separators if separator != '']
+        tail_len = max([len(separator) for separator in candidates], default=1) - 1
+
+        found, tail = set(), ''
+        for window in windows:
+            text = tail + window
+            found.update(separator for separator in candidates if separator not in found and separator in text)
+            # A separator may start at the end of a window and finish in the next one
+            tail = text[-tail_len:] if tail_len else ''
+
+        return self._select_separator(self.separators, lambda separator: separator in found)
+
+    def split_windows(self, windows: Iterable[str], separator: str,
+                      new_separators: List[str]) -> Iterator[Tuple[str, int, List[Tuple[int, int]]]]:
+        '''
+        This method splits a text read in windows and yields one (text, offset, spans) tuple per window:
+        text is the part of the text held in memory, offset its position in the whole text and spans the chunks found in it
+        With the separators of get_separators the chunks are the ones of split_offsets on the whole text:
+        only the pieces that end before the last separator are split, and the last chunk of a run of small pieces
+        (it may still grow with the next pieces) is carried with the rest of the text, so the overlap crosses the windows
+        The memory is bounded by the window size plus the longest piece between two separators
+        '''
+        text, offset = '', 0
+
+        for window in windows:
+            text += window
+
+            starts, ends = self._split_on_separator(text, 0, len(text), separator)
+            if len(starts) < 2:
+                continue
+
+            # The last piece may continue in the next window
+            spans = []
+            carry = self._split_pieces(text, starts[:-1], ends[:-1], new_separators, spans, is_last=False)
+            carry = starts[-1] if carry is None else carry
+
+            yield text, offset, spans
+
+            text, offset = text[carry:], offset + carry
+
+        if text:
+            spans = []
+            starts, ends = self._split_on_separator(text, 0, len(text), separator)
+            self._split_pieces(text, starts, ends, new_separators, spans)
+
+            yield text, offset, spans
+
+    def _select_separator(self, separators: List[str], is_found: Callable[[str], bool]):
+        '''
+        This method returns the first separator found in the text and the separators left after it
+        '''
+        separator = separators[-1]
+        new_separators = []
+        for idx, _separator in enumerate(separators):
+            if _separator == '':
+                separator = _separator
+                break
+            if is_found(_separator):
+                separator = _separator
+                new_separators = separators[idx + 1:]
+                break
+
+        return separator, new_separators
+
+    def _split(self, text: str, start: int, end: int,
+               separators: List[str], spans: List[Tuple[int, int]]):
+        '''
+        This method splits text[start:end] on the first separator found in it, merges the small pieces
+        and recursively splits the pieces that are still longer than the chunk size with the next separators
+        '''
+        separator, new_separators = self._select_separator(
+            separators, lambda _separator: text.find(_separator, start, end) != -1)
+
+        starts, ends = self._split_on_separator(text, start, end, separator)
+
+        self._split_pieces(text, starts, ends, new_separators, spans)
+
+    def _split_pieces(self, text: str, starts: List[int], ends: List[int], new_separators: List[str],
+                      spans: List[Tuple[int, int]], is_last: bool = True) -> Optional[int]:
+        '''
+        This method merges the runs of small pieces and splits the long pieces with new_separators
+        When is_last is False the last chunk of the last run is not emitted, its start is returned
+        (None when the pieces end with a long piece)
+        '''
+        lo = 0
+        for idx in [idx for idx, (piece_start, piece_end) in enumerate(zip(starts, ends))
+                    if piece_end - piece_start >= self.chunk_size]:
+
+            if idx > lo:
+                self._merge(text, starts, ends, lo, idx, spans)
+
+            if not new_separators:
+                spans.append((starts[idx], ends[idx]))
+            else:
+                self._split(text, starts[idx], ends[idx], new_separators, spans)
+
+            lo = idx + 1
+
+        if len(starts) > lo:
+            return self._merge(text, starts, ends, lo, len(starts), spans, is_last=is_last)
+
+        return None
+
+    def _split_on_separator(self, text: str, start: int, end: int, separator: str):
+        '''
+        This method returns the starts and ends of the non-empty pieces of text[start:end],
+        every piece starts with its separator
+        The separators are located with a single left to right sweep over the span
+        '''
+        if start >= end:
+            return [], []
+
+        if separator == '':
+            return range(start, end), range(start + 1, end + 1)
+
+        pattern = self._patterns.get(separator)
+        if pattern is None:
+            pattern = self._patterns[separator] = re.compile(re.escape(separator))
+
+        starts = [match.start() for match in pattern.finditer(text, start, end)]
+        if not starts or starts[0] > start:
+            starts.insert(0, start)
+
+        ends = starts[1:]
+        ends.append(end)
+
+        return starts, ends
+
+    def _merge(self, text: str, starts: List[int], ends: List[int], lo: int, hi: int,
+               spans: List[Tuple[int, int]], is_last: bool = True) -> int:
+        '''
+        This method merges the consecutive pieces lo..hi-1 into chunks of at most chunk_size characters
+        The pieces are contiguous, so the length of a run of pieces is just the distance between its bounds
+        and the chunk boundaries are found by binary search instead of adding the pieces one by one
+        Once a chunk is emitted, the pieces from its start are dropped until at most chunk_overlap characters remain
+        and the next piece fits in the chunk size
+        The merge state is only the first piece of the current chunk, it is returned so the merge can go on from it
+        '''
+        first = lo
+        idx = bisect_right(ends, starts[first] + self.chunk_size, first + 1, hi)
+
+        while idx < hi:
+            self._append_stripped(text, starts[first], ends[idx - 1], spans)
+
+            threshold = max(ends[idx - 1] - self.chunk_overlap,
+                            ends[idx] - self.chunk_size)
+            first = bisect_left(starts, threshold, first, idx)
+
+            idx = bisect_right(ends, starts[first] + self.chunk_size, idx + 1, hi)
+
+        if is_last:
+            self._append_stripped(text, starts[first], ends[hi - 1], spans)
+
+        return starts[first]
+
+    def _append_stripped(self, text: str, start: int, end: int, spans: List[Tuple[int, int]]):
+
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+
+        if start < end:
+            spans.append((start, end))
@@ -1,5 +1,5 @@
 from fastapi import FastAPI
-from routes import base, data, nlp
+from routes import base, data, nlp, jobs
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -10,10 +10,14 @@ from stores.vectordb import VectorDBFactoryProvider
 
 from helpers.config import get_settings
 from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
-from models import ProjectModel, ChunkModel
+from models import ProjectModel, ChunkModel, JobModel
+from models.enums import JobTypeEnum
 
-from controllers import NLPController
+from controllers import NLPController, JobController
+from functools import partial
 
 
 async def startup_spam():
@@ -32,7 +36,7 @@ async def startup_spam():
         expire_on_commit=False
     )
 
-    llm_factory_provider = LLMFactoryProvider(config=settings)
+    app.llm_factory_provider = LLMFactoryProvider(config=settings)
     vectordb_factory_provider = VectorDBFactoryProvider(
         config=settings,
         db_client=app.db_client
@@ -48,14 +52,23 @@ async def startup_spam():
         db_client=app.db_client
     )
 
+    # Process pool used to load and split files outside the event loop,
+    # the jobs recreate it with create_process_pool if a worker process dies
+    app.create_process_pool = partial(
+        ProcessPoolExecutor,
+        max_workers=settings.PROCESS_MAX_WORKERS,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+    app.process_pool = app.create_process_pool()
+
     # Generation model
-    app.generation_model = llm_factory_provider.create_provider(
+    app.generation_model = app.llm_factory_provider.create_provider(
         provider=settings.GENERATION_BACKEND)
     app.generation_model.set_generation_model(
         model_id=settings.GENERATION_MODEL_ID)
 
     # Embedding model
-    app.embedding_model = llm_factory_provider.create_provider(
+    app.embedding_model = app.llm_factory_provider.create_provider(
         provider=settings.EMBEDDING_BACKEND)
     app.embedding_model.set_embedding_model(
         embedding_model_id=settings.EMBEDDING_MODEL_ID,
@@ -78,12 +91,33 @@ async def startup_spam():
         vectordb_client=app.vectordb_client,
         generation_model=app.generation_model,
         embedding_model=app.embedding_model,
-        template_parser=app.template_parser
+        template_parser=app.template_parser,
+        chunk_model=app.chunk_model
+    )
+
+    # Background jobs
+    app.job_controller = JobController(
+        job_model=await JobModel.create_instance(db_client=app.db_client, db_engine=app.db_engine),
+        max_concurrency=settings.JOB_MAX_CONCURRENCY
+    )
+    app.job_controller.register_handler(
+        job_type=JobTypeEnum.PROCESS.value,
+        handler=partial(data.process_project_job, app)
+    )
+    app.job_controller.register_handler(
+        job_type=JobTypeEnum.INDEX_PUSH.value,
+        handler=partial(nlp.index_project_job, app)
     )
+    await app.job_controller.resume_unfinished_jobs()
 
 
 async def shutdown_spam():
 
+    await app.job_controller.shutdown()
+    app.process_pool.shutdown(wait=False, cancel_futures=True)
+    if app.nlp_controller.embedding_cache is not None:
+        app.nlp_controller.embedding_cache.close()
+    await app.llm_factory_provider.close()
     await app.db_engine.dispose()
     await app.vectordb_client.disconnect()
 
@@ -101,3 +135,4 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
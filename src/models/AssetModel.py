@@ -1,9 +1,14 @@
 from .BaseDataModel import BaseDataModel
 from .enums.DataBaseEnum import DataBaseEnum
+from .enums.AssetConfigEnum import AssetConfigEnum
 from .db_schemas import Asset
 from bson import ObjectId
+import uuid
 
 from sqlalchemy.future import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from typing import List
 
 
 class AssetModel(BaseDataModel):
@@ -13,8 +18,17 @@ class AssetModel(BaseDataModel):
     It has the following methods:
     - create_instance: This method is a class method that creates an instance of the AssetModel class 
     - create_asset: This method is an async method that creates a new asset in the database
+    - create_many_assets: This method is an async method that inserts many assets with a single statement
+    - get_asset_values: This method returns the column values of an asset for the INSERT statements
+    - get_conflicting_asset: This method is an async method that retrieves the stored asset with the content hash of an asset
     - get_all_project_assets: This method is an async method that retrieves all the assets for a specific project
     - get_asset_by_id: This method is an async method that retrieves an asset by its id
+    - get_asset_by_hash: This method is an async method that retrieves an asset of a project by the SHA-256 of its content
+    - get_assets_by_hashes: This method is an async method that maps each known SHA-256 of a project to its asset
+    - update_asset_config: This method is an async method that replaces the asset_config of an asset
+
+    The SHA-256 of the assets is unique per project, create_asset and create_many_assets return the stored asset
+    instead of a new one when its content is already in the project (ON CONFLICT DO NOTHING then a lookup)
     '''
 
     def __init__(self, db_client: object):
@@ -25,15 +39,66 @@ class AssetModel(BaseDataModel):
         instance = cls(db_client)
         return instance
 
+    @staticmethod
+    def get_asset_values(asset: Asset):
+        return {
+            'asset_uuid': asset.asset_uuid or uuid.uuid4(),
+            'asset_project_id': asset.asset_project_id,
+            'asset_name': asset.asset_name,
+            'asset_type': asset.asset_type,
+            'asset_size': asset.asset_size,
+            'asset_config': asset.asset_config,
+        }
+
+    async def get_conflicting_asset(self, asset: Asset):
+        # The insert was skipped by the unique content hash, the asset that holds it is returned
+        return await self.get_asset_by_hash(
+            asset_project_id=asset.asset_project_id,
+            asset_hash=(asset.asset_config or {}).get(AssetConfigEnum.SHA256.value)
+        )
+
     async def create_asset(self, asset: Asset):
 
         async with self.db_client() as session:
             async with session.begin():
-                session.add(asset)
-            await session.commit()
-            # This is to refresh the project object with the new values from the database
-            await session.refresh(asset)
-        return asset
+                query = insert(Asset).values(
+                    **self.get_asset_values(asset)
+                ).on_conflict_do_nothing().returning(Asset)
+                result = await session.execute(query)
+                record = result.scalar_one_or_none()
+
+        if record is None:
+            record = await self.get_conflicting_asset(asset=asset)
+
+        return record
+
+    async def create_many_assets(self, assets: List[Asset]):
+
+        if not assets:
+            return assets
+
+        rows = [self.get_asset_values(asset) for asset in assets]
+
+        async with self.db_client() as session:
+            async with session.begin():
+                query = insert(Asset).values(rows).on_conflict_do_nothing().returning(
+                    Asset.asset_uuid, Asset.asset_id)
+                result = await session.execute(query)
+                # RETURNING does not promise the order of the values, the rows are matched back by uuid
+                asset_ids = dict(result.all())
+
+        records = []
+        for asset, row in zip(assets, rows):
+
+            if row['asset_uuid'] not in asset_ids:
+                records.append(await self.get_conflicting_asset(asset=asset))
+                continue
+
+            asset.asset_uuid = row['asset_uuid']
+            asset.asset_id = asset_ids[asset.asset_uuid]
+            records.append(asset)
+
+        return records
 
     async def get_all_project_assets(self, asset_project_id: int, asset_type: str):
         async with self.db_client() as session:
@@ -56,3 +121,44 @@ class AssetModel(BaseDataModel):
             record = result.scalar_one_or_none()
 
         return record
+
+    async def get_asset_by_hash(self, asset_project_id: int, asset_hash: str):
+        async with self.db_client() as session:
+            query = select(Asset).where(
+                Asset.asset_project_id == asset_project_id,
+                Asset.asset_config[AssetConfigEnum.SHA256.value].astext == asset_hash
+            )
+            result = await session.execute(query)
+            record = result.scalar_one_or_none()
+
+        return record
+
+    async def get_assets_by_hashes(self, asset_project_id: int, asset_hashes: List[str]):
+
+        if not asset_hashes:
+            return {}
+
+        asset_hash = Asset.asset_config[AssetConfigEnum.SHA256.value].astext
+
+        async with self.db_client() as session:
+            query = select(Asset).where(
+                Asset.asset_project_id == asset_project_id,
+                asset_hash.in_(asset_hashes)
+            )
+            result = await session.execute(query)
+            records = result.scalars().all()
+
+        return {
+            record.asset_config[AssetConfigEnum.SHA256.value]: record
+            for record in records
+        }
+
+    async def update_asset_config(self, asset_id: int, asset_config: dict):
+        async with self.db_client() as session:
+            query = update(Asset).where(
+                Asset.asset_id == asset_id
+            ).values(asset_config=asset_config)
+            result = await session.execute(query)
+            await session.commit()
+
+        return result.rowcount
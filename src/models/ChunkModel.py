@@ -1,11 +1,14 @@
 from .BaseDataModel import BaseDataModel
 from .enums.DataBaseEnum import DataBaseEnum
-from .db_schemas import DataChunk
+from .db_schemas import DataChunk, Asset
 from pymongo import InsertOne
 from bson import ObjectId
 
 from sqlalchemy.future import select
-from sqlalchemy import func, delete
+from sqlalchemy import func, delete, update
+from sqlalchemy.sql import text as sql_text
+from psycopg.types.json import Jsonb
+import uuid
 
 
 class ChunkModel(BaseDataModel):
@@ -20,8 +23,15 @@ class ChunkModel(BaseDataModel):
     - create_chunk: This method is used to create a new chunk in the database
     - get_chunk: This method is used to get a chunk from the database by its id
     - insert_many_chunks: This method is used to insert multiple chunks into the database
+    - copy_many_chunks: This method is used to stream multiple chunks into the database with COPY and returns their ids
     - delete_chunk_by_project_id: This method is used to delete all the chunks related to a project from the database
+    - get_asset_chunk_ids: This method is used to get the ids of all the chunks related to an asset
+    - delete_chunks_by_asset_id: This method is used to delete all the chunks related to an asset from the database
     - get_project_chunks: This method is used to get all the chunks related to a project from the database with pagination 
+    - iter_project_chunks: This method is used to stream the chunks of a project in chunk_id order with keyset pagination, it yields only the columns needed for indexing
+    - get_chunks_with_asset_names: This method is used to get chunks by their ids with the name of their asset, it is used to read the offsets chunks
+    - mark_chunks_indexed: This method is used to record that chunks were inserted into the vector database
+    - reset_chunks_indexed: This method is used to mark all the chunks of a project as not indexed
     '''
 
     def __init__(self, db_client: object):
@@ -54,11 +64,16 @@ class ChunkModel(BaseDataModel):
             chunk = result.scalar_one_or_none()
             return chunk
 
-    async def insert_many_chunks(self, chunks: list, batch_size: int = 100):
+    async def insert_many_chunks(self, chunks: list, batch_size: int = 100, use_copy: bool = True):
         '''
         In this method, we insert multiple chunks into the chunks collection
-        Instead of inserting one by one, we insert in batches to improve the performance of the insertion which's name is bulk insertion
+        By default the chunks are streamed with the PostgreSQL COPY protocol (copy_many_chunks)
+        Otherwise, we insert in batches through the ORM which's name is bulk insertion
         '''
+        if use_copy:
+            chunk_ids = await self.copy_many_chunks(chunks=chunks)
+            return len(chunk_ids)
+
         async with self.db_client() as session:
             async with session.begin():
                 for i in range(0, len(chunks), batch_size):
@@ -68,6 +83,61 @@ class ChunkModel(BaseDataModel):
 
         return len(chunks)
 
+    async def copy_many_chunks(self, chunks: list):
+        '''
+        In this method, we stream the chunks into the chunks table with COPY ... FROM STDIN through psycopg
+        COPY can't return the generated keys, so the chunk ids are reserved from the table sequence first
+        and written explicitly, the ids are returned in the order of the chunks (and set on the chunk objects)
+        '''
+        if len(chunks) == 0:
+            return []
+
+        async with self.db_client() as session:
+            async with session.begin():
+
+                reserve_ids_query = sql_text(
+                    "SELECT nextval(pg_get_serial_sequence(:table_name, 'chunk_id')) "
+                    "FROM generate_series(1, :count)"
+                )
+                result = await session.execute(
+                    reserve_ids_query,
+                    {
+                        'table_name': DataBaseEnum.COLLECTION_CHUNK_NAME.value,
+                        'count': len(chunks)
+                    }
+                )
+                chunk_ids = sorted(result.scalars().all())
+
+                # The COPY runs on the psycopg connection of the session, inside the same transaction
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+                driver_connection = raw_connection.driver_connection
+
+                async with driver_connection.cursor() as cursor:
+                    async with cursor.copy(
+                        f'COPY {DataBaseEnum.COLLECTION_CHUNK_NAME.value} '
+                        '(chunk_id, chunk_uuid, chunk_text, chunk_metadata, chunk_order, '
+                        'chunk_start, chunk_end, chunk_project_id, chunk_asset_id) FROM STDIN'
+                    ) as copy:
+                        for chunk_id, chunk in zip(chunk_ids, chunks):
+                            await copy.write_row((
+                                chunk_id,
+                                chunk.chunk_uuid or uuid.uuid4(),
+                                chunk.chunk_text,
+                                Jsonb(chunk.chunk_metadata) if chunk.chunk_metadata is not None else None,
+                                chunk.chunk_order,
+                                chunk.chunk_start,
+                                chunk.chunk_end,
+                                chunk.chunk_project_id,
+                                chunk.chunk_asset_id
+                            ))
+            await session.commit()
+
+        for chunk_id, chunk in zip(chunk_ids, chunks):
+            chunk.chunk_id = chunk_id
+
+        return chunk_ids
+
     async def delete_chunk_by_project_id(self, project_id: int):
 
         async with self.db_client() as session:
@@ -78,24 +148,126 @@ class ChunkModel(BaseDataModel):
 
         return result.rowcount
 
+    async def get_asset_chunk_ids(self, asset_id: int):
+
+        async with self.db_client() as session:
+            query = select(DataChunk.chunk_id).where(
+                DataChunk.chunk_asset_id == asset_id)
+            result = await session.execute(query)
+            chunk_ids = result.scalars().all()
+
+        return chunk_ids
+
+    async def delete_chunks_by_asset_id(self, asset_id: int):
+
+        async with self.db_client() as session:
+            query = delete(DataChunk).where(
+                DataChunk.chunk_asset_id == asset_id)
+            result = await session.execute(query)
+            await session.commit()
+
+        return result.rowcount
+
     async def get_project_chunks(self, project_id: int, page_no: int = 1, page_size: int = 50):
         async with self.db_client() as session:
 
             query = select(DataChunk).where(
-                DataChunk.chunk_project_id == project_id).offset((page_no-1)*page_size).limit(page_size)
+                DataChunk.chunk_project_id == project_id).order_by(DataChunk.chunk_id).offset((page_no-1)*page_size).limit(page_size)
 
             result = await session.execute(query)
             records = result.scalars().all()
 
         return records
 
-    async def get_total_chunks_count(self, project_id: int):
+    async def iter_project_chunks(self, project_id: int, page_size: int = 50, after_chunk_id: int = 0,
+                                  only_unindexed: bool = False):
+        '''
+        Every page is a range scan of the (chunk_project_id, chunk_id) index that starts after the last seen chunk_id,
+        so its cost does not grow with the page number like OFFSET does, and no row is skipped or repeated
+        With only_unindexed, only the chunks that are not in the vector database yet are returned (partial index)
+        '''
+        last_chunk_id = after_chunk_id
+
+        while True:
+            async with self.db_client() as session:
+
+                query = select(
+                    DataChunk.chunk_id,
+                    DataChunk.chunk_text,
+                    DataChunk.chunk_metadata,
+                    DataChunk.chunk_asset_id,
+                    DataChunk.chunk_start,
+                    DataChunk.chunk_end
+                ).where(
+                    DataChunk.chunk_project_id == project_id,
+                    DataChunk.chunk_id > last_chunk_id
+                ).order_by(DataChunk.chunk_id).limit(page_size)
+
+                if only_unindexed:
+                    query = query.where(DataChunk.chunk_indexed_at.is_(None))
+
+                result = await session.execute(query)
+                records = result.all()
+
+            if not records:
+                break
+
+            yield records
+
+            last_chunk_id = records[-1].chunk_id
+
+    async def get_chunks_with_asset_names(self, chunk_ids: list):
+
+        async with self.db_client() as session:
+            query = select(
+                DataChunk.chunk_id,
+                DataChunk.chunk_text,
+                DataChunk.chunk_start,
+                DataChunk.chunk_end,
+                DataChunk.chunk_asset_id,
+                Asset.asset_name
+            ).join(
+                Asset, Asset.asset_id == DataChunk.chunk_asset_id
+            ).where(
+                DataChunk.chunk_id.in_(chunk_ids)
+            )
+            result = await session.execute(query)
+            records = result.all()
+
+        return records
+
+    async def get_total_chunks_count(self, project_id: int, only_unindexed: bool = False):
 
         total_count = 0
         async with self.db_client() as session:
             query = select(func.count(DataChunk.chunk_id)).where(
                 DataChunk.chunk_project_id == project_id)
+            if only_unindexed:
+                query = query.where(DataChunk.chunk_indexed_at.is_(None))
             result = await session.execute(query)
             total_count = result.scalar()
 
         return total_count
+
+    async def mark_chunks_indexed(self, chunk_ids: list):
+
+        async with self.db_client() as session:
+            query = update(DataChunk).where(
+                DataChunk.chunk_id.in_(chunk_ids)
+            ).values(chunk_indexed_at=func.now())
+            result = await session.execute(query)
+            await session.commit()
+
+        return result.rowcount
+
+    async def reset_chunks_indexed(self, project_id: int):
+
+        async with self.db_client() as session:
+            query = update(DataChunk).where(
+                DataChunk.chunk_project_id == project_id,
+                DataChunk.chunk_indexed_at.is_not(None)
+            ).values(chunk_indexed_at=None)
+            result = await session.execute(query)
+            await session.commit()
+
+        return result.rowcount
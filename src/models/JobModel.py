@@ -0,0 +1,117 @@
+from .BaseDataModel import BaseDataModel
+from .enums.JobEnum import JobStatusEnum
+from .db_schemas import Job
+
+from sqlalchemy.future import select
+from sqlalchemy import update, func
+
+from contextlib import asynccontextmanager
+
+
+class JobModel(BaseDataModel):
+    '''
+    JobModel class is the data model for the jobs collection in the database
+    The class is responsible for all the operations related to the background jobs
+    The class inherits from the BaseDataModel class which is responsible for the database connection
+
+    The class has the following methods:
+    - create_instance: This method is used to create an instance of the JobModel class
+    - create_job: This method is used to create a new job in the database
+    - get_job_by_uuid: This method is used to get a job by its public uuid
+    - update_job: This method is used to update the status, progress or errors of a job
+    - get_unfinished_jobs: This method is used to get the queued and running jobs, they are resumed on startup
+    - claim_job: This method is used to take a queued or running job for this process before running it
+    '''
+
+    def __init__(self, db_client: object, db_engine: object):
+        super().__init__(db_client)
+        # claim_job holds its advisory lock on a connection of its own, taken from the engine
+        self.db_engine = db_engine
+
+    @classmethod
+    async def create_instance(cls, db_client: object, db_engine: object):
+        instance = cls(db_client, db_engine)
+        return instance
+
+    async def create_job(self, job: Job):
+
+        async with self.db_client() as session:
+            async with session.begin():
+                session.add(job)
+            await session.commit()
+            # This is to refresh the job object with the new values from the database
+            await session.refresh(job)
+
+        return job
+
+    async def get_job_by_uuid(self, job_uuid: str):
+
+        async with self.db_client() as session:
+            query = select(Job).where(Job.job_uuid == job_uuid)
+            result = await session.execute(query)
+            job = result.scalar_one_or_none()
+
+        return job
+
+    async def update_job(self, job_id: int, **values):
+
+        async with self.db_client() as session:
+            query = update(Job).where(Job.job_id == job_id).values(**values)
+            result = await session.execute(query)
+            await session.commit()
+
+        return result.rowcount
+
+    async def get_unfinished_jobs(self):
+
+        async with self.db_client() as session:
+            query = select(Job).where(
+                Job.job_status.in_([
+                    JobStatusEnum.QUEUED.value,
+                    JobStatusEnum.RUNNING.value
+                ])
+            ).order_by(Job.job_id)
+            result = await session.execute(query)
+            jobs = result.scalars().all()
+
+        return jobs
+
+    @asynccontextmanager
+    async def claim_job(self, job_id: int):
+        '''
+        Every server (or worker) resumes the unfinished jobs on startup, the claim makes sure one of them runs each job:
+        a session advisory lock on the job id is held on a dedicated connection while the job runs
+        (a dead process releases it with its connection, so its jobs can be claimed on the next startup),
+        then the job is set to running with an UPDATE ... RETURNING that only matches an unfinished job
+        It yields the claimed job, or None when the job runs elsewhere or has finished since it was read
+        '''
+        lock_keys = (func.hashtext(Job.__tablename__), job_id)
+
+        async with self.db_engine.connect() as connection:
+            is_locked = await connection.scalar(select(func.pg_try_advisory_lock(*lock_keys)))
+            await connection.commit()
+
+            if not is_locked:
+                yield None
+                return
+
+            try:
+                async with self.db_client() as session:
+                    query = update(Job).where(
+                        Job.job_id == job_id,
+                        Job.job_status.in_([
+                            JobStatusEnum.QUEUED.value,
+                            JobStatusEnum.RUNNING.value
+                        ])
+                    ).values(
+                        job_status=JobStatusEnum.RUNNING.value,
+                        started_at=func.coalesce(Job.started_at, func.now())
+                    ).returning(Job)
+                    result = await session.execute(query)
+                    job = result.scalar_one_or_none()
+                    await session.commit()
+
+                yield job
+            finally:
+                await connection.execute(select(func.pg_advisory_unlock(*lock_keys)))
+                await connection.commit()
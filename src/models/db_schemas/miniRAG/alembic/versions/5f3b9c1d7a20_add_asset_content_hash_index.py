@@ -0,0 +1,28 @@
+"""add unique asset content hash index
+
+Revision ID: 5f3b9c1d7a20
+Revises: 22c4182e4fa8
+Create Date: 2026-10-18 10:12:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b9c1d7a20'
+down_revision: Union[str, None] = '22c4182e4fa8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The hash is unique per project, two concurrent uploads of the same content get one asset
+    op.create_index('ix_asset_project_id_sha256', 'assets',
+                    ['asset_project_id', sa.text("(asset_config ->> 'sha256')")], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_asset_project_id_sha256', table_name='assets')
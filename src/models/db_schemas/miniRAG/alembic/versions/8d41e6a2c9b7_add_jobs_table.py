@@ -0,0 +1,46 @@
+"""add jobs table
+
+Revision ID: 8d41e6a2c9b7
+Revises: 5f3b9c1d7a20
+Create Date: 2026-10-18 11:03:52.618240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e6a2c9b7'
+down_revision: Union[str, None] = '5f3b9c1d7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('job_uuid', sa.UUID(), nullable=False),
+    sa.Column('job_type', sa.String(), nullable=False),
+    sa.Column('job_status', sa.String(), nullable=False),
+    sa.Column('job_payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('job_progress', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('job_errors', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('job_project_id', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['job_project_id'], ['projects.project_id'], ),
+    sa.PrimaryKeyConstraint('job_id'),
+    sa.UniqueConstraint('job_uuid')
+    )
+    op.create_index('ix_job_project_id', 'jobs', ['job_project_id'], unique=False)
+    op.create_index('ix_job_status', 'jobs', ['job_status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_status', table_name='jobs')
+    op.drop_index('ix_job_project_id', table_name='jobs')
+    op.drop_table('jobs')
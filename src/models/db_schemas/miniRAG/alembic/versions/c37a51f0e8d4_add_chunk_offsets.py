@@ -0,0 +1,34 @@
+"""add chunk offsets and make chunk_text nullable
+
+Revision ID: c37a51f0e8d4
+Revises: 8d41e6a2c9b7
+Create Date: 2026-10-18 12:21:07.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c37a51f0e8d4'
+down_revision: Union[str, None] = '8d41e6a2c9b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('chunk_start', sa.Integer(), nullable=True))
+    op.add_column('chunks', sa.Column('chunk_end', sa.Integer(), nullable=True))
+    op.alter_column('chunks', 'chunk_text',
+               existing_type=sa.VARCHAR(),
+               nullable=True)
+
+
+def downgrade() -> None:
+    op.alter_column('chunks', 'chunk_text',
+               existing_type=sa.VARCHAR(),
+               nullable=False)
+    op.drop_column('chunks', 'chunk_end')
+    op.drop_column('chunks', 'chunk_start')
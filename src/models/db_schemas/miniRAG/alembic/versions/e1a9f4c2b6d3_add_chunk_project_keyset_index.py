@@ -0,0 +1,26 @@
+"""add chunk project keyset index
+
+Revision ID: e1a9f4c2b6d3
+Revises: c37a51f0e8d4
+Create Date: 2026-10-18 14:03:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a9f4c2b6d3'
+down_revision: Union[str, None] = 'c37a51f0e8d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_chunk_project_id_chunk_id', 'chunks',
+                    ['chunk_project_id', 'chunk_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunk_project_id_chunk_id', table_name='chunks')
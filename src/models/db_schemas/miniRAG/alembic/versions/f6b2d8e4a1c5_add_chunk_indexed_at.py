@@ -0,0 +1,31 @@
+"""add chunk indexed_at marker
+
+Revision ID: f6b2d8e4a1c5
+Revises: e1a9f4c2b6d3
+Create Date: 2026-10-18 15:27:19.640283
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b2d8e4a1c5'
+down_revision: Union[str, None] = 'e1a9f4c2b6d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('chunk_indexed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_chunk_project_id_unindexed', 'chunks',
+                    ['chunk_project_id', 'chunk_id'], unique=False,
+                    postgresql_where=sa.text('chunk_indexed_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunk_project_id_unindexed', table_name='chunks',
+                  postgresql_where=sa.text('chunk_indexed_at IS NULL'))
+    op.drop_column('chunks', 'chunk_indexed_at')
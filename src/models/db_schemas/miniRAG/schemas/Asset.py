@@ -3,7 +3,7 @@ from .miniRAG_base import SQLAlchemyBase
 from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 import uuid
 
 
@@ -34,4 +34,6 @@ class Asset(SQLAlchemyBase):
     __table_args__ = (
         Index('ix_asset_project_id', asset_project_id),
         Index('ix_asset_type', asset_type),
+        Index('ix_asset_project_id_sha256', asset_project_id,
+              text("(asset_config ->> 'sha256')"), unique=True),
     )
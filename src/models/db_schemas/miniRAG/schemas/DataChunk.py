@@ -1,14 +1,14 @@
 from .miniRAG_base import SQLAlchemyBase
 
-from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey, JSON
+from sqlalchemy import Column, Integer, DateTime, func, String, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 import uuid
 
 from pydantic import BaseModel
 
-from typing import Dict
+from typing import Dict, Optional
 
 
 class DataChunk(SQLAlchemyBase):
@@ -19,9 +19,16 @@ class DataChunk(SQLAlchemyBase):
     chunk_uuid = Column(UUID(as_uuid=True), default=uuid.uuid4,
                         unique=True, nullable=False)
 
-    chunk_text = Column(String, nullable=False)
+    # In the offsets storage mode chunk_text is NULL and the text is read from the
+    # [chunk_start, chunk_end) bytes of the extracted text of the asset
+    chunk_text = Column(String, nullable=True)
     chunk_metadata = Column(JSONB, nullable=True)
     chunk_order = Column(Integer, nullable=False)
+    chunk_start = Column(Integer, nullable=True)
+    chunk_end = Column(Integer, nullable=True)
+
+    # Set when the chunk is inserted into the vector database, the index push only embeds the chunks where it is NULL
+    chunk_indexed_at = Column(DateTime(timezone=True), nullable=True)
 
     chunk_project_id = Column(Integer, ForeignKey(
         "projects.project_id"), nullable=False)
@@ -39,6 +46,9 @@ class DataChunk(SQLAlchemyBase):
     __table_args__ = (
         Index('ix_chunk_project_id', chunk_project_id),
         Index('ix_chunk_asset_id', chunk_asset_id),
+        Index('ix_chunk_project_id_chunk_id', chunk_project_id, chunk_id),
+        Index('ix_chunk_project_id_unindexed', chunk_project_id, chunk_id,
+              postgresql_where=text('chunk_indexed_at IS NULL')),
     )
 
 
@@ -47,6 +57,7 @@ class RetrievedDocument(BaseModel):
     RetrievedDocument Class for the FastAPI Application
     In this class, we define the schema for the RetrievedDocument object
     '''
-    text: str
+    text: Optional[str] = None
     score: float
     metadata: Dict = None
+    chunk_id: Optional[int] = None
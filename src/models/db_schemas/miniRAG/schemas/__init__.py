@@ -2,3 +2,4 @@ from .miniRAG_base import SQLAlchemyBase
 from .Project import Project
 from .Asset import Asset
 from .DataChunk import DataChunk, RetrievedDocument
+from .Job import Job
@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class AssetConfigEnum(Enum):
+
+    '''
+    This class is an Enum that contains the keys stored in the asset_config column of the assets table.
+    Possible values are:
+    - SHA256: 'sha256' >> the SHA-256 hex digest of the asset content
+    - PROCESSING: 'processing' >> the content hash and chunking parameters the asset was last processed with
+    '''
+
+    SHA256 = 'sha256'
+    PROCESSING = 'processing'
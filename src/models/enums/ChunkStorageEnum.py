@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class ChunkStorageEnum(Enum):
+
+    '''
+    This class is an Enum that contains the possible values for the chunk storage modes.
+    Possible values are:
+    - TEXT: 'text' >> every chunk stores a full copy of its text
+    - OFFSETS: 'offsets' >> every chunk stores the byte offsets of its text in the extracted text of its asset
+    '''
+
+    TEXT = 'text'
+    OFFSETS = 'offsets'
@@ -0,0 +1,31 @@
+from enum import Enum
+
+
+class JobTypeEnum(Enum):
+
+    '''
+    This class is an Enum that contains the possible values for the background job types.
+    Possible values are:
+    - PROCESS: 'process' >> loading and chunking the project files
+    - INDEX_PUSH: 'index_push' >> embedding the project chunks and pushing them into the vector database
+    '''
+
+    PROCESS = 'process'
+    INDEX_PUSH = 'index_push'
+
+
+class JobStatusEnum(Enum):
+
+    '''
+    This class is an Enum that contains the possible values for the background job statuses.
+    Possible values are:
+    - QUEUED: 'queued'
+    - RUNNING: 'running'
+    - COMPLETED: 'completed'
+    - FAILED: 'failed'
+    '''
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
@@ -11,6 +11,15 @@ class ResponseSignal(Enum):
     - FILE_SIZE_EXCEEDED: 'file_size_exceeded'
     - FILE_UPLOAD_SUCCESS: 'file_upload_success'
     - FILE_UPLOAD_FAILED: 'file_upload_failed'
+    - FILE_ALREADY_EXISTS: 'file_already_exists'
+    - FILES_BATCH_UPLOAD_SUCCESS: 'files_batch_upload_success'
+    - UPLOAD_SESSION_CREATED: 'upload_session_created'
+    - UPLOAD_SESSION_NOT_FOUND: 'upload_session_not_found'
+    - UPLOAD_SESSION_STATUS_SUCCESS: 'upload_session_status_success'
+    - UPLOAD_SESSION_INCOMPLETE: 'upload_session_incomplete'
+    - UPLOAD_SESSION_DELETED: 'upload_session_deleted'
+    - UPLOAD_RANGE_RECEIVED: 'upload_range_received'
+    - UPLOAD_RANGE_INVALID: 'upload_range_invalid'
     - PROCESS_FAILED: 'file_processing_failed'
     - PROCESS_SUCCESS: 'file_processing_success'
     - FILE_PROCESS_FAILED: 'no_file_found'
@@ -22,8 +31,13 @@ class ResponseSignal(Enum):
     - GET_PROJECT_INFO_SUCCESS: 'get_project_info_succeed'
     - VECTORDB_SEARCH_ERROR: 'vectordb_search_error'
     - VECTORDB_SEARCH_SUCCESS: 'vectordb_search_success'
+    - VECTORDB_BATCH_SEARCH_SUCCESS: 'vectordb_batch_search_success'
     - RAG_ANSWER_ERROR: 'rag_answer_error'
     - RAG_ANSWER_SUCCESS: 'rag_answer_success'
+    - NLP_METRICS_SUCCESS: 'nlp_metrics_success'
+    - JOB_SUBMITTED: 'job_submitted'
+    - JOB_NOT_FOUND: 'job_not_found'
+    - JOB_STATUS_SUCCESS: 'job_status_success'
     '''
 
     FILE_VALIDATED_SUCCESS = "file_validate_successfully"
@@ -31,6 +45,16 @@ class ResponseSignal(Enum):
     FILE_SIZE_EXCEEDED = "file_size_exceeded"
     FILE_UPLOAD_SUCCESS = "file_upload_success"
     FILE_UPLOAD_FAILED = "file_upload_failed"
+    FILE_ALREADY_EXISTS = "file_already_exists"
+    FILES_BATCH_UPLOAD_SUCCESS = "files_batch_upload_success"
+
+    UPLOAD_SESSION_CREATED = "upload_session_created"
+    UPLOAD_SESSION_NOT_FOUND = "upload_session_not_found"
+    UPLOAD_SESSION_STATUS_SUCCESS = "upload_session_status_success"
+    UPLOAD_SESSION_INCOMPLETE = "upload_session_incomplete"
+    UPLOAD_SESSION_DELETED = "upload_session_deleted"
+    UPLOAD_RANGE_RECEIVED = "upload_range_received"
+    UPLOAD_RANGE_INVALID = "upload_range_invalid"
 
     PROCESS_FAILED = 'file_processing_failed'
     PROCESS_SUCCESS = 'file_processing_success'
@@ -48,6 +72,13 @@ class ResponseSignal(Enum):
 
     VECTORDB_SEARCH_ERROR = 'vectordb_search_error'
     VECTORDB_SEARCH_SUCCESS = 'vectordb_search_success'
+    VECTORDB_BATCH_SEARCH_SUCCESS = 'vectordb_batch_search_success'
 
     RAG_ANSWER_ERROR = 'rag_answer_error'
     RAG_ANSWER_SUCCESS = 'rag_answer_success'
+
+    NLP_METRICS_SUCCESS = 'nlp_metrics_success'
+
+    JOB_SUBMITTED = 'job_submitted'
+    JOB_NOT_FOUND = 'job_not_found'
+    JOB_STATUS_SUCCESS = 'job_status_success'
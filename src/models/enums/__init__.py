@@ -2,3 +2,6 @@ from .ResponseSignal import ResponseSignal
 from .ProcessEnum import ProcessEnum
 from .DataBaseEnum import DataBaseEnum
 from .AssetTypeEnum import AssetTypeEnum
+from .AssetConfigEnum import AssetConfigEnum
+from .JobEnum import JobTypeEnum, JobStatusEnum
+from .ChunkStorageEnum import ChunkStorageEnum
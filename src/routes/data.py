@@ -4,14 +4,16 @@ from fastapi import APIRouter, Depends, UploadFile, status, Request
 from fastapi.responses import JSONResponse
 import os
 from helpers import get_settings, Settings
-from controllers import DataController, ProjectController, ProcessController, NLPController
-from models import ResponseSignal, ProjectModel, ChunkModel, AssetModel
-import aiofiles
+from controllers import DataController, ProcessController, NLPController, UploadController
+from controllers.JobController import JobProgress
+from models import ResponseSignal, AssetModel
+import asyncio
 import logging
-from .schemas import ProcessRequest
-from models.db_schemas import DataChunk, Asset
-from bson import ObjectId
-from models.enums import AssetTypeEnum
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+from .schemas import ProcessRequest, UploadSessionRequest
+from models.db_schemas import DataChunk, Asset, Job
+from models.enums import AssetTypeEnum, AssetConfigEnum, JobTypeEnum, ChunkStorageEnum
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -44,12 +46,13 @@ async def upload_func(request: Request, project_id: int, file: UploadFile, app_s
         )
 
     file_path, file_key = data_control.generate_unique_filepath(
-        file, project_id)
+        file.filename, project_id)
 
     try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK):
-                await f.write(chunk)
+        file_hash = await data_control.write_uploaded_file(
+            file=file,
+            file_path=file_path
+        )
     except Exception as e:
 
         logger.error(f"Error in Uploading File {e}")
@@ -69,13 +72,29 @@ async def upload_func(request: Request, project_id: int, file: UploadFile, app_s
         asset_project_id=project.project_id,
         asset_name=file_key,
         asset_type=AssetTypeEnum.FILE.value,
-        asset_size=os.path.getsize(file_path)
+        asset_size=os.path.getsize(file_path),
+        asset_config={
+            AssetConfigEnum.SHA256.value: file_hash
+        }
     )
 
     asset_record = await asset_model.create_asset(
         asset=asset
     )
 
+    # Re-uploading the same content returns the existing asset, so its chunks and vectors are reused
+    if asset_record.asset_name != file_key:
+        os.remove(file_path)
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'signal': ResponseSignal.FILE_ALREADY_EXISTS.value,
+                'file_key': asset_record.asset_name,
+                'file_id': asset_record.asset_id
+            }
+        )
+
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={
@@ -86,31 +105,365 @@ async def upload_func(request: Request, project_id: int, file: UploadFile, app_s
     )
 
 
-@data_router.post("/process/{project_id}")
-async def process_func(request: Request, project_id: int, process_request: ProcessRequest):
+@data_router.post("/upload/batch/{project_id}")
+async def upload_batch_func(request: Request, project_id: int, files: List[UploadFile], app_settings: Settings = Depends(get_settings)):
+    '''
+    This endpoint uploads many files in one multipart request
+    The files are written concurrently (at most UPLOAD_MAX_CONCURRENCY at a time) and all the new assets
+    are inserted with one statement, duplicates (in the project or inside the batch) reuse the existing asset
+    '''
 
-    chunk_size = process_request.chunk_size
-    overlap_len = process_request.overlap_size
-    do_reset = process_request.do_reset
+    project = await request.app.project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    data_control = DataController()
+
+    results = [
+        {'file_name': file.filename}
+        for file in files
+    ]
+
+    uploads = []
+    for idx, file in enumerate(files):
+
+        is_valid, response_signal, type_ = data_control.validate_uploaded_file(
+            file=file)
+
+        if not is_valid:
+            results[idx].update({
+                'signal': response_signal,
+                'type': type_
+            })
+            continue
+
+        file_path, file_key = data_control.generate_unique_filepath(
+            file.filename, project_id)
+
+        uploads.append((idx, file, file_path, file_key))
+
+    semaphore = asyncio.Semaphore(app_settings.UPLOAD_MAX_CONCURRENCY)
+
+    async def write_file(file: UploadFile, file_path: str):
+        async with semaphore:
+            return await data_control.write_uploaded_file(
+                file=file,
+                file_path=file_path
+            )
+
+    file_hashes = await asyncio.gather(
+        *[write_file(file, file_path) for _, file, file_path, _ in uploads],
+        return_exceptions=True
+    )
+
+    written = []
+    for (idx, file, file_path, file_key), file_hash in zip(uploads, file_hashes):
+
+        if isinstance(file_hash, Exception):
+            logger.error(f"Error in Uploading File {file.filename}: {file_hash}")
+
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+            results[idx]['signal'] = ResponseSignal.FILE_UPLOAD_FAILED.value
+            continue
+
+        written.append((idx, file_path, file_key, file_hash))
+
+    asset_model = await AssetModel.create_instance(
+        db_client=request.app.db_client
+    )
+
+    existing_assets = await asset_model.get_assets_by_hashes(
+        asset_project_id=project.project_id,
+        asset_hashes=list({file_hash for *_, file_hash in written})
+    )
+
+    new_assets = {}
+    for idx, file_path, file_key, file_hash in written:
+
+        existing_asset = existing_assets.get(file_hash)
+        if existing_asset is not None or file_hash in new_assets:
+            # Same content as a stored asset or as an earlier file of this batch
+            os.remove(file_path)
+            continue
+
+        new_assets[file_hash] = Asset(
+            asset_project_id=project.project_id,
+            asset_name=file_key,
+            asset_type=AssetTypeEnum.FILE.value,
+            asset_size=os.path.getsize(file_path),
+            asset_config={
+                AssetConfigEnum.SHA256.value: file_hash
+            }
+        )
+
+    # A concurrent upload may store the same content first, create_many_assets returns its asset then
+    new_assets = dict(zip(
+        new_assets.keys(),
+        await asset_model.create_many_assets(
+            assets=list(new_assets.values())
+        )
+    ))
+
+    for idx, file_path, file_key, file_hash in written:
+
+        existing_asset = existing_assets.get(file_hash)
+        if existing_asset is not None:
+            signal, asset = ResponseSignal.FILE_ALREADY_EXISTS.value, existing_asset
+        elif new_assets[file_hash].asset_name != file_key:
+            signal, asset = ResponseSignal.FILE_ALREADY_EXISTS.value, new_assets[file_hash]
+        else:
+            signal, asset = ResponseSignal.FILE_UPLOAD_SUCCESS.value, new_assets[file_hash]
+
+        if asset.asset_name != file_key and os.path.exists(file_path):
+            os.remove(file_path)
+
+        results[idx].update({
+            'signal': signal,
+            'file_key': asset.asset_name,
+            'file_id': asset.asset_id
+        })
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.FILES_BATCH_UPLOAD_SUCCESS.value,
+            'files': results
+        }
+    )
+
+
+@data_router.post("/upload/session/{project_id}")
+async def create_upload_session(request: Request, project_id: int, session_request: UploadSessionRequest):
+    '''
+    Resumable upload: the client creates a session, PUTs byte ranges (in any order, possibly in parallel),
+    queries the received ranges to resend the missing ones, then finalizes the session into an asset
+    '''
+
+    await request.app.project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    upload_control = UploadController(project_id=project_id)
+
+    upload_id, response_signal = upload_control.create_session(
+        file_name=session_request.file_name,
+        file_size=session_request.file_size,
+        content_type=session_request.content_type
+    )
+
+    if upload_id is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                'signal': response_signal,
+                'type': session_request.content_type
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            'signal': response_signal,
+            'upload_id': upload_id,
+            'file_size': session_request.file_size
+        }
+    )
+
+
+@data_router.put("/upload/session/{project_id}/{upload_id}")
+async def upload_session_range(request: Request, project_id: int, upload_id: str, offset: int):
+
+    upload_control = UploadController(project_id=project_id)
+
+    session = upload_control.get_session(upload_id=upload_id)
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                'signal': ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
+
+    try:
+        received_range = await upload_control.write_range(
+            session=session,
+            offset=offset,
+            body=request.stream()
+        )
+    except Exception as e:
+
+        logger.error(f"Error in Uploading Range {e}")
+
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                'signal': ResponseSignal.FILE_UPLOAD_FAILED.value
+            }
+        )
+
+    if received_range is None:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                'signal': ResponseSignal.UPLOAD_RANGE_INVALID.value,
+                'file_size': session['file_size']
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.UPLOAD_RANGE_RECEIVED.value,
+            'start': received_range[0],
+            'end': received_range[1]
+        }
+    )
+
+
+@data_router.get("/upload/session/{project_id}/{upload_id}")
+async def upload_session_status(request: Request, project_id: int, upload_id: str):
+
+    upload_control = UploadController(project_id=project_id)
+
+    session = upload_control.get_session(upload_id=upload_id)
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                'signal': ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
+
+    received, missing = upload_control.get_received_ranges(session=session)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.UPLOAD_SESSION_STATUS_SUCCESS.value,
+            'upload_id': session['upload_id'],
+            'file_name': session['file_name'],
+            'file_size': session['file_size'],
+            'received_bytes': sum(end - start for start, end in received),
+            'received': received,
+            'missing': missing
+        }
+    )
+
+
+@data_router.post("/upload/session/{project_id}/{upload_id}/finalize")
+async def finalize_upload_session(request: Request, project_id: int, upload_id: str):
 
     project = await request.app.project_model.get_project_or_create_one(
         project_id=project_id
     )
 
-    process_controller = ProcessController(project_id)
+    upload_control = UploadController(project_id=project_id)
+
+    session = upload_control.get_session(upload_id=upload_id)
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                'signal': ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
 
-    nlp_controller = NLPController(
-        vectordb_client=request.app.vectordb_client,
-        generation_model=request.app.generation_model,
-        embedding_model=request.app.embedding_model,
-        template_parser=request.app.template_parser
+    file_path, file_key = DataController().generate_unique_filepath(
+        session['file_name'], project_id)
+
+    # Hashing reads the whole file, it runs in a thread to keep the event loop free
+    file_hash = await asyncio.to_thread(
+        upload_control.finalize_session,
+        session=session,
+        file_path=file_path
     )
 
+    if file_hash is None:
+        _, missing = upload_control.get_received_ranges(session=session)
+
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                'signal': ResponseSignal.UPLOAD_SESSION_INCOMPLETE.value,
+                'missing': missing
+            }
+        )
+
     asset_model = await AssetModel.create_instance(
         db_client=request.app.db_client
     )
 
-    project_file_ids = {}
+    asset_record = await asset_model.create_asset(
+        asset=Asset(
+            asset_project_id=project.project_id,
+            asset_name=file_key,
+            asset_type=AssetTypeEnum.FILE.value,
+            asset_size=session['file_size'],
+            asset_config={
+                AssetConfigEnum.SHA256.value: file_hash
+            }
+        )
+    )
+
+    if asset_record.asset_name != file_key:
+        os.remove(file_path)
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'signal': ResponseSignal.FILE_ALREADY_EXISTS.value,
+                'file_key': asset_record.asset_name,
+                'file_id': asset_record.asset_id
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.FILE_UPLOAD_SUCCESS.value,
+            'file_key': file_key,
+            'file_id': asset_record.asset_id
+        }
+    )
+
+
+@data_router.delete("/upload/session/{project_id}/{upload_id}")
+async def delete_upload_session(request: Request, project_id: int, upload_id: str):
+
+    upload_control = UploadController(project_id=project_id)
+
+    session = upload_control.get_session(upload_id=upload_id)
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                'signal': ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
+
+    upload_control.delete_session(session=session)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.UPLOAD_SESSION_DELETED.value,
+            'upload_id': session['upload_id']
+        }
+    )
+
+
+@data_router.post("/process/{project_id}")
+async def process_func(request: Request, project_id: int, process_request: ProcessRequest):
+
+    project = await request.app.project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    asset_model = await AssetModel.create_instance(
+        db_client=request.app.db_client
+    )
 
     if process_request.file_id:
         asset_record = await asset_model.get_asset_by_id(
@@ -125,89 +478,344 @@ async def process_func(request: Request, project_id: int, process_request: Proce
                     'signal': ResponseSignal.FILE_PROCESS_NOT_FOUND.value
                 }
             )
-
-        project_file_ids = {
-            asset_record.asset_id: asset_record.asset_name
-        }
     else:
         project_asset_records = await asset_model.get_all_project_assets(
             asset_project_id=project.project_id,
             asset_type=AssetTypeEnum.FILE.value
         )
 
-        project_file_ids = {
-            asset_record.asset_id: asset_record.asset_name
-            for asset_record in project_asset_records
+        if len(project_asset_records) == 0:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    'signal': ResponseSignal.FILE_PROCESS_FAILED.value
+                }
+            )
+
+    job = await request.app.job_controller.submit_job(
+        job_type=JobTypeEnum.PROCESS.value,
+        project_id=project.project_id,
+        payload=process_request.dict()
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            'signal': ResponseSignal.JOB_SUBMITTED.value,
+            'job_id': str(job.job_uuid)
         }
+    )
 
-    if len(project_file_ids) == 0:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={
-                'signal': ResponseSignal.FILE_PROCESS_FAILED.value
-            }
+
+async def process_project_job(app, job: Job, progress: JobProgress):
+    '''
+    This function is the handler of the process jobs, it loads and chunks the project files
+    The checkpoint only records whether the reset is done, the finished assets are skipped
+    on resume because their processing config is already stored (incremental processing)
+    '''
+    process_request = ProcessRequest(**job.job_payload)
+
+    chunk_size = process_request.chunk_size
+    overlap_len = process_request.overlap_size
+    do_reset = process_request.do_reset and not progress.checkpoint.get('reset_done', False)
+
+    process_controller = ProcessController(job.job_project_id)
+    storage_mode = process_controller.app_settings.CHUNK_STORAGE_MODE
+    nlp_controller = app.nlp_controller
+
+    asset_model = await AssetModel.create_instance(
+        db_client=app.db_client
+    )
+
+    if process_request.file_id:
+        asset_record = await asset_model.get_asset_by_id(
+            asset_project_id=job.job_project_id,
+            asset_name=process_request.file_id
+        )
+        project_assets = [asset_record] if asset_record else []
+    else:
+        project_assets = await asset_model.get_all_project_assets(
+            asset_project_id=job.job_project_id,
+            asset_type=AssetTypeEnum.FILE.value
         )
 
     if do_reset is True:
 
         collection_name = nlp_controller.create_collection_name(
-            project_id=project.project_id)
+            project_id=job.job_project_id)
 
         logger.info(
-            f"Resetting vector database and deleting chunks for project ID: {project_id} with collection name: {collection_name}")
+            f"Resetting vector database and deleting chunks for project ID: {job.job_project_id} with collection name: {collection_name}")
 
         # Delete vectors from vector database
-        _ = await request.app.vectordb_client.delete_collection(collection_name)
+        _ = await app.vectordb_client.delete_collection(collection_name)
 
         # Delete chunks from database
-        _ = await request.app.chunk_model.delete_chunk_by_project_id(
-            project_id=project.project_id
+        _ = await app.chunk_model.delete_chunk_by_project_id(
+            project_id=job.job_project_id
         )
 
-    total_files, total_chunks = 0, 0
+    progress.checkpoint['reset_done'] = True
+    progress.values['files_total'] = len(project_assets)
+    await progress.save(force=True)
 
-    for asset_id, file_id in project_file_ids.items():
+    # Only the assets whose content or chunking parameters changed since their last processing are re-chunked
+    loop = asyncio.get_running_loop()
+    project_file_ids, processing_configs = {}, {}
 
-        file_content = process_controller.get_file_content(file_id)
+    # The content hash is unique per project, an asset is only given a hash that no other asset holds
+    project_hashes = {
+        (asset_record.asset_config or {}).get(AssetConfigEnum.SHA256.value)
+        for asset_record in project_assets
+    }
 
-        if file_content is None:
-            logger.error(f"Error in processing file : {file_id}")
-            continue
+    for asset_record in project_assets:
 
-        chunks = process_controller.get_file_chunks(
-            file_content=file_content,
+        asset_config = dict(asset_record.asset_config or {})
+
+        file_hash = asset_config.get(AssetConfigEnum.SHA256.value)
+        if file_hash is None:
+            file_hash = await loop.run_in_executor(
+                None, process_controller.get_file_hash, asset_record.asset_name)
+
+        processing_config = process_controller.get_processing_config(
+            file_hash=file_hash,
             chunk_size=chunk_size,
-            overlap_len=overlap_len
+            overlap_len=overlap_len,
+            storage_mode=storage_mode
         )
-        if len(chunks) == 0 or chunks is None:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    'signal': ResponseSignal.PROCESS_FAILED.value
-                }
+
+        if not do_reset and asset_config.get(AssetConfigEnum.PROCESSING.value) == processing_config:
+            progress.increment(files_skipped=1)
+            continue
+
+        if not do_reset:
+            # Old chunks (from other parameters or from an interrupted run) and their vectors are replaced
+            _ = await delete_asset_chunks(
+                app=app,
+                nlp_controller=nlp_controller,
+                project_id=job.job_project_id,
+                asset_id=asset_record.asset_id
             )
 
+        if AssetConfigEnum.SHA256.value not in asset_config and file_hash not in project_hashes:
+            asset_config[AssetConfigEnum.SHA256.value] = file_hash
+            project_hashes.add(file_hash)
+        asset_config[AssetConfigEnum.PROCESSING.value] = processing_config
+
+        project_file_ids[asset_record.asset_id] = asset_record.asset_name
+        processing_configs[asset_record.asset_id] = asset_config
+
+    await progress.save(force=True)
+
+    if process_request.stream:
+
+        # Streaming mode keeps the memory bounded by the batch size, so files are handled one at a time
+        for asset_id, file_id in project_file_ids.items():
+
+            try:
+                inserted_chunks = await stream_file_chunks(
+                    app=app,
+                    process_controller=process_controller,
+                    project_id=job.job_project_id,
+                    asset_id=asset_id,
+                    file_id=file_id,
+                    chunk_size=chunk_size,
+                    overlap_len=overlap_len,
+                    storage_mode=storage_mode,
+                    progress=progress
+                )
+            except Exception as e:
+                # The chunks of the batches inserted before the error are removed, the asset keeps
+                # its previous processing config so the next process job retries it
+                logger.error(f"Error in processing file : {file_id}: {e}")
+                progress.add_error(f'{ResponseSignal.FILE_PROCESS_FAILED.value}: {file_id}')
+                _ = await app.chunk_model.delete_chunks_by_asset_id(
+                    asset_id=asset_id
+                )
+                continue
+
+            if inserted_chunks is None:
+                logger.error(f"Error in processing file : {file_id}")
+                progress.add_error(f'{ResponseSignal.FILE_PROCESS_FAILED.value}: {file_id}')
+                continue
+
+            if inserted_chunks == 0:
+                progress.add_error(f'{ResponseSignal.PROCESS_FAILED.value}: {file_id}')
+                continue
+
+            _ = await asset_model.update_asset_config(
+                asset_id=asset_id,
+                asset_config=processing_configs[asset_id]
+            )
+
+            progress.increment(files=1)
+            await progress.save()
+
+        return
+
+    # Loading and splitting are CPU bound, so every file is sent to the process pool
+    # and its chunks are inserted as soon as the file finishes
+    pending_files = [
+        run_process_file(
+            app=app,
+            project_id=job.job_project_id,
+            asset_id=asset_id,
+            file_id=file_id,
+            chunk_size=chunk_size,
+            overlap_len=overlap_len,
+            storage_mode=storage_mode
+        )
+        for asset_id, file_id in project_file_ids.items()
+    ]
+
+    for processed_file in asyncio.as_completed(pending_files):
+
+        asset_id, file_id, chunks, error = await processed_file
+
+        if error is not None:
+            # The failed file keeps its previous processing config, the next process job retries it
+            logger.error(f"Error in processing file : {file_id}: {error}")
+            progress.add_error(f'{ResponseSignal.FILE_PROCESS_FAILED.value}: {file_id}')
+            continue
+
+        if chunks is None:
+            logger.error(f"Error in processing file : {file_id}")
+            progress.add_error(f'{ResponseSignal.FILE_PROCESS_FAILED.value}: {file_id}')
+            continue
+
+        if len(chunks) == 0:
+            progress.add_error(f'{ResponseSignal.PROCESS_FAILED.value}: {file_id}')
+            continue
+
         chunk_records = [
             DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
+                chunk_text=chunk_text,
+                chunk_metadata=chunk_metadata,
+                chunk_start=chunk_start,
+                chunk_end=chunk_end,
                 chunk_order=idx+1,
-                chunk_project_id=project.project_id,
+                chunk_project_id=job.job_project_id,
                 chunk_asset_id=asset_id
             )
-            for idx, chunk in enumerate(chunks)
+            for idx, (chunk_text, chunk_metadata, chunk_start, chunk_end) in enumerate(chunks)
         ]
 
-        total_chunks += await request.app.chunk_model.insert_many_chunks(
+        inserted_chunks = await app.chunk_model.insert_many_chunks(
             chunks=chunk_records
         )
-        total_files += 1
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            'signal': ResponseSignal.PROCESS_SUCCESS.value,
-            'total_chunks': total_chunks,
-            'total_files': total_files
-        }
+        _ = await asset_model.update_asset_config(
+            asset_id=asset_id,
+            asset_config=processing_configs[asset_id]
+        )
+
+        progress.increment(files=1, chunks=inserted_chunks)
+        await progress.save()
+
+
+async def run_process_file(app, project_id: int, asset_id: int, file_id: str,
+                           chunk_size: int, overlap_len: int, storage_mode: str):
+    '''
+    This function processes one file in the process pool and returns (asset_id, file_id, chunks, error)
+    An error of the file does not stop the other files, a worker process that died breaks the whole pool
+    so the pool is replaced for the next files and jobs
+    '''
+    process_pool = app.process_pool
+
+    try:
+        _, _, chunks = await asyncio.get_running_loop().run_in_executor(
+            process_pool,
+            ProcessController.process_file,
+            project_id,
+            asset_id,
+            file_id,
+            chunk_size,
+            overlap_len,
+            storage_mode
+        )
+    except BrokenProcessPool as e:
+        # Every pending file of the broken pool fails here, only the first one replaces it
+        if app.process_pool is process_pool:
+            logger.error('The process pool is broken, a new one is created')
+            app.process_pool = app.create_process_pool()
+            process_pool.shutdown(wait=False, cancel_futures=True)
+        return asset_id, file_id, None, e
+    except Exception as e:
+        return asset_id, file_id, None, e
+
+    return asset_id, file_id, chunks, None
+
+
+async def delete_asset_chunks(app, nlp_controller: NLPController,
+                              project_id: int, asset_id: int):
+    '''
+    This function deletes the chunks of one asset and their vectors from the vector database
+    The vectors are deleted first because the collection rows reference the chunks
+    '''
+    chunk_ids = await app.chunk_model.get_asset_chunk_ids(
+        asset_id=asset_id
     )
+
+    if len(chunk_ids) == 0:
+        return 0
+
+    _ = await nlp_controller.delete_vector_db_chunks(
+        project_id=project_id,
+        chunk_ids=chunk_ids
+    )
+
+    return await app.chunk_model.delete_chunks_by_asset_id(
+        asset_id=asset_id
+    )
+
+
+async def stream_file_chunks(app, process_controller: ProcessController,
+                             project_id: int, asset_id: int, file_id: str,
+                             chunk_size: int, overlap_len: int,
+                             storage_mode: str = ChunkStorageEnum.TEXT.value,
+                             progress: JobProgress = None):
+    '''
+    This function streams the chunks of one file into the database batch by batch
+    The pages are read and split in a worker thread so the event loop is not blocked
+    It returns the number of inserted chunks or None if the file can't be loaded
+    '''
+    if process_controller.get_file_loader(file_id=file_id) is None:
+        return None
+
+    batches = process_controller.iter_file_chunks(
+        file_id=file_id,
+        chunk_size=chunk_size,
+        overlap_len=overlap_len,
+        batch_size=process_controller.app_settings.PROCESS_STREAM_BATCH_SIZE,
+        storage_mode=storage_mode
+    )
+
+    loop = asyncio.get_running_loop()
+    inserted_chunks = 0
+
+    while batch := await loop.run_in_executor(None, next, batches, None):
+
+        chunk_records = [
+            DataChunk(
+                chunk_text=chunk_text,
+                chunk_metadata=chunk_metadata,
+                chunk_start=chunk_start,
+                chunk_end=chunk_end,
+                chunk_order=inserted_chunks+idx+1,
+                chunk_project_id=project_id,
+                chunk_asset_id=asset_id
+            )
+            for idx, (chunk_text, chunk_metadata, chunk_start, chunk_end) in enumerate(batch)
+        ]
+
+        batch_chunks = await app.chunk_model.insert_many_chunks(
+            chunks=chunk_records
+        )
+        inserted_chunks += batch_chunks
+
+        if progress is not None:
+            progress.increment(chunks=batch_chunks)
+            await progress.save()
+
+    return inserted_chunks
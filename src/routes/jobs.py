@@ -0,0 +1,71 @@
+from fastapi import APIRouter, status, Request
+from fastapi.responses import JSONResponse
+
+import uuid
+import logging
+from datetime import datetime, timezone
+
+from models.enums import ResponseSignal
+
+
+logger = logging.getLogger('uvicorn.error')
+
+
+jobs_router = APIRouter(
+    prefix='/base/jobs',
+    tags=['Base', 'jobs']
+)
+
+
+# jobs_status
+@jobs_router.get("/{job_id}")
+async def job_status(request: Request, job_id: str):
+
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        job_uuid = None
+
+    job = None
+    if job_uuid is not None:
+        job = await request.app.job_controller.job_model.get_job_by_uuid(
+            job_uuid=job_uuid
+        )
+
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                'signal': ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    progress = dict(job.job_progress or {})
+    progress.pop('checkpoint', None)
+
+    # Throughput is measured over the running time of the job
+    throughput = {}
+    if job.started_at is not None:
+        finished_at = job.finished_at or datetime.now(timezone.utc)
+        elapsed_seconds = max((finished_at - job.started_at).total_seconds(), 1e-6)
+        throughput = {
+            f'{key}_per_second': round(progress.get(key, 0) / elapsed_seconds, 2)
+            for key in ('files', 'chunks', 'vectors')
+        }
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.JOB_STATUS_SUCCESS.value,
+            'job_id': str(job.job_uuid),
+            'job_type': job.job_type,
+            'job_status': job.job_status,
+            'project_id': job.job_project_id,
+            'progress': progress,
+            'throughput': throughput,
+            'errors': job.job_errors or [],
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }
+    )
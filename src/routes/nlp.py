@@ -3,12 +3,13 @@ from fastapi.responses import JSONResponse
 
 import logging
 
-from .schemas import PushRequest, SearchRequest
+from .schemas import PushRequest, SearchRequest, BatchSearchRequest
 
-from controllers import NLPController
-from models.enums import ResponseSignal
-
-from tqdm.auto import tqdm
+from controllers import ProcessController
+from controllers.JobController import JobProgress
+from models.db_schemas import Job
+from models import AssetModel
+from models.enums import ResponseSignal, JobTypeEnum, AssetTypeEnum
 
 
 logger = logging.getLogger('uvicorn.error')
@@ -36,67 +37,101 @@ async def index_project(request: Request, project_id: int, push_request: PushReq
             }
         )
 
-    nlp_controller = request.app.nlp_controller
-
-    total_chunks_count = await request.app.chunk_model.get_total_chunks_count(
-        project_id=project.project_id
+    job = await request.app.job_controller.submit_job(
+        job_type=JobTypeEnum.INDEX_PUSH.value,
+        project_id=project.project_id,
+        payload=push_request.dict()
     )
 
-    pbar = tqdm(
-        total=total_chunks_count,
-        desc=f"Indexing project {project.project_id} into vector database",
-        unit="chunks",
-        position=0,
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            'signal': ResponseSignal.JOB_SUBMITTED.value,
+            'job_id': str(job.job_uuid)
+        }
     )
 
-    has_records = True
-    inserted_chunks = 0
-    ids = 0
-    page_no = 1
-    reset_requested = push_request.do_reset
 
-    while has_records:
+async def index_project_job(app, job: Job, progress: JobProgress):
+    '''
+    This function is the handler of the index push jobs, it embeds the project chunks that are not indexed yet
+    page by page and inserts them into the vector database
+    The checkpoint records the last indexed chunk_id and whether the reset is done, so a resumed job continues from there
+    '''
+    push_request = PushRequest(**job.job_payload)
+
+    nlp_controller = app.nlp_controller
 
-        chunks = await request.app.chunk_model.get_project_chunks(
-            project_id=project.project_id,
-            page_no=page_no
+    # The offsets chunks are read from the extracted text of their asset
+    process_controller = ProcessController(job.job_project_id)
+    asset_model = await AssetModel.create_instance(
+        db_client=app.db_client
+    )
+    asset_names = {
+        asset_record.asset_id: asset_record.asset_name
+        for asset_record in await asset_model.get_all_project_assets(
+            asset_project_id=job.job_project_id,
+            asset_type=AssetTypeEnum.FILE.value
         )
-        if chunks:
-            page_no += 1
+    }
 
-        if not chunks or len(chunks) == 0:
-            has_records = False
-            break
+    last_chunk_id = progress.checkpoint.get('last_chunk_id', 0)
+    reset_requested = push_request.do_reset and not progress.checkpoint.get('reset_done', False)
 
-        chunk_ids = [c.chunk_id for c in chunks]
-        ids += len(chunks)
+    # Only the chunks without chunk_indexed_at are embedded, the markers have to describe the current collection
+    collection_name = nlp_controller.create_collection_name(project_id=job.job_project_id)
+    is_collection_exist = await app.vectordb_client.is_collection_exist(
+        collection_name=collection_name)
 
-        is_inserted = await nlp_controller.index_into_vector_db(
-            project_id=project_id,
-            chunks=chunks,
-            chunk_ids=chunk_ids,
-            do_reset=reset_requested
-        )
-        reset_requested = False
+    chunks_count = await app.chunk_model.get_total_chunks_count(
+        project_id=job.job_project_id
+    )
+    unindexed_chunks_count = await app.chunk_model.get_total_chunks_count(
+        project_id=job.job_project_id,
+        only_unindexed=True
+    )
 
-        if not is_inserted:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    'signal': ResponseSignal.CHUNK_INSERTION_TO_VECTORDB_FAILED.value
-                }
-            )
+    if is_collection_exist and chunks_count > 0 and chunks_count == unindexed_chunks_count \
+            and not progress.checkpoint.get('reset_done', False):
+        # A collection without any marked chunk was filled before the markers existed, it is rebuilt once
+        reset_requested = True
 
-        pbar.update(len(chunks))
+    if reset_requested or not is_collection_exist:
+        _ = await app.chunk_model.reset_chunks_indexed(
+            project_id=job.job_project_id
+        )
+        unindexed_chunks_count = chunks_count
 
-        inserted_chunks += len(chunks)
+    progress.values['chunks_total'] = unindexed_chunks_count
+    progress.values['chunks_already_indexed'] = chunks_count - unindexed_chunks_count
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            'signal': ResponseSignal.CHUNK_INSERTION_TO_VECTORDB_SUCCESS.value,
-            'inserted_chunks': inserted_chunks
-        }
+    async def on_batch_indexed(chunks):
+        _ = await app.chunk_model.mark_chunks_indexed(
+            chunk_ids=[c.chunk_id for c in chunks]
+        )
+
+        progress.checkpoint['last_chunk_id'] = chunks[-1].chunk_id
+        progress.checkpoint['reset_done'] = True
+        progress.increment(chunks=len(chunks), vectors=len(chunks))
+        await progress.save()
+
+    # Reading, embedding and inserting overlap, the batches are still inserted and checkpointed in chunk_id order
+    await nlp_controller.index_into_vector_db_pipeline(
+        project_id=job.job_project_id,
+        chunk_pages=app.chunk_model.iter_project_chunks(
+            project_id=job.job_project_id,
+            page_size=process_controller.app_settings.INDEX_PUSH_PAGE_SIZE,
+            after_chunk_id=last_chunk_id,
+            only_unindexed=True
+        ),
+        get_texts=lambda chunks: process_controller.get_chunks_texts(
+            chunks=chunks,
+            asset_names=asset_names
+        ),
+        do_reset=reset_requested,
+        on_batch_indexed=on_batch_indexed,
+        index_params=push_request.index_params.dict(exclude_none=True) if push_request.index_params else None,
+        storage_type=push_request.storage_type
     )
 
 
@@ -160,7 +195,9 @@ async def index_search_project(request: Request, project_id: int, search_request
     results = await nlp_controller.search_vector_db_collection(
         project_id=project_id,
         text=search_request.text,
-        limit=search_request.limit
+        limit=search_request.limit,
+        search_params=search_request.search_params.dict(exclude_none=True) if search_request.search_params else None,
+        filters=search_request.filters.dict(exclude_none=True) if search_request.filters else None
     )
 
     if not results:
@@ -183,6 +220,68 @@ async def index_search_project(request: Request, project_id: int, search_request
     )
 
 
+# nlp_index_search_batch
+@nlp_router.post("/index/search/batch/{project_id}")
+async def index_search_batch_project(request: Request, project_id: int, search_request: BatchSearchRequest):
+
+    project = await request.app.project_model.get_project_or_create_one(
+        project_id=project_id
+    )
+
+    if not project:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                'signal': ResponseSignal.PROJECT_NOT_FOUND.value
+            }
+        )
+
+    if len(search_request.texts) == 0:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                'signal': ResponseSignal.VECTORDB_SEARCH_ERROR.value
+            }
+        )
+
+    nlp_controller = request.app.nlp_controller
+
+    batch_results, timings = await nlp_controller.search_vector_db_collection_batch(
+        project_id=project_id,
+        texts=search_request.texts,
+        limit=search_request.limit,
+        search_params=search_request.search_params.dict(exclude_none=True) if search_request.search_params else None,
+        filters=search_request.filters.dict(exclude_none=True) if search_request.filters else None
+    )
+
+    if batch_results is False:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                'signal': ResponseSignal.VECTORDB_SEARCH_ERROR.value
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.VECTORDB_BATCH_SEARCH_SUCCESS.value,
+            'results': [
+                {
+                    'text': text,
+                    'results': [
+                        result.dict()
+                        for result in results
+                    ],
+                    'latency': timings['per_query_seconds']
+                }
+                for text, results in zip(search_request.texts, batch_results)
+            ],
+            'timings': timings
+        }
+    )
+
+
 # nlp_index_answer
 @nlp_router.post("/index/answer/{project_id}")
 async def index_answer_project(request: Request, project_id: int, search_request: SearchRequest):
@@ -204,7 +303,9 @@ async def index_answer_project(request: Request, project_id: int, search_request
     full_prompt, chat_history, answer = await nlp_controller.answer_rag_question(
         project_id=project_id,
         query=search_request.text,
-        limit=search_request.limit
+        limit=search_request.limit,
+        search_params=search_request.search_params.dict(exclude_none=True) if search_request.search_params else None,
+        filters=search_request.filters.dict(exclude_none=True) if search_request.filters else None
     )
 
     if not answer:
@@ -224,3 +325,19 @@ async def index_answer_project(request: Request, project_id: int, search_request
             'chat_history': chat_history
         }
     )
+
+
+# nlp_metrics
+@nlp_router.get("/metrics")
+async def nlp_metrics(request: Request):
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'signal': ResponseSignal.NLP_METRICS_SUCCESS.value,
+            'providers': request.app.llm_factory_provider.get_metrics(),
+            'embedding': request.app.nlp_controller.embedding_scheduler.get_metrics(),
+            'embedding_cache': request.app.nlp_controller.embedding_cache.get_metrics()
+            if request.app.nlp_controller.embedding_cache is not None else None
+        }
+    )
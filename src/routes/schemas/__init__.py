@@ -1,2 +1,2 @@
-from .data import ProcessRequest
-from .nlp import PushRequest, SearchRequest
+from .data import ProcessRequest, UploadSessionRequest
+from .nlp import PushRequest, SearchRequest, BatchSearchRequest
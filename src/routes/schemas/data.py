@@ -13,3 +13,16 @@ class ProcessRequest(BaseModel):
     chunk_size: Optional[int] = 1024
     overlap_size: Optional[int] = 205
     do_reset: Optional[bool] = False
+    stream: Optional[bool] = False
+
+
+class UploadSessionRequest(BaseModel):
+
+    '''
+    UploadSessionRequest Class for the FastAPI Application
+    In this class, we define the schema for the resumable Upload Session Request for the FastAPI Application
+    '''
+
+    file_name: str
+    file_size: int
+    content_type: str
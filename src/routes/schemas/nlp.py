@@ -1,5 +1,23 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+class IndexParams(BaseModel):
+
+    '''
+    IndexParams Class for the FastAPI Application
+    In this class, we define the overrides of the vector index build parameters for one collection,
+    the values are written into the CREATE INDEX and SET LOCAL statements of the build so they are validated here
+    '''
+
+    # hnsw graph degree and candidate list of the build (pgvector limits)
+    m: Optional[int] = Field(default=None, ge=2, le=100)
+    ef_construction: Optional[int] = Field(default=None, ge=4, le=1000)
+    # ivfflat lists, derived from the row count when not set
+    lists: Optional[int] = Field(default=None, ge=1, le=32768)
+    # session settings of the build
+    maintenance_work_mem: Optional[str] = Field(default=None, pattern=r'^\d+\s*(kB|MB|GB)?$')
+    max_parallel_maintenance_workers: Optional[int] = Field(default=None, ge=0, le=1024)
 
 
 class PushRequest(BaseModel):
@@ -10,6 +28,44 @@ class PushRequest(BaseModel):
     '''
 
     do_reset: Optional[bool] = False
+    index_params: Optional[IndexParams] = None
+    # Storage type of the collection, it is applied when the collection is created or reset
+    storage_type: Optional[Literal['vector', 'halfvec', 'bit']] = None
+
+
+class SearchFilters(BaseModel):
+
+    '''
+    SearchFilters Class for the FastAPI Application
+    In this class, we define the filters of the Search Request, every filter that is set must match
+    '''
+
+    min_chunk_id: Optional[int] = None
+    max_chunk_id: Optional[int] = None
+    asset_ids: Optional[List[int]] = None
+    # Values of the chunk metadata keys, e.g. {"source": "file.pdf"}
+    metadata: Optional[dict] = None
+
+
+class SearchParams(BaseModel):
+
+    '''
+    SearchParams Class for the FastAPI Application
+    In this class, we define the overrides of the vector search parameters for one request,
+    the values are written into the SET LOCAL statements of the search so they are validated here
+    '''
+
+    # hnsw candidate list, ivfflat lists visited
+    ef_search: Optional[int] = Field(default=None, gt=0)
+    probes: Optional[int] = Field(default=None, gt=0)
+    # bit collections: limit * rescore_factor candidates are rescored on the full vectors
+    rescore_factor: Optional[int] = Field(default=None, gt=0)
+    # filtered searches (pgvector >= 0.8)
+    iterative_scan: Optional[Literal['off', 'relaxed_order', 'strict_order']] = None
+    # hybrid search
+    hybrid: Optional[bool] = None
+    hybrid_candidates_factor: Optional[int] = Field(default=None, gt=0)
+    rrf_k: Optional[int] = Field(default=None, gt=0)
 
 
 class SearchRequest(BaseModel):
@@ -21,3 +77,18 @@ class SearchRequest(BaseModel):
 
     text: str
     limit: Optional[int] = 5
+    search_params: Optional[SearchParams] = None
+    filters: Optional[SearchFilters] = None
+
+
+class BatchSearchRequest(BaseModel):
+
+    '''
+    BatchSearchRequest Class for the FastAPI Application
+    In this class, we define the schema for the Batch Search Request, the queries share the limit, the parameters and the filters
+    '''
+
+    texts: List[str]
+    limit: Optional[int] = 5
+    search_params: Optional[SearchParams] = None
+    filters: Optional[SearchFilters] = None
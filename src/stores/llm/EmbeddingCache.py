@@ -0,0 +1,129 @@
+from logging import getLogger
+from typing import Dict, List
+from array import array
+import threading
+import hashlib
+import sqlite3
+import time
+
+
+class EmbeddingCache:
+    '''
+    This class is a persistent content-addressed cache of embeddings stored in a local SQLite file
+    The key is the SHA-256 of (provider, embedding model id, document type, processed text), so a text that did not change
+    is never sent to the provider again, whatever the project, asset or chunk it comes from
+    The vectors are stored as float32 blobs, the least recently used entries are evicted above max_entries
+
+    make_key: This method returns the cache key of a processed text
+    get_many: This method returns the cached vectors of the keys that are found and refreshes their last use
+    set_many: This method stores new vectors and evicts the least recently used entries if the cache is full
+    get_metrics: This method returns the hit/miss counters and the number of entries
+    '''
+
+    def __init__(self, db_path: str, max_entries: int = 500_000):
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+
+        # The cache is used from the event loop threads pool, one connection guarded by a lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            'key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)'
+        )
+        self.connection.commit()
+
+        self.entries = self.connection.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+
+        self.counters = {
+            'hits': 0,
+            'misses': 0,
+            'deduplicated': 0,
+            'evictions': 0
+        }
+
+        self.logger = getLogger(__name__)
+
+    @staticmethod
+    def make_key(provider: str, model_id: str, document_type: str, text: str):
+        return hashlib.sha256(
+            '\x1f'.join([provider or '', model_id or '', document_type or '', text]).encode('utf-8')
+        ).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, list]:
+
+        if not keys:
+            return {}
+
+        vectors = {}
+        with self.lock:
+            # SQLite limits the number of bound parameters, the keys are looked up in slices
+            for start in range(0, len(keys), 500):
+                keys_slice = keys[start:start + 500]
+                rows = self.connection.execute(
+                    f'SELECT key, vector FROM embeddings WHERE key IN ({",".join("?" * len(keys_slice))})',
+                    keys_slice
+                ).fetchall()
+                for key, vector in rows:
+                    vectors[key] = array('f', vector).tolist()
+
+            if vectors:
+                now = time.time()
+                self.connection.executemany(
+                    'UPDATE embeddings SET last_used = ? WHERE key = ?',
+                    [(now, key) for key in vectors]
+                )
+                self.connection.commit()
+
+        self.counters['hits'] += len(vectors)
+        self.counters['misses'] += len(keys) - len(vectors)
+
+        return vectors
+
+    def set_many(self, vectors: Dict[str, list]):
+
+        if not vectors:
+            return
+
+        now = time.time()
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)',
+                [(key, array('f', vector).tobytes(), now) for key, vector in vectors.items()]
+            )
+            self.entries += self.connection.total_changes - before
+
+            if self.entries > self.max_entries:
+                # Evict down to 90% of the limit, so the eviction does not run on every insert
+                evicted_count = self.entries - int(self.max_entries * 0.9)
+                self.connection.execute(
+                    'DELETE FROM embeddings WHERE key IN '
+                    '(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)',
+                    (evicted_count,)
+                )
+                self.entries -= evicted_count
+                self.counters['evictions'] += evicted_count
+
+            self.connection.commit()
+
+    def get_metrics(self):
+
+        lookups = self.counters['hits'] + self.counters['misses']
+
+        return {
+            **self.counters,
+            'hit_rate': round(self.counters['hits'] / lookups, 4) if lookups else None,
+            'entries': self.entries,
+            'max_entries': self.max_entries
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,176 @@
+from .LLMInterface import LLMInterface
+
+from collections import deque
+from logging import getLogger
+from typing import List
+import asyncio
+import time
+
+
+class EmbeddingScheduler:
+    '''
+    This class sits in front of LLMInterface.aget_embedding and sends the texts in batches that fit the provider
+    - texts are packed by count (batch_size) and by characters (max_batch_characters), keeping their order
+    - at most max_concurrency batches are in flight, the limit is shared by all the callers of the scheduler
+    - a batch the provider rejects is split in two halves that are retried, down to a single text
+    - the batch size adapts to the measured latency: it grows while the batches answer under half of the
+      target latency, it shrinks when they are slower than the target or rejected
+
+    embed: This method returns the vectors of the texts, in the same order, or None if a text cannot be embedded
+    get_metrics: This method returns the batching counters and the latency of the recent batches
+    '''
+
+    def __init__(self, embedding_model: LLMInterface,
+                 max_concurrency: int = 4,
+                 max_batch_size: int = None,
+                 max_batch_characters: int = None,
+                 target_latency: float = 2.0,
+                 metrics_window: int = 100):
+
+        self.embedding_model = embedding_model
+
+        provider_batch_size = getattr(embedding_model, 'max_embedding_batch_size', None) or 96
+        provider_batch_characters = getattr(embedding_model, 'max_embedding_batch_characters', None)
+
+        self.max_batch_size = min(max_batch_size or provider_batch_size, provider_batch_size)
+        self.max_batch_characters = max_batch_characters or provider_batch_characters
+        self.target_latency = target_latency
+
+        self.batch_size = self.max_batch_size
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.counters = {
+            'requests': 0,
+            'texts': 0,
+            'rejected_batches': 0,
+            'splits': 0
+        }
+        self.recent_batches = deque(maxlen=metrics_window)
+
+        self.logger = getLogger(__name__)
+
+    def text_length(self, text: str):
+        # The providers truncate every text to default_max_input_characters before sending it
+        max_input_characters = getattr(self.embedding_model, 'default_max_input_characters', None)
+        return min(len(text), max_input_characters) if max_input_characters else len(text)
+
+    def pack_batches(self, texts: List[str]):
+
+        batches = []
+        start, characters = 0, 0
+
+        for idx, text in enumerate(texts):
+            length = self.text_length(text)
+
+            is_full = idx - start >= self.batch_size or (
+                self.max_batch_characters is not None and characters + length > self.max_batch_characters
+            )
+            if idx > start and is_full:
+                batches.append((start, idx))
+                start, characters = idx, 0
+
+            characters += length
+
+        if start < len(texts):
+            batches.append((start, len(texts)))
+
+        return batches
+
+    async def embed(self, texts: List[str], document_type: str = None):
+
+        if not texts:
+            return []
+
+        results = await asyncio.gather(*[
+            self.embed_batch(texts=texts[start:end], document_type=document_type)
+            for start, end in self.pack_batches(texts)
+        ])
+
+        if any(vectors is None for vectors in results):
+            return None
+
+        return [vector for vectors in results for vector in vectors]
+
+    async def embed_batch(self, texts: List[str], document_type: str = None):
+
+        async with self.semaphore:
+            started_at = time.monotonic()
+            try:
+                vectors = await self.embedding_model.aget_embedding(
+                    text=texts,
+                    document_type=document_type
+                )
+            except Exception as e:
+                request_scheduler = getattr(self.embedding_model, 'request_scheduler', None)
+                if request_scheduler is not None and request_scheduler.is_retryable(e):
+                    # The provider is still throttling or unavailable after the retries, splitting would only add requests
+                    raise
+                self.logger.error(f'Embedding batch of {len(texts)} texts failed: {e}')
+                vectors = None
+            latency = time.monotonic() - started_at
+
+        is_accepted = vectors is not None and len(vectors) == len(texts)
+        self.record_batch(size=len(texts), latency=latency, is_accepted=is_accepted)
+
+        if is_accepted:
+            return vectors
+
+        if len(texts) == 1:
+            return None
+
+        # Rejected batches are split and retried, the halves run concurrently
+        self.counters['splits'] += 1
+        middle = len(texts) // 2
+        first_half, second_half = await asyncio.gather(
+            self.embed_batch(texts=texts[:middle], document_type=document_type),
+            self.embed_batch(texts=texts[middle:], document_type=document_type)
+        )
+
+        if first_half is None or second_half is None:
+            return None
+
+        return first_half + second_half
+
+    def record_batch(self, size: int, latency: float, is_accepted: bool):
+
+        self.counters['requests'] += 1
+        self.recent_batches.append({
+            'size': size,
+            'latency': round(latency, 4),
+            'accepted': is_accepted
+        })
+
+        if not is_accepted:
+            self.counters['rejected_batches'] += 1
+            # Concurrent rejections of same-sized batches shrink the size once, not once per batch
+            self.batch_size = max(1, min(self.batch_size, size // 2))
+            return
+
+        self.counters['texts'] += size
+
+        if size < self.batch_size:
+            # A partial batch says nothing about the current batch size
+            return
+
+        if latency > self.target_latency:
+            self.batch_size = max(1, self.batch_size * 3 // 4)
+        elif latency < self.target_latency / 2:
+            self.batch_size = min(self.max_batch_size,
+                                  self.batch_size + max(1, self.batch_size // 4))
+
+    def get_metrics(self):
+
+        latencies = sorted(
+            batch['latency'] for batch in self.recent_batches if batch['accepted']
+        )
+
+        return {
+            **self.counters,
+            'batch_size': self.batch_size,
+            'max_batch_size': self.max_batch_size,
+            'max_batch_characters': self.max_batch_characters,
+            'target_latency': self.target_latency,
+            'avg_latency': round(sum(latencies) / len(latencies), 4) if latencies else None,
+            'p95_latency': latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+            'recent_batches': list(self.recent_batches)
+        }
@@ -25,6 +25,12 @@ class CoHereEnums(Enum):
     QUERY = 'search_query'
 
 
+class RequestPriorityEnums(Enum):
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
 class DocumentTypeEnums(Enum):
 
     DOCUMENT = 'document'
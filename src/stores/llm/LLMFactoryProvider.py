@@ -1,12 +1,61 @@
 from .LLMEnums import LLMEnums
 
 from .providers import CoHereProvider, OpenAIProvider, GoogleProvider
+from .RequestScheduler import RequestScheduler
+
+import httpx
 
 
 class LLMFactoryProvider:
 
     def __init__(self, config: dict):
         self.config = config
+        self.http_client = None
+        self.request_schedulers = {}
+
+    def get_http_client(self):
+        '''
+        The async clients of all the providers created by this factory share one connection pool,
+        so the TLS connections to the provider APIs are kept alive and reused between requests
+        '''
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.config.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=self.config.LLM_HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(self.config.LLM_HTTP_TIMEOUT)
+            )
+
+        return self.http_client
+
+    def get_request_scheduler(self, provider: str):
+        '''
+        The generation and the embedding clients of the same provider share one scheduler, so they share its rate limits
+        '''
+        if provider not in self.request_schedulers:
+            self.request_schedulers[provider] = RequestScheduler(
+                name=provider,
+                requests_per_minute=getattr(self.config, f'{provider}_REQUESTS_PER_MINUTE', None),
+                tokens_per_minute=getattr(self.config, f'{provider}_TOKENS_PER_MINUTE', None),
+                max_retries=self.config.LLM_MAX_RETRIES,
+                retry_base_delay=self.config.LLM_RETRY_BASE_DELAY,
+                retry_max_delay=self.config.LLM_RETRY_MAX_DELAY
+            )
+
+        return self.request_schedulers[provider]
+
+    def get_metrics(self):
+        return {
+            provider: request_scheduler.get_metrics()
+            for provider, request_scheduler in self.request_schedulers.items()
+        }
+
+    async def close(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
 
     def create_provider(self, provider: str):
 
@@ -14,6 +63,9 @@ class LLMFactoryProvider:
             return OpenAIProvider(
                 api_key=self.config.OPENAI_API_KEY,
                 base_url=self.config.OPENAI_URL_BASE,
+                http_client=self.get_http_client(),
+                timeout=self.config.LLM_HTTP_TIMEOUT,
+                request_scheduler=self.get_request_scheduler(provider),
                 default_max_input_characters=self.config.DEFAULT_INPUT_MAX_CHARACTERS,
                 default_max_output_tokens=self.config.DEFAULT_MAX_NEW_TOKENS,
                 default_temperature=self.config.DEFAULT_TEMPERATURE,
@@ -22,6 +74,9 @@ class LLMFactoryProvider:
         elif provider == LLMEnums.COHERE.value:
             return CoHereProvider(
                 api_key=self.config.COHERE_API_KEY,
+                http_client=self.get_http_client(),
+                timeout=self.config.LLM_HTTP_TIMEOUT,
+                request_scheduler=self.get_request_scheduler(provider),
                 default_max_input_characters=self.config.DEFAULT_INPUT_MAX_CHARACTERS,
                 default_max_output_tokens=self.config.DEFAULT_MAX_NEW_TOKENS,
                 default_temperature=self.config.DEFAULT_TEMPERATURE,
@@ -29,6 +84,8 @@ class LLMFactoryProvider:
         elif provider == LLMEnums.GOOGLE.value:
             return GoogleProvider(
                 api_key=self.config.GOOGLE_API_KEY,
+                timeout=self.config.LLM_HTTP_TIMEOUT,
+                request_scheduler=self.get_request_scheduler(provider),
                 default_max_input_characters=self.config.DEFAULT_INPUT_MAX_CHARACTERS,
                 default_max_output_tokens=self.config.DEFAULT_MAX_NEW_TOKENS,
                 default_temperature=self.config.DEFAULT_TEMPERATURE,
@@ -22,6 +22,17 @@ class LLMInterface(ABC):
     def get_embedding(self, text: str, document_type: str = None):
         pass
 
+    @abstractmethod
+    async def agenerate_text(self, prompt: str,
+                             chat_history: list = [],
+                             max_new_tokens: int = None,
+                             temperature: float = None):
+        pass
+
+    @abstractmethod
+    async def aget_embedding(self, text: str, document_type: str = None):
+        pass
+
     @abstractmethod
     def construct_prompt(self, prompt: str, role: str):
         pass
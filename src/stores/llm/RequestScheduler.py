@@ -0,0 +1,230 @@
+from .LLMEnums import RequestPriorityEnums
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+from logging import getLogger
+import itertools
+import asyncio
+import random
+import heapq
+import time
+
+
+class TokenBucket:
+    '''
+    This class is a token bucket refilled continuously at rate_per_minute, it holds at most one minute of budget
+    A rate of 0 (or None) means no limit
+    '''
+
+    def __init__(self, rate_per_minute: int = None):
+        self.rate_per_minute = rate_per_minute or 0
+        self.capacity = float(self.rate_per_minute)
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity,
+                             self.available + (now - self.updated_at) * self.rate_per_minute / 60)
+        self.updated_at = now
+
+    def get_delay(self, amount: float):
+        '''
+        This method returns how long to wait before amount can be consumed, a request larger than the bucket
+        only waits for a full bucket, otherwise it would never be sent
+        '''
+        if not self.rate_per_minute:
+            return 0.0
+
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+
+        return (amount - self.available) * 60 / self.rate_per_minute
+
+    def consume(self, amount: float):
+        if self.rate_per_minute:
+            self.available -= min(amount, self.capacity)
+
+
+class RequestScheduler:
+    '''
+    This class schedules the requests sent to one provider, all the clients of the provider share it
+    - the requests wait in a priority queue for the requests/min and tokens/min buckets,
+      so interactive requests (queries, answers) go before the bulk indexing ones on the same quota
+    - throttled (429) and transient (408, 409, 5xx, connection) failures are retried with a jittered exponential backoff,
+      the Retry-After header of the provider is honoured when it is present
+
+    submit: This method runs request() once the budget is available and retries it, it raises the last error
+    estimate_tokens: This method estimates the tokens of texts (about 4 characters per token)
+    get_metrics: This method returns the counters of the scheduler
+    '''
+
+    RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self, name: str = None,
+                 requests_per_minute: int = None,
+                 tokens_per_minute: int = None,
+                 max_retries: int = 5,
+                 retry_base_delay: float = 1.0,
+                 retry_max_delay: float = 60.0):
+
+        self.name = name
+
+        self.requests_bucket = TokenBucket(rate_per_minute=requests_per_minute)
+        self.tokens_bucket = TokenBucket(rate_per_minute=tokens_per_minute)
+
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.dispatcher = None
+
+        self.counters = {
+            'requests': 0,
+            'tokens': 0,
+            'throttled': 0,
+            'retries': 0,
+            'failures': 0,
+            'queue_wait_seconds': 0.0
+        }
+
+        self.logger = getLogger(__name__)
+
+    async def submit(self, request: Callable[[], Awaitable], tokens: int = 0,
+                     priority: int = RequestPriorityEnums.BULK.value):
+
+        attempt = 0
+        while True:
+
+            await self.acquire(tokens=tokens, priority=priority)
+
+            self.counters['requests'] += 1
+            self.counters['tokens'] += tokens
+
+            try:
+                return await request()
+            except Exception as e:
+
+                status_code = self.get_status_code(e)
+                if status_code == 429:
+                    self.counters['throttled'] += 1
+
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    self.counters['failures'] += 1
+                    raise
+
+                delay = self.get_retry_delay(error=e, attempt=attempt)
+                self.logger.warning(
+                    f'{self.name} request failed ({status_code or type(e).__name__}), retrying in {delay:.1f}s')
+
+                self.counters['retries'] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def estimate_tokens(texts: list):
+        return sum(len(text) for text in texts) // 4 + 1
+
+    async def acquire(self, tokens: int = 0, priority: int = RequestPriorityEnums.BULK.value):
+
+        if not self.requests_bucket.rate_per_minute and not self.tokens_bucket.rate_per_minute:
+            return
+
+        started_at = time.monotonic()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), tokens, future))
+
+        if self.dispatcher is None:
+            self.dispatcher = asyncio.create_task(self.dispatch())
+
+        await future
+
+        self.counters['queue_wait_seconds'] += time.monotonic() - started_at
+
+    async def dispatch(self):
+        '''
+        The first waiter of the queue is released when both buckets can pay for it,
+        a waiter with a higher priority that arrives during the wait is served first
+        '''
+        try:
+            while self.waiters:
+                _, _, tokens, future = self.waiters[0]
+
+                if future.done():
+                    heapq.heappop(self.waiters)
+                    continue
+
+                delay = max(self.requests_bucket.get_delay(1),
+                            self.tokens_bucket.get_delay(tokens))
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                heapq.heappop(self.waiters)
+                self.requests_bucket.consume(1)
+                self.tokens_bucket.consume(tokens)
+                future.set_result(None)
+        finally:
+            self.dispatcher = None
+
+    def get_status_code(self, error: Exception):
+        status_code = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+        return status_code if isinstance(status_code, int) else None
+
+    def is_retryable(self, error: Exception):
+
+        if self.get_status_code(error) in self.RETRYABLE_STATUS_CODES:
+            return True
+
+        # Timeouts and connection errors of the SDKs and of httpx
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or any(
+            error_type.__name__ in ('APIConnectionError', 'APITimeoutError', 'TransportError', 'TimeoutException')
+            for error_type in type(error).__mro__
+        )
+
+    def get_retry_delay(self, error: Exception, attempt: int):
+
+        retry_after = self.get_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.retry_max_delay)
+
+        # Full jitter, the clients that were throttled together do not retry together
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    def get_retry_after(self, error: Exception):
+
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or getattr(error, 'headers', None)
+        if not headers:
+            return None
+
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+
+            retry_after = headers.get('retry-after')
+            if not retry_after:
+                return None
+
+            if retry_after.replace('.', '', 1).isdigit():
+                return float(retry_after)
+
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def get_metrics(self):
+        return {
+            **self.counters,
+            'queue_wait_seconds': round(self.counters['queue_wait_seconds'], 3),
+            'queued': len(self.waiters),
+            'requests_per_minute': self.requests_bucket.rate_per_minute,
+            'tokens_per_minute': self.tokens_bucket.rate_per_minute
+        }
@@ -1 +1,3 @@
 from .LLMFactoryProvider import LLMFactoryProvider
+from .EmbeddingScheduler import EmbeddingScheduler
+from .EmbeddingCache import EmbeddingCache
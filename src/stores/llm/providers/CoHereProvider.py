@@ -1,14 +1,19 @@
 
 from typing import Union
-from cohere import ClientV2
+from cohere import ClientV2, AsyncClientV2
 from ..LLMInterface import LLMInterface
-from ..LLMEnums import CoHereEnums, DocumentTypeEnums
+from ..LLMEnums import LLMEnums, CoHereEnums, DocumentTypeEnums, RequestPriorityEnums
+from ..RequestScheduler import RequestScheduler
 from logging import getLogger
+import httpx
 
 
 class CoHereProvider(LLMInterface):
 
     def __init__(self, api_key: str,
+                 http_client: httpx.AsyncClient = None,
+                 timeout: float = None,
+                 request_scheduler: RequestScheduler = None,
                  default_max_input_characters: int = 1000,
                  default_max_output_tokens: int = 1000,
                  default_temperature: float = 0.1):
@@ -24,10 +29,24 @@ class CoHereProvider(LLMInterface):
         self.embedding_model_id = None
         self.embedding_size = None
 
+        # Cohere embed accepts at most 96 texts per request
+        self.max_embedding_batch_size = 96
+        self.max_embedding_batch_characters = None
+
         self.client = ClientV2(
             api_key=self.api_key
         )
 
+        # The async client is the one used from the event loop, it runs on the shared connection pool
+        self.async_client = AsyncClientV2(
+            api_key=self.api_key,
+            timeout=timeout,
+            httpx_client=http_client
+        )
+        # The retries are done by the request scheduler, the SDK ones are disabled per request
+        self.request_scheduler = request_scheduler or RequestScheduler(name=LLMEnums.COHERE.value)
+        self.request_options = {'max_retries': 0}
+
         self.enums = CoHereEnums
 
         self.logger = getLogger(__name__)
@@ -99,6 +118,78 @@ class CoHereProvider(LLMInterface):
         # Return all embeddings as a list
         return response.embeddings.float
 
+    async def agenerate_text(self, prompt: str,
+                             chat_history: list = [],
+                             max_new_tokens: int = None,
+                             temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("Cohere async client not initialized")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Model ID not set")
+            return None
+
+        chat_history.append(
+            self.construct_prompt(
+                prompt=prompt,
+                role=CoHereEnums.USER.value
+            )
+        )
+
+        max_new_tokens = max_new_tokens if max_new_tokens else self.default_max_output_tokens
+        temperature = temperature if temperature else self.default_temperature
+
+        response = await self.request_scheduler.submit(
+            lambda: self.async_client.chat(
+                model=self.generation_model_id,
+                messages=chat_history,
+                max_tokens=max_new_tokens,
+                temperature=temperature,
+                request_options=self.request_options
+            ),
+            tokens=RequestScheduler.estimate_tokens(
+                [str(message['content']) for message in chat_history]) + max_new_tokens,
+            priority=RequestPriorityEnums.INTERACTIVE.value
+        )
+
+        if not response or not response.message or not response.message.content or len(response.message.content) == 0 or not response.message.content[0].text:
+            self.logger.error("Error in Cohere text generation response")
+            return None
+
+        return response.message.content[0].text
+
+    async def aget_embedding(self, text: Union[str, list[str]], document_type: str = None):
+        if not self.async_client:
+            self.logger.error("Cohere async client not initialized")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model ID not set")
+            return None
+
+        input_type = CoHereEnums.DOCUMENT.value if document_type == DocumentTypeEnums.DOCUMENT.value else CoHereEnums.QUERY.value
+
+        texts = self.process_text(text)
+        response = await self.request_scheduler.submit(
+            lambda: self.async_client.embed(
+                model=self.embedding_model_id,
+                texts=texts,
+                input_type=input_type,
+                embedding_types=["float"],
+                request_options=self.request_options
+            ),
+            tokens=RequestScheduler.estimate_tokens(texts),
+            priority=RequestPriorityEnums.BULK.value if document_type == DocumentTypeEnums.DOCUMENT.value
+            else RequestPriorityEnums.INTERACTIVE.value
+        )
+        if not response or not response.embeddings or not response.embeddings.float or len(response.embeddings.float) == 0:
+            self.logger.error("Error in Cohere Embedding response")
+            return None
+
+        return response.embeddings.float
+
     def construct_prompt(self, prompt, role):
         return {
             'role': role,
@@ -1,7 +1,8 @@
 from google import genai
 
 from ..LLMInterface import LLMInterface
-from ..LLMEnums import GoogleEnums, DocumentTypeEnums
+from ..LLMEnums import LLMEnums, GoogleEnums, DocumentTypeEnums, RequestPriorityEnums
+from ..RequestScheduler import RequestScheduler
 from logging import getLogger
 
 from typing import Union, List
@@ -10,6 +11,8 @@ from typing import Union, List
 class GoogleProvider(LLMInterface):
 
     def __init__(self, api_key: str,
+                 timeout: float = None,
+                 request_scheduler: RequestScheduler = None,
                  default_max_input_characters: int = 1000,
                  default_max_output_tokens: int = 1000,
                  default_temperature: float = 0.1):
@@ -25,9 +28,16 @@ class GoogleProvider(LLMInterface):
         self.embedding_model_id = None
         self.embedding_size = None
 
+        # Gemini batch embedding accepts at most 100 texts per request
+        self.max_embedding_batch_size = 100
+        self.max_embedding_batch_characters = None
+
+        # client.aio is the async client used from the event loop, the timeout of genai is in milliseconds
         self.client = genai.Client(
-            api_key=self.api_key
+            api_key=self.api_key,
+            http_options={'timeout': int(timeout * 1000)} if timeout else None
         )
+        self.request_scheduler = request_scheduler or RequestScheduler(name=LLMEnums.GOOGLE.value)
 
         self.enums = GoogleEnums
 
@@ -104,6 +114,81 @@ class GoogleProvider(LLMInterface):
 
         return [embed.values for embed in response.embeddings]
 
+    async def agenerate_text(self, prompt: str,
+                             chat_history: list = [],
+                             max_new_tokens: int = None,
+                             temperature: float = None):
+
+        if not self.client:
+            self.logger.error("Gemini client not initialized")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Model ID not set")
+            return None
+
+        chat_history.append(
+            self.construct_prompt(
+                prompt=prompt,
+                role=GoogleEnums.USER.value
+            )
+        )
+
+        max_new_tokens = max_new_tokens if max_new_tokens else self.default_max_output_tokens
+        temperature = temperature if temperature else self.default_temperature
+
+        response = await self.request_scheduler.submit(
+            lambda: self.client.aio.models.generate_content(
+                model=self.generation_model_id,
+                contents=chat_history,
+                config={
+                    'max_output_tokens': max_new_tokens,
+                    'temperature': temperature
+                }
+            ),
+            tokens=RequestScheduler.estimate_tokens(
+                [str(message) for message in chat_history]) + max_new_tokens,
+            priority=RequestPriorityEnums.INTERACTIVE.value
+        )
+
+        if not response or not response.text:
+            self.logger.error("Error in Gemini text generation response")
+            return None
+
+        return response.text
+
+    async def aget_embedding(self, text: Union[str, List[str]], document_type: str = None):
+
+        if not self.client:
+            self.logger.error("Google client not initialized")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model ID not set")
+            return None
+
+        input_type = GoogleEnums.DOCUMENT.value if document_type == DocumentTypeEnums.DOCUMENT.value else GoogleEnums.QUERY.value
+
+        texts = self.process_text(text)
+        response = await self.request_scheduler.submit(
+            lambda: self.client.aio.models.embed_content(
+                model=self.embedding_model_id,
+                contents=texts,
+                config={
+                    'task_type': input_type
+                }
+            ),
+            tokens=RequestScheduler.estimate_tokens(texts),
+            priority=RequestPriorityEnums.BULK.value if document_type == DocumentTypeEnums.DOCUMENT.value
+            else RequestPriorityEnums.INTERACTIVE.value
+        )
+
+        if not response or not response.embeddings or len(response.embeddings) == 0 or not response.embeddings[0].values:
+            self.logger.error("Error in Google Embedding response")
+            return None
+
+        return [embed.values for embed in response.embeddings]
+
     def construct_prompt(self, prompt, role):
         return '\n'.join(
             [
@@ -1,14 +1,19 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from ..LLMInterface import LLMInterface
-from ..LLMEnums import LLMEnums, OpenAIEnums
+from ..LLMEnums import LLMEnums, OpenAIEnums, DocumentTypeEnums, RequestPriorityEnums
+from ..RequestScheduler import RequestScheduler
 from logging import getLogger
 
 from typing import Union, List
+import httpx
 
 
 class OpenAIProvider(LLMInterface):
 
     def __init__(self, api_key: str, base_url: str = None,
+                 http_client: httpx.AsyncClient = None,
+                 timeout: float = None,
+                 request_scheduler: RequestScheduler = None,
                  default_max_input_characters: int = 1000,
                  default_max_output_tokens: int = 1000,
                  default_temperature: float = 0.1):
@@ -25,12 +30,29 @@ class OpenAIProvider(LLMInterface):
         self.embedding_model_id = None
         self.embedding_size = None
 
+        # OpenAI accepts 2048 inputs and about 300k tokens per embedding request
+        self.max_embedding_batch_size = 2048
+        self.max_embedding_batch_characters = 1_000_000
+
         self.client = OpenAI(
             api_key=self.api_key,
             base_url=self.base_url if self.base_url and len(
                 self.base_url) else None
         )
 
+        # The async client is the one used from the event loop, it runs on the shared connection pool
+        # The retries are done by the request scheduler, which shares the rate limits of the provider
+        async_client_kwargs = {'timeout': timeout} if timeout else {}
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url if self.base_url and len(
+                self.base_url) else None,
+            http_client=http_client,
+            max_retries=0,
+            **async_client_kwargs
+        )
+        self.request_scheduler = request_scheduler or RequestScheduler(name=LLMEnums.OPENAI.value)
+
         self.enums = OpenAIEnums
 
         self.logger = getLogger(__name__)
@@ -98,6 +120,72 @@ class OpenAIProvider(LLMInterface):
         # Return all embeddings as a list
         return [item.embedding for item in response.data]
 
+    async def agenerate_text(self, prompt: str,
+                             chat_history: list = [],
+                             max_new_tokens: int = None,
+                             temperature: float = None):
+
+        if not self.async_client:
+            self.logger.error("OpenAI async client not initialized")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Model ID not set")
+            return None
+
+        chat_history.append(
+            self.construct_prompt(
+                prompt=prompt,
+                role=OpenAIEnums.USER.value
+            )
+        )
+
+        max_new_tokens = max_new_tokens if max_new_tokens else self.default_max_output_tokens
+        temperature = temperature if temperature else self.default_temperature
+
+        response = await self.request_scheduler.submit(
+            lambda: self.async_client.chat.completions.create(
+                model=self.generation_model_id,
+                messages=chat_history,
+                max_tokens=max_new_tokens,
+                temperature=temperature
+            ),
+            tokens=RequestScheduler.estimate_tokens(
+                [str(message['content']) for message in chat_history]) + max_new_tokens,
+            priority=RequestPriorityEnums.INTERACTIVE.value
+        )
+
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message or not response.choices[0].message.content:
+            self.logger.error("Error in OpenAI text generation response")
+            return None
+
+        return response.choices[0].message.content
+
+    async def aget_embedding(self, text: Union[str, List[str]], document_type: str = None):
+        if not self.async_client:
+            self.logger.error("OpenAI async client not initialized")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model ID not set")
+            return None
+
+        texts = self.process_text(text)
+        response = await self.request_scheduler.submit(
+            lambda: self.async_client.embeddings.create(
+                model=self.embedding_model_id,
+                input=texts
+            ),
+            tokens=RequestScheduler.estimate_tokens(texts),
+            priority=RequestPriorityEnums.BULK.value if document_type == DocumentTypeEnums.DOCUMENT.value
+            else RequestPriorityEnums.INTERACTIVE.value
+        )
+        if not response or not response.data or len(response.data) == 0:
+            self.logger.error("Error in OpenAI Embedding response")
+            return None
+
+        return [item.embedding for item in response.data]
+
     def construct_prompt(self, prompt: str, role: str):
         return {
             'role': role,
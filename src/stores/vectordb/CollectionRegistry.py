@@ -0,0 +1,56 @@
+from typing import Optional
+import time
+
+
+class CollectionRegistry:
+    '''
+    This class is an in-process cache of the collections state (existence, embedding dimension, vector index, storage type, full-text column)
+    The providers update it on create_collection / delete_collection / index changes, and every entry expires after ttl seconds
+    so the changes made by another process are picked up
+
+    get: This method returns the cached state of a collection, or None if it is unknown or expired
+    set: This method stores the full state of a collection
+    update: This method changes some fields of a cached state, it does nothing if the collection is not cached
+    invalidate: This method drops one collection (or all of them) from the cache
+    '''
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self.collections = {}
+
+    def get(self, collection_name: str) -> Optional[dict]:
+
+        state = self.collections.get(collection_name)
+        if state is None:
+            return None
+
+        if time.monotonic() >= state['expires_at']:
+            self.collections.pop(collection_name, None)
+            return None
+
+        return state
+
+    def set(self, collection_name: str, is_exist: bool,
+            embedding_dim: int = None, has_index: bool = False, storage_type: str = None,
+            has_text_search: bool = False):
+
+        self.collections[collection_name] = {
+            'is_exist': is_exist,
+            'embedding_dim': embedding_dim,
+            'has_index': has_index,
+            'storage_type': storage_type,
+            'has_text_search': has_text_search,
+            'expires_at': time.monotonic() + self.ttl
+        }
+
+    def update(self, collection_name: str, **state):
+
+        if collection_name in self.collections:
+            self.collections[collection_name].update(state)
+
+    def invalidate(self, collection_name: str = None):
+
+        if collection_name is None:
+            self.collections.clear()
+        else:
+            self.collections.pop(collection_name, None)
@@ -13,12 +13,28 @@ class DistanceTypeEnums(Enum):
     DOT = 'dot'
 
 
+class StorageTypeEnums(Enum):
+
+    # vector: float32 vectors, halfvec: float16 vectors,
+    # bit: float32 vectors with a binary quantized index, the candidates are rescored on the float32 vectors
+    VECTOR = 'vector'
+    HALFVEC = 'halfvec'
+    BIT = 'bit'
+
+
 class PGVectorDistanceTypeEnums(Enum):
 
     COSINE = 'vector_cosine_ops'
     DOT = 'vector_l2_ops'
 
 
+class PGVectorDistanceOperatorEnums(Enum):
+
+    # The operator an index built with the matching operator class can serve
+    COSINE = '<=>'
+    DOT = '<->'
+
+
 class PGVectorTableSchemaEnums(Enum):
 
     ID = 'id'
@@ -26,6 +42,7 @@ class PGVectorTableSchemaEnums(Enum):
     TEXT = 'text'
     CHUNK_ID = 'chunk_id'
     METADATA = 'metadata'
+    TEXT_SEARCH = 'text_search'
     _PREFIX = 'pgvector_'
 
 
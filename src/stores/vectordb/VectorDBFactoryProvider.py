@@ -21,7 +21,9 @@ class VectorDBFactoryProvider():
                     db_name=self.config.VECTOR_DB_PATH),
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
                 embedding_size=self.config.EMBEDDING_SIZE,
-                index_threshold=self.config.VECTOR_DB_PG_INDEXING_THRESHOLD
+                index_threshold=self.config.VECTOR_DB_PG_INDEXING_THRESHOLD,
+                storage_type=self.config.VECTOR_DB_STORAGE_TYPE,
+                rescore_factor=self.config.VECTOR_DB_BIT_RESCORE_FACTOR
             )
 
         if provider == VectorDBEnums.PGVECTOR.value:
@@ -29,7 +31,28 @@ class VectorDBFactoryProvider():
                 db_client=self.db_client,
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
                 embedding_size=self.config.EMBEDDING_SIZE,
-                index_threshold=self.config.VECTOR_DB_PG_INDEXING_THRESHOLD
+                index_threshold=self.config.VECTOR_DB_PG_INDEXING_THRESHOLD,
+                index_type=self.config.VECTOR_DB_PG_INDEX_TYPE,
+                index_params={
+                    'm': self.config.VECTOR_DB_PG_HNSW_M,
+                    'ef_construction': self.config.VECTOR_DB_PG_HNSW_EF_CONSTRUCTION,
+                    'lists': self.config.VECTOR_DB_PG_IVFFLAT_LISTS,
+                    'maintenance_work_mem': self.config.VECTOR_DB_PG_INDEX_MAINTENANCE_WORK_MEM,
+                    'max_parallel_maintenance_workers': self.config.VECTOR_DB_PG_INDEX_PARALLEL_WORKERS
+                },
+                collection_cache_ttl=self.config.VECTOR_DB_COLLECTION_CACHE_TTL,
+                use_copy=self.config.VECTOR_DB_PG_COPY_INSERT,
+                search_params={
+                    'ef_search': self.config.VECTOR_DB_PG_HNSW_EF_SEARCH,
+                    'probes': self.config.VECTOR_DB_PG_IVFFLAT_PROBES,
+                    'rescore_factor': self.config.VECTOR_DB_BIT_RESCORE_FACTOR,
+                    'iterative_scan': self.config.VECTOR_DB_PG_ITERATIVE_SCAN,
+                    'hybrid_candidates_factor': self.config.VECTOR_DB_PG_HYBRID_CANDIDATES_FACTOR,
+                    'rrf_k': self.config.VECTOR_DB_PG_HYBRID_RRF_K
+                },
+                storage_type=self.config.VECTOR_DB_STORAGE_TYPE,
+                hybrid_search=self.config.VECTOR_DB_PG_HYBRID_SEARCH,
+                text_search_config=self.config.VECTOR_DB_PG_TEXT_SEARCH_CONFIG
             )
 
         return None
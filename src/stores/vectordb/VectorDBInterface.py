@@ -29,7 +29,8 @@ class VectorDBInterface(ABC):
     @abstractmethod
     def create_collection(self, collection_name: str,
                           embedding_dim: int,
-                          do_reset: bool = False):
+                          do_reset: bool = False,
+                          storage_type: str = None):
         pass
 
     @abstractmethod
@@ -38,14 +39,32 @@ class VectorDBInterface(ABC):
 
     @abstractmethod
     def insert_one(self, collection_name: str, vector: List,
-                   text: str, metadata: str = None, vector_id: str = None):
+                   text: str, metadata: str = None, vector_id: str = None,
+                   build_index: bool = True):
         pass
 
     @abstractmethod
     def insert_batch(self, collection_name: str, vectors: List,
-                     texts: List, metadata: List = None, vector_ids: List = None, batch_size: int = 80):
+                     texts: List, metadata: List = None, vector_ids: List = None, batch_size: int = 80,
+                     build_index: bool = True, asset_ids: List = None):
         pass
 
     @abstractmethod
-    def search_by_vector(self, vector: List, collection_name: str, top_k: int) -> List[RetrievedDocument]:
+    def create_vector_index(self, collection_name: str, indexing_type: str = None, index_params: dict = None):
+        pass
+
+    @abstractmethod
+    def delete_by_vector_ids(self, collection_name: str, vector_ids: List):
+        pass
+
+    @abstractmethod
+    def search_by_vector(self, vector: List, collection_name: str, top_k: int,
+                         search_params: dict = None, filters: dict = None,
+                         text: str = None) -> List[RetrievedDocument]:
+        pass
+
+    @abstractmethod
+    def search_by_vector_batch(self, vectors: List, collection_name: str, top_k: int,
+                               search_params: dict = None, filters: dict = None,
+                               texts: List[str] = None) -> List[List[RetrievedDocument]]:
         pass
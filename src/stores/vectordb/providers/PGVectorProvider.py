@@ -1,6 +1,9 @@
 from ..VectorDBInterface import VectorDBInterface
+from ..CollectionRegistry import CollectionRegistry
 from ..VectorDBEnums import (DistanceTypeEnums,
+                             StorageTypeEnums,
                              PGVectorDistanceTypeEnums,
+                             PGVectorDistanceOperatorEnums,
                              PGVectorTableSchemaEnums,
                              PGVectorIndexingEnums)
 
@@ -9,7 +12,12 @@ from models.db_schemas import RetrievedDocument
 from sqlalchemy.sql import text as sql_text
 
 from typing import List
+from array import array
+import struct
+import math
 import json
+import sys
+import re
 
 from logging import getLogger
 
@@ -20,18 +28,59 @@ class PGVectorProvider(VectorDBInterface):
                  db_client,
                  distance_method: str,
                  embedding_size: int = 768,
-                 index_threshold: int = 100
+                 index_threshold: int = 100,
+                 index_type: str = PGVectorIndexingEnums.HNSW.value,
+                 index_params: dict = None,
+                 collection_cache_ttl: float = 60.0,
+                 use_copy: bool = True,
+                 search_params: dict = None,
+                 storage_type: str = StorageTypeEnums.VECTOR.value,
+                 hybrid_search: bool = False,
+                 text_search_config: str = 'simple'
                  ):
 
         self.db_client = db_client
         self.distance_method = PGVectorDistanceTypeEnums.COSINE.value if distance_method == DistanceTypeEnums.COSINE.value else PGVectorDistanceTypeEnums.DOT.value
+        self.distance_operator = PGVectorDistanceOperatorEnums.COSINE.value if distance_method == DistanceTypeEnums.COSINE.value else PGVectorDistanceOperatorEnums.DOT.value
         self.embedding_size = embedding_size
 
         self.index_threshold = index_threshold
 
+        # Default build parameters, create_vector_index can override them per collection:
+        # m, ef_construction (hnsw), lists (ivfflat, derived from the row count when not set),
+        # maintenance_work_mem and max_parallel_maintenance_workers (session settings of the build)
+        self.index_type = index_type
+        self.index_params = index_params or {}
+
+        # Existence, dimension and index state of the collections, so a warm search or insert runs no catalog query
+        self.collection_registry = CollectionRegistry(ttl=collection_cache_ttl)
+
+        # insert_batch streams the rows with a binary COPY, the INSERT path is kept for drivers without COPY support
+        self.use_copy = use_copy
+
+        # Default search parameters, search_by_vector can override them per query:
+        # ef_search (hnsw candidate list), probes (ivfflat lists visited),
+        # rescore_factor (bit collections: top_k * rescore_factor candidates are rescored on the full vectors),
+        # iterative_scan (pgvector >= 0.8, filtered searches keep scanning the index until top_k rows pass the filters),
+        # hybrid (full-text + vector search of the collections with a text_search column),
+        # hybrid_candidates_factor (rows taken from each search before the fusion), rrf_k (constant of the rank fusion)
+        self.search_params = search_params or {}
+
+        # Storage type of the new collections, create_collection can override it per collection
+        self.storage_type = storage_type
+
+        # The new collections get a generated tsvector column of their text (with a GIN index) for the hybrid search,
+        # text_search_config is the text search configuration of the column and of the queries
+        if not re.fullmatch(r'[a-z_]+', text_search_config):
+            raise ValueError(f'Invalid text search configuration: {text_search_config}')
+        self.hybrid_search = hybrid_search
+        self.text_search_config = text_search_config
+
         self.pgvector_prefix = PGVectorTableSchemaEnums._PREFIX.value
 
         self.get_index_name = lambda collection_name: f'{collection_name}_vector_idx'
+        self.get_metadata_index_name = lambda collection_name: f'{collection_name}_metadata_idx'
+        self.get_text_search_index_name = lambda collection_name: f'{collection_name}_text_search_idx'
 
         self.logger = getLogger('uvicorn')
 
@@ -51,16 +100,61 @@ class PGVectorProvider(VectorDBInterface):
 
         return None
 
-    async def is_collection_exist(self, collection_name: str) -> bool:
-        record = None
+    async def get_collection_state(self, collection_name: str) -> dict:
+        '''
+        This method returns the cached state of the collection, on a miss one catalog query reads
+        its existence, its embedding dimension (the typmod of the vector column), whether its vector index exists,
+        its storage type (the table comment, collections created before the storage types are float32)
+        and whether it has the text_search column of the hybrid search
+        A missing collection is not cached, so a collection created by another process is seen on the next call
+        '''
+        state = self.collection_registry.get(collection_name)
+        if state is not None:
+            return state
+
         async with self.db_client() as session:
             async with session.begin():
-                get_table_query = sql_text(
-                    "SELECT * FROM pg_tables WHERE tablename = :collection_name"
+                get_state_query = sql_text(
+                    'SELECT EXISTS (SELECT 1 FROM pg_tables WHERE tablename = :collection_name) AS is_exist, '
+                    '(SELECT a.atttypmod FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid '
+                    ' WHERE c.relname = :collection_name AND a.attname = :vector_column AND NOT a.attisdropped) AS embedding_dim, '
+                    'EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = :index_name AND tablename = :collection_name) AS has_index, '
+                    '(SELECT obj_description(c.oid, \'pg_class\') FROM pg_class c '
+                    ' WHERE c.relname = :collection_name AND c.relkind = \'r\') AS storage_type, '
+                    'EXISTS (SELECT 1 FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid '
+                    ' WHERE c.relname = :collection_name AND a.attname = :text_search_column AND NOT a.attisdropped) AS has_text_search'
                 )
-                result = await session.execute(get_table_query, {"collection_name": collection_name})
-                record = result.scalar_one_or_none()
-        return record
+                result = await session.execute(get_state_query, {
+                    'collection_name': collection_name,
+                    'vector_column': PGVectorTableSchemaEnums.VECTOR.value,
+                    'text_search_column': PGVectorTableSchemaEnums.TEXT_SEARCH.value,
+                    'index_name': self.get_index_name(collection_name=collection_name)
+                })
+                record = result.one()
+
+        if not record.is_exist:
+            return {
+                'is_exist': False,
+                'embedding_dim': None,
+                'has_index': False,
+                'storage_type': StorageTypeEnums.VECTOR.value,
+                'has_text_search': False
+            }
+
+        self.collection_registry.set(
+            collection_name=collection_name,
+            is_exist=True,
+            embedding_dim=record.embedding_dim,
+            has_index=bool(record.has_index),
+            storage_type=record.storage_type or StorageTypeEnums.VECTOR.value,
+            has_text_search=bool(record.has_text_search)
+        )
+
+        return self.collection_registry.get(collection_name)
+
+    async def is_collection_exist(self, collection_name: str) -> bool:
+        state = await self.get_collection_state(collection_name=collection_name)
+        return state['is_exist']
 
     async def list_collections(self) -> List:
         records = []
@@ -106,48 +200,84 @@ class PGVectorProvider(VectorDBInterface):
                 )
                 await session.execute(drop_table_query)
             await session.commit()
+        self.collection_registry.invalidate(collection_name)
         return True
 
+    def get_vector_type(self, storage_type: str):
+        # bit collections keep the float32 vectors for the rescoring, only their index is quantized
+        return StorageTypeEnums.HALFVEC.value if storage_type == StorageTypeEnums.HALFVEC.value \
+            else StorageTypeEnums.VECTOR.value
+
     async def create_collection(self, collection_name: str,
                                 embedding_dim: int,
-                                do_reset: bool = False):
+                                do_reset: bool = False,
+                                storage_type: str = None):
+
+        storage_type = storage_type or self.storage_type
+        if storage_type not in [e.value for e in StorageTypeEnums]:
+            raise ValueError(f'Invalid storage type: {storage_type}')
+
         if do_reset:
             self.logger.info(f'Reseting {collection_name}')
             _ = await self.delete_collection(collection_name=collection_name)
         is_collection_exist = await self.is_collection_exist(collection_name=collection_name)
         if not is_collection_exist:
             self.logger.info(
-                f'Creating collection {collection_name} with embedding dimension {embedding_dim}')
+                f'Creating collection {collection_name} with embedding dimension {embedding_dim} and storage type {storage_type}')
             async with self.db_client() as session:
                 async with session.begin():
                     create_table_query = sql_text(
                         f'CREATE TABLE "{collection_name}" ('
                         f'{PGVectorTableSchemaEnums.ID.value} bigserial PRIMARY KEY, '
-                        f'{PGVectorTableSchemaEnums.VECTOR.value} vector({embedding_dim}), '
+                        f'{PGVectorTableSchemaEnums.VECTOR.value} {self.get_vector_type(storage_type)}({embedding_dim}), '
                         f'{PGVectorTableSchemaEnums.TEXT.value} text, '
                         f'{PGVectorTableSchemaEnums.METADATA.value} jsonb DEFAULT \'{{}}\', '
                         f'{PGVectorTableSchemaEnums.CHUNK_ID.value} integer, '
+                        + (
+                            f'{PGVectorTableSchemaEnums.TEXT_SEARCH.value} tsvector GENERATED ALWAYS AS '
+                            f'(to_tsvector(\'{self.text_search_config}\', coalesce({PGVectorTableSchemaEnums.TEXT.value}, \'\'))) STORED, '
+                            if self.hybrid_search else ''
+                        ) +
                         f'foreign key ({PGVectorTableSchemaEnums.CHUNK_ID.value}) references chunks(chunk_id)'
                         ')'
                     )
                     await session.execute(create_table_query)
+                    await self.create_metadata_index(session=session, collection_name=collection_name)
+                    if self.hybrid_search:
+                        await session.execute(sql_text(
+                            f'CREATE INDEX {self.get_text_search_index_name(collection_name=collection_name)} '
+                            f'ON {collection_name} USING gin ({PGVectorTableSchemaEnums.TEXT_SEARCH.value})'
+                        ))
+                    # The storage type is kept with the table, so the index and the searches of every worker use it
+                    await session.execute(sql_text(
+                        f'COMMENT ON TABLE "{collection_name}" IS \'{storage_type}\''
+                    ))
                 await session.commit()
+            self.collection_registry.set(
+                collection_name=collection_name,
+                is_exist=True,
+                embedding_dim=embedding_dim,
+                has_index=False,
+                storage_type=storage_type,
+                has_text_search=self.hybrid_search
+            )
             return True
 
+    async def create_metadata_index(self, session, collection_name: str):
+        # jsonb_path_ops serves the @> containment of the metadata filters
+        await session.execute(sql_text(
+            f'CREATE INDEX IF NOT EXISTS {self.get_metadata_index_name(collection_name=collection_name)} '
+            f'ON {collection_name} USING gin ({PGVectorTableSchemaEnums.METADATA.value} jsonb_path_ops)'
+        ))
+
     async def is_index_existed(self, collection_name: str):
-        index_name = self.get_index_name(collection_name=collection_name)
-        async with self.db_client() as session:
-            async with session.begin():
-                check_index_occurence = sql_text(
-                    f"SELECT 1 FROM pg_indexes WHERE indexname = :index_name AND tablename = :collection_name"
-                )
-                result = await session.execute(check_index_occurence, {"index_name": index_name, "collection_name": collection_name})
-                check_result = result.scalar_one_or_none()
-                return bool(check_result)
+        state = await self.get_collection_state(collection_name=collection_name)
+        return state['has_index']
 
     async def reset_vector_index(self,
                                  collection_name: str,
-                                 indexing_type: str = PGVectorIndexingEnums.HNSW.value):
+                                 indexing_type: str = None,
+                                 index_params: dict = None):
 
         index_name = self.get_index_name(collection_name=collection_name)
 
@@ -165,17 +295,76 @@ class PGVectorProvider(VectorDBInterface):
 
             await session.commit()
 
-        return await self.create_vector_index(collection_name=collection_name, indexing_type=indexing_type)
+        self.collection_registry.update(collection_name, has_index=False)
+
+        return await self.create_vector_index(collection_name=collection_name,
+                                              indexing_type=indexing_type,
+                                              index_params=index_params)
+
+    def get_index_build_options(self, indexing_type: str, row_count: int, index_params: dict = None):
+        '''
+        This method returns the WITH (...) options of the index and the SET LOCAL statements of its build
+        The values are validated here because they are written into the SQL (DDL can't take bind parameters)
+        '''
+        params = {**self.index_params, **(index_params or {})}
+
+        if indexing_type == PGVectorIndexingEnums.IVFFLAT.value:
+            # pgvector guideline: rows / 1000 lists up to 1M rows, sqrt(rows) above
+            lists = params.get('lists') or (
+                max(1, row_count // 1000) if row_count <= 1_000_000 else int(math.sqrt(row_count))
+            )
+            with_options = {'lists': int(lists)}
+        else:
+            with_options = {
+                key: int(params[key])
+                for key in ('m', 'ef_construction')
+                if params.get(key)
+            }
+
+        settings = []
+        maintenance_work_mem = params.get('maintenance_work_mem')
+        if maintenance_work_mem:
+            if not re.fullmatch(r'\d+\s*(kB|MB|GB)?', str(maintenance_work_mem)):
+                raise ValueError(f'Invalid maintenance_work_mem: {maintenance_work_mem}')
+            settings.append(f"SET LOCAL maintenance_work_mem = '{maintenance_work_mem}'")
+
+        if params.get('max_parallel_maintenance_workers') is not None:
+            settings.append(
+                f"SET LOCAL max_parallel_maintenance_workers = {int(params['max_parallel_maintenance_workers'])}")
+
+        return with_options, settings
+
+    def get_index_target(self, storage_type: str, embedding_dim: int):
+        '''
+        This method returns the indexed expression with its operator class,
+        halfvec uses the halfvec opclass of the distance, bit indexes the binary quantized vector by hamming distance
+        '''
+        if storage_type == StorageTypeEnums.BIT.value:
+            return f'({self.get_quantized_vector(PGVectorTableSchemaEnums.VECTOR.value, embedding_dim)}) bit_hamming_ops'
+
+        if storage_type == StorageTypeEnums.HALFVEC.value:
+            return f'{PGVectorTableSchemaEnums.VECTOR.value} {self.distance_method.replace("vector_", "halfvec_", 1)}'
+
+        return f'{PGVectorTableSchemaEnums.VECTOR.value} {self.distance_method}'
+
+    @staticmethod
+    def get_quantized_vector(vector_expression: str, embedding_dim: int):
+        return f'CAST(binary_quantize({vector_expression}) AS bit({embedding_dim}))'
 
     async def create_vector_index(self,
                                   collection_name: str,
-                                  indexing_type: str = PGVectorIndexingEnums.HNSW.value):
+                                  indexing_type: str = None,
+                                  index_params: dict = None):
 
         is_index_existed = await self.is_index_existed(collection_name=collection_name)
 
         if is_index_existed:
             return False
 
+        indexing_type = indexing_type or self.index_type
+
+        state = await self.get_collection_state(collection_name=collection_name)
+
         async with self.db_client() as session:
             async with session.begin():
 
@@ -192,18 +381,38 @@ class PGVectorProvider(VectorDBInterface):
                 index_name = self.get_index_name(
                     collection_name=collection_name)
 
+                with_options, settings = self.get_index_build_options(
+                    indexing_type=indexing_type,
+                    row_count=row_count,
+                    index_params=index_params
+                )
+
                 self.logger.info(
-                    f"Starting vector index creation: index='{index_name}', table='{collection_name}', type='{indexing_type}, distance-method={self.distance_method}'")
+                    f"Starting vector index creation: index='{index_name}', table='{collection_name}', type='{indexing_type}, distance-method={self.distance_method}', storage-type={state['storage_type']}, options={with_options}")
+
+                for setting in settings:
+                    await session.execute(sql_text(setting))
+
+                # Collections created before the metadata filters get their metadata index with the vector index
+                await self.create_metadata_index(session=session, collection_name=collection_name)
+
+                with_clause = ''
+                if with_options:
+                    with_clause = 'WITH (' + ', '.join(
+                        f'{key} = {value}' for key, value in with_options.items()) + ')'
 
                 create_index_query = sql_text(
                     f'CREATE INDEX {index_name} ON {collection_name} USING {indexing_type} '
-                    f'({PGVectorTableSchemaEnums.VECTOR.value} {self.distance_method}) '
+                    f'({self.get_index_target(state["storage_type"], state["embedding_dim"])}) '
+                    f'{with_clause}'
                 )
 
                 await session.execute(create_index_query)
 
             await session.commit()
 
+        self.collection_registry.update(collection_name, has_index=True)
+
         self.logger.info(
             f"Successfully finished vector index creation: index='{index_name}', table='{collection_name}', type='{indexing_type}, distance-method={self.distance_method}'")
 
@@ -214,7 +423,8 @@ class PGVectorProvider(VectorDBInterface):
                          vector: List,
                          text: str,
                          metadata: str = None,
-                         vector_id: str = None):
+                         vector_id: str = None,
+                         build_index: bool = True):
         is_collection_exists = await self.is_collection_exist(collection_name=collection_name)
         if not is_collection_exists:
             self.logger.info(
@@ -248,16 +458,23 @@ class PGVectorProvider(VectorDBInterface):
             self.logger.info(
                 f'Successfully inserted one document into {collection_name}')
 
-        _ = await self.create_vector_index(collection_name=collection_name)
+        if build_index:
+            _ = await self.create_vector_index(collection_name=collection_name)
 
         return True
 
     async def insert_batch(self,
                            collection_name: str, vectors: List,
                            texts: List, metadata: List = None,
-                           vector_ids: List = None, batch_size: int = 80):
-        is_collection_exists = await self.is_collection_exist(collection_name=collection_name)
-        if not is_collection_exists:
+                           vector_ids: List = None, batch_size: int = 80,
+                           build_index: bool = True, asset_ids: List = None):
+        '''
+        asset_ids are not stored, the asset filters of the searches go through the chunks table
+        Bulk loads pass build_index=False and call create_vector_index once at the end,
+        so the rows are not inserted into a freshly built HNSW graph batch after batch
+        '''
+        state = await self.get_collection_state(collection_name=collection_name)
+        if not state['is_exist']:
             self.logger.info(
                 f'Can\'t insert to non-existed collection : {collection_name}')
             return False
@@ -270,80 +487,449 @@ class PGVectorProvider(VectorDBInterface):
         elif len(metadata) < len(texts):
             diff = len(texts)-len(metadata)
             metadata.extend([None]*diff)
-        async with self.db_client() as session:
-            async with session.begin():
-                for i in range(0, len(texts), batch_size):
-                    batch_vectors = vectors[i:i+batch_size]
-                    batch_texts = texts[i:i+batch_size]
-                    batch_vector_ids = vector_ids[i:i+batch_size]
-                    batch_metadata = metadata[i:i+batch_size]
-                    values = []
-                    for _vector_ids, _text, _vector, _metadata in zip(batch_vector_ids, batch_texts, batch_vectors, batch_metadata):
-
-                        metadata_json = json.dumps(
-                            {'metadata': _metadata}, ensure_ascii=False) if _metadata else '{}'
-                        values.append(
-                            {
-                                'text': _text,
-                                'vector': '[' + ', '.join([str(v) for v in _vector]) + ']',
-                                'metadata': metadata_json,
-                                'vector_id': _vector_ids
-                            }
+        if self.use_copy:
+            await self.copy_batch(collection_name=collection_name, vectors=vectors,
+                                  texts=texts, metadata=metadata,
+                                  vector_ids=vector_ids, batch_size=batch_size,
+                                  vector_type=self.get_vector_type(state['storage_type']))
+        else:
+            async with self.db_client() as session:
+                async with session.begin():
+                    for i in range(0, len(texts), batch_size):
+                        batch_vectors = vectors[i:i+batch_size]
+                        batch_texts = texts[i:i+batch_size]
+                        batch_vector_ids = vector_ids[i:i+batch_size]
+                        batch_metadata = metadata[i:i+batch_size]
+                        values = []
+                        for _vector_ids, _text, _vector, _metadata in zip(batch_vector_ids, batch_texts, batch_vectors, batch_metadata):
+
+                            metadata_json = json.dumps(
+                                {'metadata': _metadata}, ensure_ascii=False) if _metadata else '{}'
+                            values.append(
+                                {
+                                    'text': _text,
+                                    'vector': '[' + ', '.join([str(v) for v in _vector]) + ']',
+                                    'metadata': metadata_json,
+                                    'vector_id': _vector_ids
+                                }
+                            )
+                        batch_insert_query = sql_text(
+                            f'INSERT INTO "{collection_name}" '
+                            f'({PGVectorTableSchemaEnums.TEXT.value}, '
+                            f'{PGVectorTableSchemaEnums.VECTOR.value}, '
+                            f'{PGVectorTableSchemaEnums.METADATA.value}, '
+                            f'{PGVectorTableSchemaEnums.CHUNK_ID.value}) '
+                            'VALUES (:text, :vector, :metadata, :vector_id)'
                         )
-                    batch_insert_query = sql_text(
-                        f'INSERT INTO "{collection_name}" '
-                        f'({PGVectorTableSchemaEnums.TEXT.value}, '
-                        f'{PGVectorTableSchemaEnums.VECTOR.value}, '
-                        f'{PGVectorTableSchemaEnums.METADATA.value}, '
-                        f'{PGVectorTableSchemaEnums.CHUNK_ID.value}) '
-                        'VALUES (:text, :vector, :metadata, :vector_id)'
-                    )
-                    batch_insert_result = await session.execute(
-                        batch_insert_query,
-                        values
-                    )
-            await session.commit()
+                        batch_insert_result = await session.execute(
+                            batch_insert_query,
+                            values
+                        )
+                await session.commit()
 
-        _ = await self.create_vector_index(collection_name=collection_name)
+        if build_index:
+            _ = await self.create_vector_index(collection_name=collection_name)
         return True
 
-    async def search_by_vector(self,
-                               vector: List,
-                               collection_name: str,
-                               top_k: int) -> List[RetrievedDocument]:
+    # Binary COPY format: signature, flags and header extension length, then the rows, then -1 as trailer
+    COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+    COPY_TRAILER = struct.pack('>h', -1)
+    COPY_NULL = struct.pack('>i', -1)
+
+    @staticmethod
+    def encode_copy_field(value: bytes):
+        if value is None:
+            return PGVectorProvider.COPY_NULL
+        return struct.pack('>i', len(value)) + value
+
+    @staticmethod
+    def encode_vector(vector: List, vector_type: str = StorageTypeEnums.VECTOR.value):
+        '''
+        This method returns the binary form of a pgvector vector: dimension (int16), unused (int16),
+        then the float32 (float16 for halfvec) values in network byte order, the floats are never turned into strings
+        '''
+        if vector_type == StorageTypeEnums.HALFVEC.value:
+            return struct.pack(f'>HH{len(vector)}e', len(vector), 0, *vector)
+
+        values = array('f', vector)
+        if sys.byteorder == 'little':
+            values.byteswap()
+        return struct.pack('>HH', len(values), 0) + values.tobytes()
+
+    def encode_copy_rows(self, vectors: List, texts: List, metadata: List, vector_ids: List,
+                         vector_type: str = StorageTypeEnums.VECTOR.value):
+
+        rows = []
+        for _vector_id, _text, _vector, _metadata in zip(vector_ids, texts, vectors, metadata):
+
+            metadata_json = json.dumps(
+                {'metadata': _metadata}, ensure_ascii=False) if _metadata else '{}'
+
+            rows.append(
+                struct.pack('>h', 4)
+                + self.encode_copy_field(_text.encode('utf-8') if _text is not None else None)
+                + self.encode_copy_field(self.encode_vector(_vector, vector_type))
+                # jsonb binary format: version 1 followed by the json text
+                + self.encode_copy_field(b'\x01' + metadata_json.encode('utf-8'))
+                + self.encode_copy_field(struct.pack('>i', int(_vector_id)) if _vector_id is not None else None)
+            )
+
+        return b''.join(rows)
+
+    async def copy_batch(self,
+                         collection_name: str, vectors: List,
+                         texts: List, metadata: List,
+                         vector_ids: List, batch_size: int = 80,
+                         vector_type: str = StorageTypeEnums.VECTOR.value):
+        '''
+        This method loads the rows with COPY ... FROM STDIN (FORMAT BINARY) on the psycopg connection of the session,
+        the rows are encoded and written batch_size at a time so a large batch is not held twice in memory
+        '''
+        copy_query = (
+            f'COPY "{collection_name}" '
+            f'({PGVectorTableSchemaEnums.TEXT.value}, '
+            f'{PGVectorTableSchemaEnums.VECTOR.value}, '
+            f'{PGVectorTableSchemaEnums.METADATA.value}, '
+            f'{PGVectorTableSchemaEnums.CHUNK_ID.value}) '
+            'FROM STDIN WITH (FORMAT BINARY)'
+        )
 
-        is_collection_exists = await self.is_collection_exist(collection_name=collection_name)
+        async with self.db_client() as session:
+            async with session.begin():
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+
+                async with raw_connection.driver_connection.cursor() as cursor:
+                    async with cursor.copy(copy_query) as copy:
+                        await copy.write(self.COPY_HEADER)
+                        for i in range(0, len(texts), batch_size):
+                            await copy.write(self.encode_copy_rows(
+                                vectors=vectors[i:i+batch_size],
+                                texts=texts[i:i+batch_size],
+                                metadata=metadata[i:i+batch_size],
+                                vector_ids=vector_ids[i:i+batch_size],
+                                vector_type=vector_type
+                            ))
+                        await copy.write(self.COPY_TRAILER)
+            await session.commit()
 
+    async def delete_by_vector_ids(self, collection_name: str, vector_ids: List):
+        is_collection_exists = await self.is_collection_exist(collection_name=collection_name)
         if not is_collection_exists:
-            self.logger.info(
-                f"Can't search on non-existed collection : {collection_name}")
             return False
+        async with self.db_client() as session:
+            async with session.begin():
+                delete_query = sql_text(
+                    f'DELETE FROM "{collection_name}" '
+                    f'WHERE {PGVectorTableSchemaEnums.CHUNK_ID.value} = ANY(:vector_ids)'
+                )
+                await session.execute(delete_query, {'vector_ids': list(vector_ids)})
+            await session.commit()
+        return True
 
-        str_query_vector = '[' + ', '.join([str(v) for v in vector]) + ']'
+    def get_search_settings(self, top_k: int, search_params: dict = None, is_filtered: bool = False):
+        '''
+        This method returns the SET LOCAL statements of a search, hnsw returns at most ef_search rows
+        so it is raised to top_k when it is set lower
+        A filtered search enables the iterative index scans, without them the index returns ef_search (or probes lists)
+        candidates and the filters can leave less than top_k of them
+        '''
+        params = {**self.search_params, **(search_params or {})}
+
+        settings = []
+        if params.get('ef_search'):
+            settings.append(f"SET LOCAL hnsw.ef_search = {max(int(params['ef_search']), top_k)}")
+        if params.get('probes'):
+            settings.append(f"SET LOCAL ivfflat.probes = {int(params['probes'])}")
+
+        iterative_scan = params.get('iterative_scan')
+        if iterative_scan and iterative_scan not in ('off', 'relaxed_order', 'strict_order'):
+            raise ValueError(f'Invalid iterative_scan: {iterative_scan}')
+
+        # off sets nothing, the parameters do not exist before pgvector 0.8
+        if is_filtered and iterative_scan and iterative_scan != 'off':
+            # The candidates are ordered again by the exact distance, relaxed_order is enough
+            settings.append(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}")
+            # ivfflat only has relaxed_order
+            settings.append("SET LOCAL ivfflat.iterative_scan = relaxed_order")
+
+        return settings
+
+    def get_filters_conditions(self, filters: dict = None):
+        '''
+        This method returns the WHERE conditions of the search filters and their parameters
+        - min_chunk_id / max_chunk_id: range of the chunk ids
+        - asset_ids: the chunks of these assets, through the chunks table
+        - metadata: values of the chunk metadata keys, @> containment served by the GIN index of the metadata
+        '''
+        if not filters:
+            return [], {}
+
+        conditions, params = [], {}
+
+        if filters.get('min_chunk_id') is not None:
+            conditions.append(f'{PGVectorTableSchemaEnums.CHUNK_ID.value} >= :min_chunk_id')
+            params['min_chunk_id'] = int(filters['min_chunk_id'])
+
+        if filters.get('max_chunk_id') is not None:
+            conditions.append(f'{PGVectorTableSchemaEnums.CHUNK_ID.value} <= :max_chunk_id')
+            params['max_chunk_id'] = int(filters['max_chunk_id'])
+
+        if filters.get('asset_ids'):
+            conditions.append(
+                f'{PGVectorTableSchemaEnums.CHUNK_ID.value} IN '
+                f'(SELECT chunk_id FROM chunks WHERE chunk_asset_id = ANY(:asset_ids))'
+            )
+            params['asset_ids'] = [int(asset_id) for asset_id in filters['asset_ids']]
+
+        if filters.get('metadata'):
+            # The chunk metadata is stored under the metadata key of the column
+            conditions.append(f'{PGVectorTableSchemaEnums.METADATA.value} @> CAST(:metadata_filter AS jsonb)')
+            params['metadata_filter'] = json.dumps({'metadata': filters['metadata']}, ensure_ascii=False)
+
+        return conditions, params
+
+    def get_candidates_count(self, storage_type: str, top_k: int, search_params: dict = None):
+        # The hamming distance of the binary vectors is coarse, more candidates than top_k are rescored
+        if storage_type != StorageTypeEnums.BIT.value:
+            return top_k
+
+        params = {**self.search_params, **(search_params or {})}
+        return top_k * max(1, int(params.get('rescore_factor') or 1))
+
+    def get_vector_search_query(self, collection_name: str, state: dict, conditions: List[str],
+                                query_vector: str = None):
+        '''
+        This method returns the query of the nearest rows: the candidates are ordered by the indexed expression
+        with the operator of its opclass, so the planner can use the index, then they are ranked again by the exact distance
+        (the rescoring of the bit collections)
+        query_vector is the SQL expression of the query vector, the :vector parameter by default
+        '''
+        query_vector = query_vector or f'CAST(:vector AS {self.get_vector_type(state["storage_type"])})'
+
+        if state['storage_type'] == StorageTypeEnums.BIT.value:
+            candidates_order = (
+                f'{self.get_quantized_vector(PGVectorTableSchemaEnums.VECTOR.value, state["embedding_dim"])} <~> '
+                f'binary_quantize({query_vector})'
+            )
+        else:
+            candidates_order = f'{PGVectorTableSchemaEnums.VECTOR.value} {self.distance_operator} {query_vector}'
+
+        where_clause = ('WHERE ' + ' AND '.join(conditions) + ' ') if conditions else ''
+
+        return (
+            f'SELECT id, text, metadata, chunk_id, '
+            f'1 - ({PGVectorTableSchemaEnums.VECTOR.value} <=> {query_vector}) as score, '
+            f'ROW_NUMBER() OVER (ORDER BY {PGVectorTableSchemaEnums.VECTOR.value} {self.distance_operator} {query_vector}) as rank '
+            f'FROM ('
+            f'SELECT {PGVectorTableSchemaEnums.ID.value} as id, {PGVectorTableSchemaEnums.TEXT.value} as text, '
+            f'{PGVectorTableSchemaEnums.METADATA.value} as metadata, '
+            f'{PGVectorTableSchemaEnums.CHUNK_ID.value} as chunk_id, {PGVectorTableSchemaEnums.VECTOR.value} '
+            f'FROM {collection_name} '
+            f'{where_clause}'
+            f'ORDER BY {candidates_order} '
+            f'LIMIT :candidates_count'
+            f') candidates '
+            f'ORDER BY {PGVectorTableSchemaEnums.VECTOR.value} {self.distance_operator} {query_vector} '
+            f'LIMIT :vector_count'
+        )
+
+    def get_hybrid_search_query(self, collection_name: str, vector_search_query: str, conditions: List[str],
+                                query_text: str = ':query_text'):
+        '''
+        This method returns the hybrid query, it runs the vector search and the full-text search in one statement
+        and merges them with the reciprocal rank fusion: score = sum of 1 / (rrf_k + rank) over the searches that found the row
+        The searches are subqueries (not CTEs), so the query can also run inside the LATERAL join of the batch search
+        '''
+        where_clause = 'WHERE ' + ' AND '.join(
+            [f'{PGVectorTableSchemaEnums.TEXT_SEARCH.value} @@ text_query.query'] + conditions) + ' '
+
+        text_search_query = (
+            f'SELECT {PGVectorTableSchemaEnums.ID.value} as id, ROW_NUMBER() OVER ('
+            f'ORDER BY ts_rank_cd({PGVectorTableSchemaEnums.TEXT_SEARCH.value}, text_query.query) DESC) as rank '
+            f'FROM {collection_name}, websearch_to_tsquery(CAST(:text_search_config AS regconfig), {query_text}) AS text_query(query) '
+            f'{where_clause}'
+            f'ORDER BY ts_rank_cd({PGVectorTableSchemaEnums.TEXT_SEARCH.value}, text_query.query) DESC '
+            f'LIMIT :text_count'
+        )
+
+        return (
+            f'SELECT c.{PGVectorTableSchemaEnums.TEXT.value} as text, c.{PGVectorTableSchemaEnums.METADATA.value} as metadata, '
+            f'c.{PGVectorTableSchemaEnums.CHUNK_ID.value} as chunk_id, fused.score as score, '
+            f'ROW_NUMBER() OVER (ORDER BY fused.score DESC) as rank '
+            f'FROM ('
+            f'SELECT id, CAST(SUM(1.0 / (:rrf_k + rank)) AS double precision) as score FROM ('
+            f'SELECT id, rank FROM ({vector_search_query}) vector_ranks '
+            f'UNION ALL '
+            f'SELECT id, rank FROM ({text_search_query}) text_ranks'
+            f') ranks GROUP BY id ORDER BY score DESC LIMIT :top_k'
+            f') fused '
+            f'JOIN {collection_name} c ON c.{PGVectorTableSchemaEnums.ID.value} = fused.id '
+            f'ORDER BY fused.score DESC'
+        )
+
+    def get_search_plan(self, state: dict, top_k: int, search_params: dict = None,
+                        filters: dict = None, has_text: bool = False):
+        '''
+        This method returns whether the search is hybrid, the filters conditions and the parameters shared by the queries
+        The hybrid search runs when it is enabled, the collection has its text_search column and the query text is given
+        '''
+        params = {**self.search_params, **(search_params or {})}
+        is_hybrid = has_text and state['has_text_search'] and bool(params.get('hybrid', self.hybrid_search))
+
+        # The hybrid search takes more rows from each search, the fusion keeps top_k of them
+        vector_count = top_k * max(1, int(params.get('hybrid_candidates_factor') or 1)) if is_hybrid else top_k
+        candidates_count = self.get_candidates_count(storage_type=state['storage_type'], top_k=vector_count,
+                                                     search_params=search_params)
+        conditions, filters_params = self.get_filters_conditions(filters=filters)
+
+        query_params = {
+            'candidates_count': candidates_count,
+            'vector_count': vector_count,
+            **filters_params
+        }
+        if is_hybrid:
+            query_params.update({
+                'text_search_config': self.text_search_config,
+                'text_count': vector_count,
+                'rrf_k': int(params.get('rrf_k') or 60),
+                'top_k': top_k
+            })
+
+        return is_hybrid, conditions, candidates_count, query_params
+
+    async def execute_search(self, collection_name: str, search_query: str, query_params: dict,
+                             candidates_count: int, search_params: dict = None, is_filtered: bool = False):
 
         async with self.db_client() as session:
             async with session.begin():
 
-                search_query = sql_text(
-                    f'SELECT {PGVectorTableSchemaEnums.TEXT.value} as text, {PGVectorTableSchemaEnums.METADATA.value} as metadata ,1-({PGVectorTableSchemaEnums.VECTOR.value} <=> :vector) as score '
-                    f'FROM {collection_name} '
-                    f'ORDER BY score DESC '
-                    f'LIMIT {top_k}'
-                )
+                try:
+                    for setting in self.get_search_settings(top_k=candidates_count, search_params=search_params,
+                                                            is_filtered=is_filtered):
+                        await session.execute(sql_text(setting))
 
-                search_results = await session.execute(
-                    search_query,
-                    {
-                        'vector': str_query_vector
-                    }
+                    search_results = await session.execute(
+                        sql_text(search_query),
+                        query_params
+                    )
+                except Exception:
+                    # The cached state may be stale (the collection was dropped by another process), it is read again next time
+                    self.collection_registry.invalidate(collection_name)
+                    raise
+
+                return search_results.fetchall()
+
+    async def search_by_vector(self,
+                               vector: List,
+                               collection_name: str,
+                               top_k: int,
+                               search_params: dict = None,
+                               filters: dict = None,
+                               text: str = None) -> List[RetrievedDocument]:
+        '''
+        In the hybrid search the score is the fused rank score instead of the cosine similarity
+        '''
+        state = await self.get_collection_state(collection_name=collection_name)
+
+        if not state['is_exist']:
+            self.logger.info(
+                f"Can't search on non-existed collection : {collection_name}")
+            return False
+
+        is_hybrid, conditions, candidates_count, query_params = self.get_search_plan(
+            state=state, top_k=top_k, search_params=search_params, filters=filters, has_text=bool(text))
+
+        query_params['vector'] = '[' + ', '.join([str(v) for v in vector]) + ']'
+
+        search_query = self.get_vector_search_query(collection_name=collection_name, state=state,
+                                                    conditions=conditions)
+        if is_hybrid:
+            search_query = self.get_hybrid_search_query(collection_name=collection_name,
+                                                        vector_search_query=search_query,
+                                                        conditions=conditions)
+            query_params['query_text'] = text
+
+        all_results = await self.execute_search(collection_name=collection_name, search_query=search_query,
+                                                query_params=query_params, candidates_count=candidates_count,
+                                                search_params=search_params, is_filtered=bool(conditions))
+
+        return [
+            RetrievedDocument(
+                text=record.text,
+                score=record.score,
+                metadata=record.metadata,
+                chunk_id=record.chunk_id
+            )
+            for record in all_results
+        ]
+
+    async def search_by_vector_batch(self,
+                                     vectors: List,
+                                     collection_name: str,
+                                     top_k: int,
+                                     search_params: dict = None,
+                                     filters: dict = None,
+                                     texts: List[str] = None) -> List[List[RetrievedDocument]]:
+        '''
+        This method searches many query vectors in one statement: the query array is unnested WITH ORDINALITY
+        and the search of search_by_vector runs for every query in a LATERAL join
+        It returns the results of every query, in the order of the vectors, or None when the collection does not exist
+        '''
+        state = await self.get_collection_state(collection_name=collection_name)
+
+        if not state['is_exist']:
+            self.logger.info(
+                f"Can't search on non-existed collection : {collection_name}")
+            return None
+
+        is_hybrid, conditions, candidates_count, query_params = self.get_search_plan(
+            state=state, top_k=top_k, search_params=search_params, filters=filters, has_text=bool(texts))
+
+        vector_type = self.get_vector_type(state['storage_type'])
+        query_params['vectors'] = [
+            '[' + ', '.join([str(v) for v in vector]) + ']'
+            for vector in vectors
+        ]
+
+        search_query = self.get_vector_search_query(collection_name=collection_name, state=state,
+                                                    conditions=conditions, query_vector='queries.query_vector')
+        if is_hybrid:
+            search_query = self.get_hybrid_search_query(collection_name=collection_name,
+                                                        vector_search_query=search_query,
+                                                        conditions=conditions,
+                                                        query_text='queries.query_text')
+            query_params['texts'] = list(texts)
+            queries = (
+                f'unnest(CAST(:vectors AS {vector_type}[]), CAST(:texts AS text[])) '
+                f'WITH ORDINALITY AS queries(query_vector, query_text, query_idx)'
+            )
+        else:
+            queries = (
+                f'unnest(CAST(:vectors AS {vector_type}[])) '
+                f'WITH ORDINALITY AS queries(query_vector, query_idx)'
+            )
+
+        batch_search_query = (
+            f'SELECT queries.query_idx, results.text, results.metadata, results.chunk_id, results.score '
+            f'FROM {queries} '
+            f'CROSS JOIN LATERAL ({search_query}) results '
+            f'ORDER BY queries.query_idx, results.rank'
+        )
+
+        all_results = await self.execute_search(collection_name=collection_name, search_query=batch_search_query,
+                                                query_params=query_params, candidates_count=candidates_count,
+                                                search_params=search_params, is_filtered=bool(conditions))
+
+        results = [[] for _ in vectors]
+        for record in all_results:
+            results[record.query_idx - 1].append(
+                RetrievedDocument(
+                    text=record.text,
+                    score=record.score,
+                    metadata=record.metadata,
+                    chunk_id=record.chunk_id
                 )
-                all_results = search_results.fetchall()
+            )
 
-                return [
-                    RetrievedDocument(
-                        text=record.text,
-                        score=record.score,
-                        metadata=record.metadata
-                    )
-                    for record in all_results
-                ]
+        return results
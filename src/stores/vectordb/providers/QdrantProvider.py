@@ -1,7 +1,10 @@
 from ..VectorDBInterface import VectorDBInterface
-from ..VectorDBEnums import VectorDBEnums, DistanceTypeEnums
+from ..VectorDBEnums import VectorDBEnums, DistanceTypeEnums, StorageTypeEnums
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Record
+from qdrant_client.models import (Distance, VectorParams, PointStruct, Record, PointIdsList, SearchParams,
+                                  Datatype, BinaryQuantization, BinaryQuantizationConfig, QuantizationSearchParams,
+                                  Filter, FieldCondition, MatchValue, MatchAny, Range, PayloadSchemaType,
+                                  SearchRequest)
 from logging import getLogger
 
 from models.db_schemas import RetrievedDocument
@@ -16,7 +19,9 @@ class QdrantProvider(VectorDBInterface):
                  db_client: str, 
                  distance_method: str,
                  embedding_size: int = 768,
-                 index_threshold: int = 100):
+                 index_threshold: int = 100,
+                 storage_type: str = StorageTypeEnums.VECTOR.value,
+                 rescore_factor: int = 4):
 
         self.client = None
 
@@ -26,6 +31,9 @@ class QdrantProvider(VectorDBInterface):
 
         self.embedding_size=embedding_size
 
+        self.storage_type = storage_type
+        self.rescore_factor = rescore_factor
+
         if distance_method == DistanceTypeEnums.COSINE.value:
             self.distance_method = Distance.COSINE
         elif distance_method == DistanceTypeEnums.DOT.value:
@@ -49,12 +57,17 @@ class QdrantProvider(VectorDBInterface):
         return self.client.get_collection(collection_name=collection_name)
 
     async def delete_collection(self, collection_name: str):
-        if self.is_collection_exist(collection_name=collection_name):
+        if await self.is_collection_exist(collection_name=collection_name):
             return self.client.delete_collection(collection_name=collection_name)
 
     async def create_collection(self, collection_name: str,
                                 embedding_dim: int,
-                                do_reset: bool = False):
+                                do_reset: bool = False,
+                                storage_type: str = None):
+
+        storage_type = storage_type or self.storage_type
+        if storage_type not in [e.value for e in StorageTypeEnums]:
+            raise ValueError(f'Invalid storage type: {storage_type}')
 
         if do_reset:
             self.logger.info(f"Reset flag is True. Deleting collection '{collection_name}' if it exists.")
@@ -67,9 +80,23 @@ class QdrantProvider(VectorDBInterface):
                 collection_name=collection_name,
                 vectors_config=VectorParams(
                     size=embedding_dim,
-                    distance=self.distance_method
+                    distance=self.distance_method,
+                    datatype=Datatype.FLOAT16 if storage_type == StorageTypeEnums.HALFVEC.value else None
                 ),
+                # Qdrant keeps the original vectors and rescores the candidates of the quantized index itself
+                quantization_config=BinaryQuantization(
+                    binary=BinaryQuantizationConfig(always_ram=True)
+                ) if storage_type == StorageTypeEnums.BIT.value else None
             )
+            # The payload indexes of the search filters, the metadata keys are filtered without an index
+            for field_name, field_schema in [('chunk_id', PayloadSchemaType.INTEGER),
+                                             ('asset_id', PayloadSchemaType.INTEGER),
+                                             ('metadata.source', PayloadSchemaType.KEYWORD)]:
+                _ = self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
             self.logger.info(f"Collection '{collection_name}' created successfully.")
             return True
         else:
@@ -77,9 +104,10 @@ class QdrantProvider(VectorDBInterface):
         return False
 
     async def insert_one(self, collection_name: str, vector: List,
-                         text: str, metadata: str = None, vector_id: str = None):
+                         text: str, metadata: str = None, vector_id: str = None,
+                         build_index: bool = True):
 
-        if not self.is_collection_exist(collection_name=collection_name):
+        if not await self.is_collection_exist(collection_name=collection_name):
             self.logger.error(
                 f'Cannot insert record to non-existing collection: {collection_name}')
             return None
@@ -103,9 +131,10 @@ class QdrantProvider(VectorDBInterface):
         return True
 
     async def insert_batch(self, collection_name: str, vectors: List,
-                           texts: List, metadata: List = None, vector_ids: List = None, batch_size: int = 80):
+                           texts: List, metadata: List = None, vector_ids: List = None, batch_size: int = 80,
+                           build_index: bool = True, asset_ids: List = None):
 
-        if not self.is_collection_exist(collection_name=collection_name):
+        if not await self.is_collection_exist(collection_name=collection_name):
             self.logger.error(
                 f'Cannot insert record to non-existing collection: {collection_name}')
             return None
@@ -116,12 +145,16 @@ class QdrantProvider(VectorDBInterface):
         if not vector_ids:
             vector_ids = list(range(0, len(texts)))
 
+        if not asset_ids:
+            asset_ids = [None] * len(texts)
+
         for i in range(0, len(vectors), batch_size):
 
             vector_batch = vectors[i:i+batch_size]
             text_batch = texts[i:i+batch_size]
             metadata_batch = metadata[i:i+batch_size]
             vector_id_batch = vector_ids[i:i+batch_size]
+            asset_id_batch = asset_ids[i:i+batch_size]
             try:
                 _ = self.client.upload_records(
                     collection_name=collection_name,
@@ -131,7 +164,9 @@ class QdrantProvider(VectorDBInterface):
                             vector=vector_batch[idx],
                             payload={
                                 "text": text_batch[idx],
-                                "metadata": metadata_batch[idx]
+                                "metadata": metadata_batch[idx],
+                                "chunk_id": vector_id_batch[idx],
+                                "asset_id": asset_id_batch[idx]
                             }
                         )
                         for idx in range(len(text_batch))
@@ -141,26 +176,126 @@ class QdrantProvider(VectorDBInterface):
                 self.logger.error(f'Error inserting batch: {e}')
                 return False
 
-            return True
+        return True
 
-    async def search_by_vector(self, vector: list, collection_name: str, top_k: int):
+    async def create_vector_index(self, collection_name: str, indexing_type: str = None, index_params: dict = None):
+        # Qdrant maintains the HNSW index of a collection itself
+        return False
 
-        results = self.client.search(
-            collection_name=collection_name,
-            query_vector=vector,
-            limit=top_k
-        )
+    async def delete_by_vector_ids(self, collection_name: str, vector_ids: List):
 
-        if not results or len(results) == 0:
+        if not await self.is_collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            _ = self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=list(vector_ids))
+            )
+        except Exception as e:
+            self.logger.error(f'Error deleting records: {e}')
+            return False
+        return True
+
+    def get_filter(self, filters: dict = None):
+        '''
+        This method returns the Qdrant filter of the search filters (min_chunk_id, max_chunk_id, asset_ids, metadata),
+        they are matched against the chunk_id, asset_id and metadata payload of the points
+        '''
+        if not filters:
             return None
 
+        conditions = []
+
+        if filters.get('min_chunk_id') is not None or filters.get('max_chunk_id') is not None:
+            conditions.append(FieldCondition(
+                key='chunk_id',
+                range=Range(gte=filters.get('min_chunk_id'), lte=filters.get('max_chunk_id'))
+            ))
+
+        if filters.get('asset_ids'):
+            conditions.append(FieldCondition(
+                key='asset_id',
+                match=MatchAny(any=list(filters['asset_ids']))
+            ))
+
+        for key, value in (filters.get('metadata') or {}).items():
+            conditions.append(FieldCondition(
+                key=f'metadata.{key}',
+                match=MatchValue(value=value)
+            ))
+
+        return Filter(must=conditions) if conditions else None
+
+    def get_search_params(self, top_k: int, search_params: dict = None):
+
+        # ef_search is the hnsw_ef of Qdrant, probes has no equivalent,
+        # rescore_factor is the oversampling of the quantized collections (ignored by the others)
+        search_params = search_params or {}
+        ef_search = search_params.get('ef_search')
+        rescore_factor = search_params.get('rescore_factor') or self.rescore_factor
+
+        return SearchParams(
+            hnsw_ef=max(int(ef_search), top_k) if ef_search else None,
+            quantization=QuantizationSearchParams(rescore=True, oversampling=float(rescore_factor))
+        )
+
+    def to_retrieved_documents(self, results):
         return [
             RetrievedDocument(
                 **{
                     'score': result.score,
                     'text': result.payload['text'],
                     'metadata': result.payload['metadata'],
+                    'chunk_id': result.id,
                 }
             )
             for result in results
         ]
+
+    async def search_by_vector(self, vector: list, collection_name: str, top_k: int,
+                               search_params: dict = None, filters: dict = None,
+                               text: str = None):
+
+        results = self.client.search(
+            collection_name=collection_name,
+            query_vector=vector,
+            limit=top_k,
+            query_filter=self.get_filter(filters=filters),
+            search_params=self.get_search_params(top_k=top_k, search_params=search_params)
+        )
+
+        if not results or len(results) == 0:
+            return None
+
+        return self.to_retrieved_documents(results)
+
+    async def search_by_vector_batch(self, vectors: List, collection_name: str, top_k: int,
+                                     search_params: dict = None, filters: dict = None,
+                                     texts: List[str] = None):
+
+        if not await self.is_collection_exist(collection_name=collection_name):
+            return None
+
+        query_filter = self.get_filter(filters=filters)
+        params = self.get_search_params(top_k=top_k, search_params=search_params)
+
+        # One request for all the queries
+        batch_results = self.client.search_batch(
+            collection_name=collection_name,
+            requests=[
+                SearchRequest(
+                    vector=vector,
+                    limit=top_k,
+                    filter=query_filter,
+                    params=params,
+                    with_payload=True
+                )
+                for vector in vectors
+            ]
+        )
+
+        return [
+            self.to_retrieved_documents(results)
+            for results in batch_results
+        ]
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def run_benchmarks():
+    '''
+    The benchmarks are long and most of them need the PostgreSQL of TEST_POSTGRES_URL,
+    they only run when RUN_BENCHMARKS is set: RUN_BENCHMARKS=1 python -m pytest tests/benchmarks
+    '''
+    if not os.environ.get('RUN_BENCHMARKS'):
+        pytest.skip('RUN_BENCHMARKS is not set')
+
+
+@pytest.fixture
+def benchmark_size():
+    '''
+    The sizes of the benchmarks can be changed with BENCHMARK_<NAME>, e.g. BENCHMARK_ROWS=1000000
+    '''
+    def get_size(name: str, default: int):
+        return int(os.environ.get(f'BENCHMARK_{name}', default))
+
+    return get_size
+
+
+# The tables of the benchmarks that ran, they are written after the tests summary
+REPORTS = []
+
+
+@pytest.fixture
+def report():
+    '''
+    This fixture records the results of a benchmark as a table, the tables are written at the end of the run
+    '''
+    def add_report(title: str, rows: list):
+        REPORTS.append((title, rows))
+
+    return add_report
+
+
+def pytest_terminal_summary(terminalreporter):
+
+    if not REPORTS:
+        return
+
+    terminalreporter.section('benchmarks')
+    for title, rows in REPORTS:
+        columns = list(rows[0])
+        widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+
+        terminalreporter.write_line(title)
+        terminalreporter.write_line('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+        for row in rows:
+            terminalreporter.write_line('  '.join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+        terminalreporter.write_line('')
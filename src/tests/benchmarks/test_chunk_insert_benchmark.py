@@ -0,0 +1,70 @@
+import asyncio
+import random
+import time
+
+
+def make_chunks(count: int, project_id: int, asset_id: int):
+    from models.db_schemas import DataChunk
+
+    rng = random.Random(0)
+    return [
+        DataChunk(
+            chunk_text=' '.join(rng.choice(['alpha', 'beta', 'gamma', 'delta', 'epsilon']) for _ in range(15)),
+            chunk_metadata={'source': 'benchmark.txt', 'page': idx // 50},
+            chunk_order=idx,
+            chunk_project_id=project_id,
+            chunk_asset_id=asset_id
+        )
+        for idx in range(count)
+    ]
+
+
+def test_copy_against_orm_insert(db_client, benchmark_size, report):
+    '''
+    The same chunks are inserted with the COPY path and the ORM path of ChunkModel.insert_many_chunks
+    '''
+    chunks_count = benchmark_size('CHUNKS', 100_000)
+
+    async def scenario():
+        from models import ProjectModel, AssetModel, ChunkModel
+        from models.db_schemas import Project, Asset
+        from models.enums import AssetTypeEnum
+
+        project_model = await ProjectModel.create_instance(db_client=db_client)
+        asset_model = await AssetModel.create_instance(db_client=db_client)
+        chunk_model = await ChunkModel.create_instance(db_client=db_client)
+
+        project = await project_model.create_project(project=Project())
+        asset = await asset_model.create_asset(asset=Asset(
+            asset_project_id=project.project_id,
+            asset_type=AssetTypeEnum.FILE.value,
+            asset_name='benchmark.txt',
+            asset_size=1
+        ))
+
+        rows = []
+        for name, use_copy in [('ORM add_all', False), ('COPY', True)]:
+            chunks = make_chunks(count=chunks_count, project_id=project.project_id, asset_id=asset.asset_id)
+
+            started_at = time.perf_counter()
+            inserted_count = await chunk_model.insert_many_chunks(chunks=chunks, use_copy=use_copy)
+            elapsed = time.perf_counter() - started_at
+
+            assert inserted_count == chunks_count
+            assert await chunk_model.get_total_chunks_count(project_id=project.project_id) == chunks_count
+            if use_copy:
+                # The generated ids are set on the chunks, so they can be indexed right away
+                chunk_ids = {chunk.chunk_id for chunk in chunks}
+                assert None not in chunk_ids and len(chunk_ids) == chunks_count
+
+            _ = await chunk_model.delete_chunks_by_asset_id(asset_id=asset.asset_id)
+
+            rows.append({'path': name, 'seconds': round(elapsed, 2),
+                         'rows/s': round(chunks_count / elapsed)})
+
+        for row in rows:
+            row['speedup'] = round(rows[0]['seconds'] / row['seconds'], 2)
+
+        return rows
+
+    report(f'Chunk inserts: {chunks_count} chunks', asyncio.run(scenario()))
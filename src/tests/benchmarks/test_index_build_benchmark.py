@@ -0,0 +1,67 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+
+COLLECTION_NAME = 'collection_benchmark_index_build'
+
+
+def random_vectors(count: int, dim: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(count)]
+
+
+@pytest.mark.parametrize('index_type', ['hnsw', 'ivfflat'])
+def test_deferred_against_per_batch_index_build(db_client, app_settings, benchmark_size, report, index_type):
+    '''
+    The same vectors are loaded batch by batch like the index push does:
+    - per batch: insert_batch builds the index once the threshold is passed, the later batches maintain it
+    - deferred: insert_batch(build_index=False), then one create_vector_index at the end
+    '''
+    rows_count = benchmark_size('ROWS', 50_000)
+    dim = benchmark_size('DIM', 384)
+    batch_size = app_settings.INDEX_PUSH_PAGE_SIZE
+
+    vectors = random_vectors(rows_count, dim)
+
+    async def load(build_index: bool):
+        from stores.vectordb.providers import PGVectorProvider
+
+        provider = PGVectorProvider(db_client=db_client, distance_method='cosine', embedding_size=dim,
+                                    index_threshold=app_settings.VECTOR_DB_PG_INDEXING_THRESHOLD,
+                                    index_type=index_type)
+        await provider.connect()
+        await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+        try:
+            _ = await provider.create_collection(collection_name=COLLECTION_NAME, embedding_dim=dim)
+
+            started_at = time.perf_counter()
+            for start in range(0, rows_count, batch_size):
+                batch_vectors = vectors[start:start + batch_size]
+                _ = await provider.insert_batch(collection_name=COLLECTION_NAME, vectors=batch_vectors,
+                                                texts=[None] * len(batch_vectors),
+                                                vector_ids=[None] * len(batch_vectors),
+                                                build_index=build_index)
+            loaded_at = time.perf_counter()
+
+            _ = await provider.create_vector_index(collection_name=COLLECTION_NAME)
+            finished_at = time.perf_counter()
+
+            assert await provider.is_index_existed(collection_name=COLLECTION_NAME)
+        finally:
+            await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+        return loaded_at - started_at, finished_at - loaded_at
+
+    rows = []
+    for name, build_index in [('per batch', True), ('deferred', False)]:
+        load_seconds, build_seconds = asyncio.run(load(build_index=build_index))
+        total_seconds = load_seconds + build_seconds
+        rows.append({'index build': name, 'load seconds': round(load_seconds, 2),
+                     'build seconds': round(build_seconds, 2), 'total seconds': round(total_seconds, 2),
+                     'rows/s': round(rows_count / total_seconds)})
+
+    report(f'{index_type} index: {rows_count} vectors of {dim} dimensions in batches of {batch_size}', rows)
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+import asyncio
+import time
+
+import pytest
+
+
+EMBEDDING_SIZE = 16
+
+
+class LatencyEmbeddingModel:
+    '''
+    This class is an embedding provider double that answers every request after a fixed latency
+    '''
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.embedding_model_id = 'benchmark-embedding-model'
+        self.embedding_size = EMBEDDING_SIZE
+        self.max_embedding_batch_size = 96
+        self.default_max_input_characters = 1000
+
+    def process_text(self, texts):
+        return [text[:self.default_max_input_characters].strip() for text in texts]
+
+    async def aget_embedding(self, text, document_type: str = None):
+        await asyncio.sleep(self.latency)
+        return [[float(len(t) % 7)] * EMBEDDING_SIZE for t in text]
+
+
+class LatencyVectorDB:
+    '''
+    This class is a vector database double, every insert takes a fixed latency
+    '''
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.embedding_size = EMBEDDING_SIZE
+        self.inserted_ids = []
+
+    async def create_collection(self, collection_name: str, embedding_dim: int, do_reset: bool = False,
+                                storage_type: str = None):
+        return True
+
+    async def is_collection_exist(self, collection_name: str):
+        return bool(self.inserted_ids)
+
+    async def insert_batch(self, collection_name: str, vectors: list, texts: list, metadata: list = None,
+                           vector_ids: list = None, build_index: bool = True, asset_ids: list = None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.inserted_ids.extend(vector_ids)
+        return True
+
+    async def create_vector_index(self, collection_name: str, indexing_type: str = None, index_params: dict = None):
+        return True
+
+
+async def read_pages(pages_count: int, page_size: int, latency: float):
+    # The keyset pages of the chunks table, every page read takes a fixed latency
+    for page in range(pages_count):
+        await asyncio.sleep(latency)
+        yield [
+            SimpleNamespace(chunk_id=page * page_size + idx + 1, chunk_text=f'chunk {page} {idx}',
+                            chunk_metadata={}, chunk_asset_id=1)
+            for idx in range(page_size)
+        ]
+
+
+def test_pipeline_against_serial_index_push(app_settings, benchmark_size, report):
+
+    nlp_controller_module = pytest.importorskip('controllers.NLPController')
+    from stores.llm.LLMEnums import DocumentTypeEnums
+
+    pages_count = benchmark_size('PAGES', 100)
+    page_size = app_settings.INDEX_PUSH_PAGE_SIZE
+    read_latency, embedding_latency, write_latency = 0.01, 0.2, 0.03
+
+    def create_nlp_controller():
+        return nlp_controller_module.NLPController(
+            vectordb_client=LatencyVectorDB(latency=write_latency),
+            generation_model=None,
+            embedding_model=LatencyEmbeddingModel(latency=embedding_latency),
+            template_parser=None
+        )
+
+    async def serial_push(nlp_controller):
+        # The index push before the pipeline: read a page, embed it, then write it
+        collection_name = nlp_controller.create_collection_name(project_id=1)
+        async for chunks in read_pages(pages_count, page_size, read_latency):
+            texts = [c.chunk_text for c in chunks]
+            vectors = await nlp_controller.get_embeddings(texts=texts, document_type=DocumentTypeEnums.DOCUMENT.value)
+            _ = await nlp_controller.vectordb_client.create_collection(collection_name=collection_name,
+                                                                       embedding_dim=EMBEDDING_SIZE)
+            _ = await nlp_controller.vectordb_client.insert_batch(collection_name=collection_name, vectors=vectors,
+                                                                  texts=texts, vector_ids=[c.chunk_id for c in chunks])
+
+    async def pipeline_push(nlp_controller, embedding_workers: int):
+        _ = await nlp_controller.index_into_vector_db_pipeline(
+            project_id=1,
+            chunk_pages=read_pages(pages_count, page_size, read_latency),
+            embedding_workers=embedding_workers
+        )
+
+    # Above EMBEDDING_MAX_CONCURRENCY the embedding scheduler keeps the requests in flight at its limit
+    runs = [('serial loop', lambda nlp_controller: serial_push(nlp_controller))] + [
+        (f'pipeline, {workers} embedding workers',
+         lambda nlp_controller, workers=workers: pipeline_push(nlp_controller, embedding_workers=workers))
+        for workers in [1, 2, 4, 8]
+    ]
+
+    rows = []
+    for name, push in runs:
+        nlp_controller = create_nlp_controller()
+
+        started_at = time.perf_counter()
+        asyncio.run(push(nlp_controller))
+        elapsed = time.perf_counter() - started_at
+
+        # Whatever the concurrency, the batches are written in the chunks order
+        inserted_ids = nlp_controller.vectordb_client.inserted_ids
+        assert inserted_ids == list(range(1, pages_count * page_size + 1))
+
+        rows.append({'index push': name, 'seconds': round(elapsed, 2),
+                     'chunks/s': round(len(inserted_ids) / elapsed),
+                     'speedup': round(rows[0]['seconds'] / elapsed, 2) if rows else 1.0})
+
+    report(f'Index push: {pages_count} pages of {page_size} chunks, latencies read={read_latency}s '
+           f'embedding={embedding_latency}s write={write_latency}s', rows)
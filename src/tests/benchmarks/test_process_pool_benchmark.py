@@ -0,0 +1,87 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import importlib
+import random
+import shutil
+import time
+import os
+
+import pytest
+
+
+# The files are written in the directory of this project id and removed at the end
+PROJECT_ID = 990001
+
+
+def write_text_files(project_path: str, files_count: int, file_size: int):
+
+    rng = random.Random(0)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 10)))
+             for _ in range(5000)]
+
+    file_ids = []
+    for idx in range(files_count):
+        paragraphs, size = [], 0
+        while size < file_size:
+            paragraph = ' '.join(rng.choices(words, k=rng.randint(20, 120)))
+            paragraphs.append(paragraph)
+            size += len(paragraph) + 2
+
+        file_id = f'benchmark_{idx}.txt'
+        with open(os.path.join(project_path, file_id), 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(paragraphs))
+        file_ids.append(file_id)
+
+    return file_ids
+
+
+def test_process_throughput_by_worker_count(app_settings, benchmark_size, report):
+    '''
+    The files are loaded and split by ProcessController.process_file in a spawn process pool, like the process jobs do
+    '''
+    controllers = pytest.importorskip('controllers')
+
+    files_count = benchmark_size('FILES', 64)
+    file_size = benchmark_size('FILE_SIZE', 1 << 20)
+
+    project_path = controllers.ProjectController().get_project_path(project_id=PROJECT_ID)
+
+    try:
+        file_ids = write_text_files(project_path=project_path, files_count=files_count, file_size=file_size)
+
+        worker_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+        rows, baseline = [], None
+        for max_workers in worker_counts:
+            # The workers are started (and import the controllers) before the timing, a running server keeps its pool
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=importlib.import_module,
+                                     initargs=('controllers',)) as process_pool:
+                _ = [future.result() for future in [process_pool.submit(time.sleep, 0.5) for _ in range(max_workers)]]
+
+                started_at = time.perf_counter()
+                results = list(process_pool.map(
+                    controllers.ProcessController.process_file,
+                    [PROJECT_ID] * len(file_ids),
+                    range(len(file_ids)),
+                    file_ids
+                ))
+                elapsed = time.perf_counter() - started_at
+
+            chunks_count = sum(len(chunks) for _, _, chunks in results)
+            baseline = baseline or elapsed
+            rows.append({
+                'workers': max_workers,
+                'seconds': round(elapsed, 2),
+                'files/s': round(len(file_ids) / elapsed, 2),
+                'MB/s': round(len(file_ids) * file_size / elapsed / (1 << 20), 2),
+                'chunks': chunks_count,
+                'speedup': round(baseline / elapsed, 2)
+            })
+
+        report(f'Process pool: {files_count} text files of {file_size >> 10} KB', rows)
+
+        # Every worker count produces the same chunks
+        assert len({row['chunks'] for row in rows}) == 1
+    finally:
+        shutil.rmtree(project_path, ignore_errors=True)
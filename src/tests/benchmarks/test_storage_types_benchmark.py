@@ -0,0 +1,111 @@
+import asyncio
+import random
+import time
+
+
+COLLECTION_NAME = 'collection_benchmark_storage_types'
+
+
+def clustered_vectors(count: int, dim: int, seed: int = 0, clusters: int = 100):
+    '''
+    Embeddings are not uniform noise, the vectors are drawn around a fixed set of centroids
+    '''
+    centroids_rng = random.Random(-1)
+    centroids = [[centroids_rng.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+
+    rng = random.Random(seed)
+    vectors = []
+    for _ in range(count):
+        centroid = centroids[rng.randrange(clusters)]
+        vectors.append([value + rng.gauss(0, 0.5) for value in centroid])
+
+    return vectors
+
+
+def test_storage_types_size_speed_and_recall(db_client, benchmark_size, report):
+    '''
+    The same vectors are loaded into a vector, a halfvec and a bit collection (hnsw indexes),
+    the recall@k of every collection is measured against the exact nearest neighbours of the float32 vectors
+    '''
+    rows_count = benchmark_size('ROWS', 50_000)
+    dim = benchmark_size('DIM', 768)
+    queries_count = benchmark_size('QUERIES', 100)
+    top_k = 10
+    load_batch_size = 5000
+    ef_search = 100
+
+    queries = clustered_vectors(queries_count, dim, seed=-2)
+
+    async def scenario():
+        from sqlalchemy.sql import text as sql_text
+
+        from stores.vectordb.providers import PGVectorProvider
+
+        exact_results = None
+        rows = []
+
+        for storage_type, rescore_factor in [('vector', 1), ('halfvec', 1), ('bit', 4), ('bit', 10)]:
+            provider = PGVectorProvider(db_client=db_client, distance_method='cosine', embedding_size=dim,
+                                        index_threshold=1, index_type='hnsw', storage_type=storage_type,
+                                        search_params={'ef_search': ef_search, 'rescore_factor': rescore_factor})
+            await provider.connect()
+            await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+            try:
+                _ = await provider.create_collection(collection_name=COLLECTION_NAME, embedding_dim=dim)
+                for start in range(0, rows_count, load_batch_size):
+                    count = min(load_batch_size, rows_count - start)
+                    _ = await provider.insert_batch(collection_name=COLLECTION_NAME,
+                                                    vectors=clustered_vectors(count, dim, seed=start),
+                                                    texts=[str(idx) for idx in range(start, start + count)],
+                                                    vector_ids=[None] * count,
+                                                    build_index=False)
+
+                if exact_results is None:
+                    # The exact neighbours are read from the float32 collection before it has an index
+                    exact_results = []
+                    for vector in queries:
+                        async with db_client() as session:
+                            result = await session.execute(
+                                sql_text(f'SELECT text FROM {COLLECTION_NAME} '
+                                         f'ORDER BY vector <=> CAST(:vector AS vector) LIMIT {top_k}'),
+                                {'vector': '[' + ', '.join([str(v) for v in vector]) + ']'}
+                            )
+                            exact_results.append({row.text for row in result.fetchall()})
+
+                started_at = time.perf_counter()
+                assert await provider.create_vector_index(collection_name=COLLECTION_NAME)
+                build_seconds = time.perf_counter() - started_at
+
+                async with db_client() as session:
+                    result = await session.execute(sql_text(
+                        f"SELECT pg_relation_size('{provider.get_index_name(COLLECTION_NAME)}'), "
+                        f"pg_table_size('{COLLECTION_NAME}')"
+                    ))
+                    index_size, table_size = result.one()
+
+                _ = await provider.search_by_vector(vector=queries[0], collection_name=COLLECTION_NAME, top_k=top_k)
+
+                found, search_seconds = 0, 0.0
+                for vector, exact in zip(queries, exact_results):
+                    started_at = time.perf_counter()
+                    results = await provider.search_by_vector(vector=vector, collection_name=COLLECTION_NAME,
+                                                              top_k=top_k)
+                    search_seconds += time.perf_counter() - started_at
+                    found += len(exact & {result.text for result in results})
+
+                rows.append({
+                    'storage': storage_type if storage_type != 'bit' else f'bit, rescore x{rescore_factor}',
+                    'index MB': round(index_size / (1 << 20), 1),
+                    'table MB': round(table_size / (1 << 20), 1),
+                    'build seconds': round(build_seconds, 2),
+                    'QPS': round(queries_count / search_seconds, 1),
+                    f'recall@{top_k}': round(found / (queries_count * top_k), 3)
+                })
+            finally:
+                await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+        return rows
+
+    report(f'Storage types: {rows_count} vectors of {dim} dimensions, hnsw ef_search={ef_search}, '
+           f'{queries_count} queries', asyncio.run(scenario()))
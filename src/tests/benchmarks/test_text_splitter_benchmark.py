@@ -0,0 +1,73 @@
+import importlib.util
+import random
+import time
+import os
+
+import pytest
+
+
+def load_text_splitter():
+    # The splitter module is loaded on its own, the helpers package also imports the app settings
+    spec = importlib.util.spec_from_file_location(
+        'text_splitter', os.path.join(os.path.dirname(__file__), '..', '..', 'helpers', 'text_splitter.py')
+    )
+    text_splitter = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(text_splitter)
+    return text_splitter.TextSplitter
+
+
+def make_corpus(size: int):
+    # Paragraphs of sentences with line breaks inside, so every separator level is used
+    rng = random.Random(0)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(1, 12)))
+             for _ in range(20000)]
+
+    paragraphs, length = [], 0
+    while length < size:
+        lines = [' '.join(rng.choices(words, k=rng.randint(3, 40))) for _ in range(rng.randint(1, 8))]
+        paragraph = '\n'.join(lines)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+
+    return '\n\n'.join(paragraphs)
+
+
+def timed(function, *args):
+    started_at = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started_at
+
+
+@pytest.mark.parametrize('chunk_size, chunk_overlap', [(100, 10), (1000, 100)])
+def test_text_splitter_against_langchain(benchmark_size, report, chunk_size, chunk_overlap):
+
+    langchain_text_splitters = pytest.importorskip('langchain_text_splitters')
+    TextSplitter = load_text_splitter()
+
+    corpus = make_corpus(benchmark_size('CORPUS_SIZE', 8 << 20))
+    megabytes = len(corpus) / (1 << 20)
+
+    langchain_splitter = langchain_text_splitters.RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len
+    )
+    splitter = TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    expected, langchain_elapsed = timed(langchain_splitter.split_text, corpus)
+    chunks, split_text_elapsed = timed(splitter.split_text, corpus)
+    offsets, split_offsets_elapsed = timed(splitter.split_offsets, corpus)
+
+    assert chunks == expected
+    assert len(offsets) == len(expected)
+
+    report(f'Text splitter: {megabytes:.1f} MB, chunk_size={chunk_size}, chunk_overlap={chunk_overlap}, '
+           f'{len(expected)} chunks', [
+               {'splitter': name, 'seconds': round(elapsed, 3), 'MB/s': round(megabytes / elapsed, 2),
+                'speedup': round(langchain_elapsed / elapsed, 2)}
+               for name, elapsed in [
+                   ('RecursiveCharacterTextSplitter.split_text', langchain_elapsed),
+                   ('TextSplitter.split_text', split_text_elapsed),
+                   ('TextSplitter.split_offsets', split_offsets_elapsed),
+               ]
+           ])
@@ -0,0 +1,65 @@
+import asyncio
+import random
+import time
+
+
+COLLECTION_NAME = 'collection_benchmark_vector_insert'
+
+
+def random_vectors(count: int, dim: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(count)]
+
+
+def test_copy_against_insert_statements(db_client, benchmark_size, report):
+    '''
+    The same vectors are written by insert_batch with the binary COPY path and with the INSERT statements path
+    CPU is the CPU time of the test process (encoding and driver), the server time is only in the wall time
+    '''
+    rows_count = benchmark_size('ROWS', 20_000)
+    dim = benchmark_size('DIM', 1536)
+    batch_size = 1000
+
+    vectors = random_vectors(rows_count, dim)
+    texts = [f'benchmark chunk {idx}' for idx in range(rows_count)]
+
+    async def load(use_copy: bool):
+        from stores.vectordb.providers import PGVectorProvider
+
+        # No index, only the writes are measured
+        provider = PGVectorProvider(db_client=db_client, distance_method='cosine', embedding_size=dim,
+                                    index_threshold=rows_count + 1, use_copy=use_copy)
+        await provider.connect()
+        await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+        try:
+            _ = await provider.create_collection(collection_name=COLLECTION_NAME, embedding_dim=dim)
+
+            started_at, cpu_started_at = time.perf_counter(), time.process_time()
+            for start in range(0, rows_count, batch_size):
+                end = min(start + batch_size, rows_count)
+                _ = await provider.insert_batch(collection_name=COLLECTION_NAME,
+                                                vectors=vectors[start:end],
+                                                texts=texts[start:end],
+                                                metadata=[{'idx': idx} for idx in range(start, end)],
+                                                vector_ids=[None] * (end - start),
+                                                build_index=False)
+            elapsed, cpu_elapsed = time.perf_counter() - started_at, time.process_time() - cpu_started_at
+
+            collection_info = await provider.get_collection_info(collection_name=COLLECTION_NAME)
+            assert collection_info['row_count'] == rows_count
+        finally:
+            await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+        return elapsed, cpu_elapsed
+
+    rows = []
+    for name, use_copy in [('INSERT statements', False), ('binary COPY', True)]:
+        elapsed, cpu_elapsed = asyncio.run(load(use_copy=use_copy))
+        rows.append({'insert path': name, 'seconds': round(elapsed, 2), 'rows/s': round(rows_count / elapsed),
+                     'client CPU us/row': round(cpu_elapsed / rows_count * 1e6, 1)})
+
+    for row in rows:
+        row['speedup'] = round(rows[0]['seconds'] / row['seconds'], 2)
+
+    report(f'Vector inserts: {rows_count} vectors of {dim} dimensions', rows)
@@ -0,0 +1,98 @@
+import asyncio
+import random
+import time
+
+
+COLLECTION_NAME = 'collection_benchmark_vector_search'
+
+
+def random_vectors(count: int, dim: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(dim)] for _ in range(count)]
+
+
+def percentile(latencies: list, fraction: float):
+    latencies = sorted(latencies)
+    return latencies[int(fraction * (len(latencies) - 1))]
+
+
+def test_search_latency_before_and_after_the_index_path(db_client, benchmark_size, report):
+    '''
+    The same queries run on an hnsw indexed collection with:
+    - the search query before the index path, ordered by the computed score, which the planner can't serve from the index
+    - search_by_vector, ordered by the distance operator of the index opclass
+    The request scale is BENCHMARK_ROWS=1000000
+    '''
+    rows_count = benchmark_size('ROWS', 200_000)
+    dim = benchmark_size('DIM', 128)
+    queries_count = benchmark_size('QUERIES', 50)
+    top_k = 10
+
+    async def scenario():
+        from sqlalchemy.sql import text as sql_text
+
+        from stores.vectordb.providers import PGVectorProvider
+
+        provider = PGVectorProvider(db_client=db_client, distance_method='cosine', embedding_size=dim,
+                                    index_threshold=1, index_type='hnsw')
+        await provider.connect()
+        await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+        try:
+            _ = await provider.create_collection(collection_name=COLLECTION_NAME, embedding_dim=dim)
+
+            load_batch_size = 10_000
+            for start in range(0, rows_count, load_batch_size):
+                count = min(load_batch_size, rows_count - start)
+                _ = await provider.insert_batch(collection_name=COLLECTION_NAME,
+                                                vectors=random_vectors(count, dim, seed=start),
+                                                texts=[f'text {idx}' for idx in range(start, start + count)],
+                                                vector_ids=[None] * count,
+                                                build_index=False)
+            assert await provider.create_vector_index(collection_name=COLLECTION_NAME)
+
+            async with db_client() as session:
+                await session.execute(sql_text(f'ANALYZE {COLLECTION_NAME}'))
+                await session.commit()
+
+            queries = random_vectors(queries_count, dim, seed=-1)
+
+            before_query = sql_text(
+                f'SELECT text as text, metadata as metadata, 1-(vector <=> :vector) as score '
+                f'FROM {COLLECTION_NAME} '
+                f'ORDER BY score DESC '
+                f'LIMIT {top_k}'
+            )
+
+            async def search_before(vector: list):
+                async with db_client() as session:
+                    result = await session.execute(
+                        before_query, {'vector': '[' + ', '.join([str(v) for v in vector]) + ']'})
+                    return result.fetchall()
+
+            async def search_after(vector: list):
+                return await provider.search_by_vector(vector=vector, collection_name=COLLECTION_NAME, top_k=top_k)
+
+            rows = []
+            for name, search in [('ORDER BY computed score', search_before),
+                                 ('ORDER BY distance operator', search_after)]:
+                # The first query warms the cache of the table or of the index
+                assert len(await search(queries[0])) == top_k
+
+                latencies = []
+                for vector in queries:
+                    started_at = time.perf_counter()
+                    _ = await search(vector)
+                    latencies.append(time.perf_counter() - started_at)
+
+                rows.append({'search': name,
+                             'p50 ms': round(percentile(latencies, 0.5) * 1000, 2),
+                             'p95 ms': round(percentile(latencies, 0.95) * 1000, 2),
+                             'QPS': round(len(latencies) / sum(latencies), 1)})
+
+            return rows
+        finally:
+            await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+    report(f'Vector search: {rows_count} vectors of {dim} dimensions, hnsw index, top {top_k}, '
+           f'{queries_count} queries', asyncio.run(scenario()))
@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+import importlib.util
+import itertools
+import asyncio
+import os
+
+import pytest
+
+# The cache module is loaded on its own, the stores.llm package also imports the provider SDKs
+spec = importlib.util.spec_from_file_location(
+    'embedding_cache', os.path.join(os.path.dirname(__file__), '..', 'stores', 'llm', 'EmbeddingCache.py')
+)
+embedding_cache = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(embedding_cache)
+EmbeddingCache = embedding_cache.EmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Every call of time.time() in the cache is one second later, so the last uses are ordered
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embedding_cache, 'time', SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def make_vector(idx: int):
+    return [float(idx), 0.5, -0.25]
+
+
+def test_cached_vectors_are_returned_and_persisted(tmp_path, clock):
+
+    db_path = str(tmp_path / 'embeddings.sqlite3')
+    key = EmbeddingCache.make_key(provider='COHERE', model_id='embed', document_type='document', text='text')
+
+    cache = EmbeddingCache(db_path=db_path)
+    assert cache.get_many([key]) == {}
+
+    cache.set_many({key: make_vector(1)})
+    assert cache.get_many([key]) == {key: make_vector(1)}
+    assert cache.get_metrics()['hits'] == 1
+    assert cache.get_metrics()['misses'] == 1
+    cache.close()
+
+    cache = EmbeddingCache(db_path=db_path)
+    assert cache.get_metrics()['entries'] == 1
+    assert cache.get_many([key]) == {key: make_vector(1)}
+    cache.close()
+
+    # The same text for another model or document type is another entry
+    assert key != EmbeddingCache.make_key(provider='COHERE', model_id='embed', document_type='query', text='text')
+    assert key != EmbeddingCache.make_key(provider='COHERE', model_id='embed-v2', document_type='document', text='text')
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+
+    cache = EmbeddingCache(db_path=str(tmp_path / 'embeddings.sqlite3'), max_entries=10)
+
+    keys = [f'key-{idx}' for idx in range(11)]
+    for idx, key in enumerate(keys[:10]):
+        cache.set_many({key: make_vector(idx)})
+
+    # key-0 is the oldest insert but it is used again, key-1 and key-2 become the least recently used
+    assert keys[0] in cache.get_many([keys[0]])
+
+    # Above max_entries the cache is evicted down to 90% of it
+    cache.set_many({keys[10]: make_vector(10)})
+
+    cached = cache.get_many(keys)
+    assert sorted(cached) == sorted([keys[0]] + keys[3:])
+    assert cache.get_metrics()['entries'] == 9
+    assert cache.get_metrics()['evictions'] == 2
+
+    cache.close()
+
+
+class CountingEmbeddingModel:
+
+    def __init__(self):
+        self.embedding_model_id = 'test-embedding-model'
+        self.embedding_size = 3
+        self.default_max_input_characters = 1000
+        self.requested_texts = []
+
+    def process_text(self, texts):
+        return [text[:self.default_max_input_characters].strip() for text in texts]
+
+    async def aget_embedding(self, text, document_type: str = None):
+        self.requested_texts.extend(text)
+        return [make_vector(len(t)) for t in text]
+
+
+def test_duplicate_and_cached_texts_are_not_embedded(app_settings, tmp_path, monkeypatch):
+
+    nlp_controller_module = pytest.importorskip('controllers.NLPController')
+
+    monkeypatch.setenv('EMBEDDING_CACHE_ENABLED', 'True')
+    monkeypatch.setattr(nlp_controller_module.NLPController, 'get_db_path', lambda self, db_name: str(tmp_path))
+
+    embedding_model = CountingEmbeddingModel()
+    nlp_controller = nlp_controller_module.NLPController(
+        vectordb_client=SimpleNamespace(embedding_size=3),
+        generation_model=None,
+        embedding_model=embedding_model,
+        template_parser=None
+    )
+
+    async def scenario():
+        vectors = await nlp_controller.get_embeddings(texts=['a', 'bb', 'a', ' a '], document_type='document')
+        assert vectors == [make_vector(1), make_vector(2), make_vector(1), make_vector(1)]
+
+        # ' a ' is stripped before embedding, so it is the same text as 'a'
+        assert sorted(embedding_model.requested_texts) == ['a', 'bb']
+        assert nlp_controller.embedding_cache.get_metrics()['deduplicated'] == 2
+
+        embedding_model.requested_texts = []
+        vectors = await nlp_controller.get_embeddings(texts=['bb', 'ccc', 'a'], document_type='document')
+        assert vectors == [make_vector(2), make_vector(3), make_vector(1)]
+        assert embedding_model.requested_texts == ['ccc']
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        nlp_controller.embedding_cache.close()
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+import asyncio
+import hashlib
+
+import pytest
+
+
+EMBEDDING_SIZE = 16
+
+
+class RecordingEmbeddingModel:
+    '''
+    This class is an embedding provider double, the vectors are derived from the texts and every embedded text is recorded
+    '''
+
+    def __init__(self):
+        self.embedding_model_id = 'test-embedding-model'
+        self.embedding_size = EMBEDDING_SIZE
+        self.max_embedding_batch_size = 4
+        self.default_max_input_characters = 1000
+        self.embedded_texts = []
+
+    def process_text(self, texts):
+        return [text[:self.default_max_input_characters].strip() for text in texts]
+
+    async def aget_embedding(self, text, document_type: str = None):
+        self.embedded_texts.extend(text)
+        return [
+            [byte / 255 + 0.01 for byte in hashlib.sha256(t.encode('utf-8')).digest()[:EMBEDDING_SIZE]]
+            for t in text
+        ]
+
+
+def test_index_push_embeds_only_the_new_chunks(db_engine, db_client):
+
+    routes_nlp = pytest.importorskip('routes.nlp')
+
+    async def scenario():
+        from controllers import NLPController
+        from controllers.JobController import JobProgress
+        from models import ProjectModel, AssetModel, ChunkModel, JobModel
+        from models.db_schemas import Project, Asset, DataChunk, Job
+        from models.enums import AssetTypeEnum, JobTypeEnum, JobStatusEnum
+        from stores.vectordb.providers import PGVectorProvider
+
+        project_model = await ProjectModel.create_instance(db_client=db_client)
+        asset_model = await AssetModel.create_instance(db_client=db_client)
+        chunk_model = await ChunkModel.create_instance(db_client=db_client)
+        job_model = await JobModel.create_instance(db_client=db_client, db_engine=db_engine)
+
+        project = await project_model.create_project(project=Project())
+        asset = await asset_model.create_asset(asset=Asset(
+            asset_project_id=project.project_id,
+            asset_type=AssetTypeEnum.FILE.value,
+            asset_name='notes.txt',
+            asset_size=1
+        ))
+
+        async def add_chunks(texts):
+            _ = await chunk_model.insert_many_chunks(chunks=[
+                DataChunk(
+                    chunk_text=text,
+                    chunk_metadata={},
+                    chunk_order=order,
+                    chunk_project_id=project.project_id,
+                    chunk_asset_id=asset.asset_id
+                )
+                for order, text in enumerate(texts)
+            ])
+
+        vectordb_client = PGVectorProvider(db_client=db_client, distance_method='cosine',
+                                           embedding_size=EMBEDDING_SIZE)
+        await vectordb_client.connect()
+
+        embedding_model = RecordingEmbeddingModel()
+        nlp_controller = NLPController(vectordb_client=vectordb_client, generation_model=None,
+                                       embedding_model=embedding_model, template_parser=None)
+
+        app = SimpleNamespace(db_client=db_client, chunk_model=chunk_model,
+                              nlp_controller=nlp_controller, vectordb_client=vectordb_client)
+
+        async def push():
+            job = await job_model.create_job(job=Job(
+                job_type=JobTypeEnum.INDEX_PUSH.value,
+                job_status=JobStatusEnum.RUNNING.value,
+                job_payload={'do_reset': False},
+                job_progress={},
+                job_errors=[],
+                job_project_id=project.project_id
+            ))
+            embedding_model.embedded_texts = []
+            await routes_nlp.index_project_job(app=app, job=job, progress=JobProgress(job_model=job_model, job=job))
+            return sorted(embedding_model.embedded_texts)
+
+        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
+
+        try:
+            first_texts = [f'first push chunk {idx}' for idx in range(6)]
+            await add_chunks(first_texts)
+            assert await push() == sorted(first_texts)
+
+            # Only the chunks added since the last push are embedded, the indexed ones are kept in the collection
+            second_texts = [f'second push chunk {idx}' for idx in range(3)]
+            await add_chunks(second_texts)
+            assert await push() == sorted(second_texts)
+
+            assert await push() == []
+
+            collection_info = await vectordb_client.get_collection_info(collection_name=collection_name)
+            assert collection_info['row_count'] == len(first_texts) + len(second_texts)
+            assert await chunk_model.get_total_chunks_count(project_id=project.project_id,
+                                                            only_unindexed=True) == 0
+        finally:
+            await vectordb_client.delete_collection(collection_name=collection_name)
+
+    asyncio.run(scenario())
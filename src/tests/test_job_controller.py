@@ -0,0 +1,123 @@
+import asyncio
+
+
+async def create_project(db_client):
+    from models import ProjectModel
+    from models.db_schemas import Project
+
+    project_model = await ProjectModel.create_instance(db_client=db_client)
+    return await project_model.create_project(project=Project())
+
+
+async def create_job(job_model, project_id: int, job_type: str = 'test'):
+    from models.db_schemas import Job
+    from models.enums import JobStatusEnum
+
+    return await job_model.create_job(
+        job=Job(
+            job_type=job_type,
+            job_status=JobStatusEnum.QUEUED.value,
+            job_payload={},
+            job_progress={},
+            job_errors=[],
+            job_project_id=project_id
+        )
+    )
+
+
+def test_job_is_claimed_by_one_worker(db_engine, db_client):
+
+    async def scenario():
+        from sqlalchemy import func
+
+        from models import JobModel
+        from models.enums import JobStatusEnum
+
+        job_model = await JobModel.create_instance(db_client=db_client, db_engine=db_engine)
+        other_job_model = await JobModel.create_instance(db_client=db_client, db_engine=db_engine)
+
+        project = await create_project(db_client)
+        job = await create_job(job_model, project_id=project.project_id)
+
+        async with job_model.claim_job(job_id=job.job_id) as claimed_job:
+            assert claimed_job.job_id == job.job_id
+            assert claimed_job.job_status == JobStatusEnum.RUNNING.value
+            assert claimed_job.started_at is not None
+
+            # The advisory lock is held by the first worker while its job runs
+            async with other_job_model.claim_job(job_id=job.job_id) as other_claimed_job:
+                assert other_claimed_job is None
+
+        # A running job whose worker released it (a stopped server) can be claimed again
+        async with other_job_model.claim_job(job_id=job.job_id) as claimed_job:
+            assert claimed_job.job_id == job.job_id
+
+        _ = await job_model.update_job(job_id=job.job_id, job_status=JobStatusEnum.COMPLETED.value,
+                                       finished_at=func.now())
+
+        async with job_model.claim_job(job_id=job.job_id) as claimed_job:
+            assert claimed_job is None
+
+    asyncio.run(scenario())
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(db_engine, db_client):
+
+    async def scenario():
+        from models import JobModel
+        from models.enums import JobStatusEnum
+        from controllers.JobController import JobController
+
+        job_model = await JobModel.create_instance(db_client=db_client, db_engine=db_engine)
+
+        processed = []
+        interrupted = asyncio.Event()
+        is_first_run = True
+
+        async def handler(job, progress):
+            for item in range(progress.checkpoint.get('next_item', 0), 10):
+                processed.append(item)
+
+                progress.checkpoint['next_item'] = item + 1
+                progress.increment(items=1)
+                await progress.save(force=True)
+
+                if is_first_run and item == 4:
+                    # The server stops while the job runs, it is cancelled after its checkpoint
+                    interrupted.set()
+                    await asyncio.Event().wait()
+
+        job_controller = JobController(job_model=job_model)
+        job_controller.register_handler(job_type='test', handler=handler)
+
+        project = await create_project(db_client)
+        job = await job_controller.submit_job(job_type='test', project_id=project.project_id)
+
+        await interrupted.wait()
+        await job_controller.shutdown()
+
+        job = await job_model.get_job_by_uuid(job_uuid=job.job_uuid)
+        assert job.job_status == JobStatusEnum.RUNNING.value
+        assert job.job_progress['checkpoint'] == {'next_item': 5}
+        assert processed == [0, 1, 2, 3, 4]
+
+        # Next startup, the job is found unfinished and runs again from its checkpoint
+        is_first_run = False
+        job_controller = JobController(job_model=job_model)
+        job_controller.register_handler(job_type='test', handler=handler)
+
+        unfinished_jobs = [
+            unfinished_job
+            for unfinished_job in await job_model.get_unfinished_jobs()
+            if unfinished_job.job_id == job.job_id
+        ]
+        assert len(unfinished_jobs) == 1
+
+        await job_controller.schedule_job(job=unfinished_jobs[0])
+
+        job = await job_model.get_job_by_uuid(job_uuid=job.job_uuid)
+        assert job.job_status == JobStatusEnum.COMPLETED.value
+        assert job.job_progress['items'] == 10
+        assert processed == list(range(10))
+
+    asyncio.run(scenario())
@@ -0,0 +1,127 @@
+from contextlib import asynccontextmanager
+import asyncio
+import random
+
+import pytest
+
+
+COLLECTION_NAME = 'collection_test_pgvector_provider'
+EMBEDDING_SIZE = 16
+
+
+@asynccontextmanager
+async def pgvector_provider(db_client, **provider_kwargs):
+    '''
+    This function yields a connected PGVectorProvider and drops its test collection at the end
+    '''
+    from stores.vectordb.providers import PGVectorProvider
+
+    provider = PGVectorProvider(db_client=db_client, distance_method='cosine',
+                                embedding_size=EMBEDDING_SIZE, **provider_kwargs)
+    await provider.connect()
+    await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+    try:
+        yield provider
+    finally:
+        await provider.delete_collection(collection_name=COLLECTION_NAME)
+
+
+def random_vectors(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(EMBEDDING_SIZE)] for _ in range(count)]
+
+
+def test_hybrid_search_finds_rare_identifier(db_client):
+
+    async def scenario():
+        async with pgvector_provider(db_client, hybrid_search=True) as provider:
+            _ = await provider.create_collection(collection_name=COLLECTION_NAME,
+                                                 embedding_dim=EMBEDDING_SIZE)
+
+            texts = [f'generic maintenance note number {idx}' for idx in range(50)]
+            texts[37] = 'the controller reports error ERR-4312 after the firmware update'
+            vectors = random_vectors(len(texts))
+
+            assert await provider.insert_batch(collection_name=COLLECTION_NAME, vectors=vectors,
+                                               texts=texts, vector_ids=[None] * len(texts))
+
+            # The query vector is unrelated to the matching row, only the full-text search brings it into the top 5
+            results = await provider.search_by_vector(vector=random_vectors(1, seed=1)[0],
+                                                      collection_name=COLLECTION_NAME,
+                                                      top_k=5,
+                                                      text='ERR-4312')
+            assert texts[37] in [result.text for result in results]
+
+            batch_results = await provider.search_by_vector_batch(vectors=random_vectors(2, seed=2),
+                                                                  collection_name=COLLECTION_NAME,
+                                                                  top_k=5,
+                                                                  texts=['ERR-4312', 'maintenance'])
+            assert len(batch_results) == 2
+            assert texts[37] in [result.text for result in batch_results[0]]
+            assert len(batch_results[1]) == 5
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('index_type', ['hnsw', 'ivfflat'])
+@pytest.mark.parametrize('storage_type', ['vector', 'halfvec', 'bit'])
+def test_vector_search_uses_the_vector_index(db_engine, db_client, storage_type, index_type):
+
+    async def scenario():
+        from sqlalchemy import event
+
+        async with pgvector_provider(db_client, storage_type=storage_type, index_type=index_type,
+                                     index_threshold=10) as provider:
+            _ = await provider.create_collection(collection_name=COLLECTION_NAME,
+                                                 embedding_dim=EMBEDDING_SIZE)
+
+            vectors = random_vectors(200)
+            assert await provider.insert_batch(collection_name=COLLECTION_NAME, vectors=vectors,
+                                               texts=[f'text {idx}' for idx in range(len(vectors))],
+                                               vector_ids=[None] * len(vectors))
+            assert await provider.create_vector_index(collection_name=COLLECTION_NAME)
+
+            # The search statement is recorded as it is sent to the database, then explained with the same parameters
+            search_statements = []
+
+            def record_search(connection, cursor, statement, parameters, context, executemany):
+                if statement.startswith('SELECT') and 'ORDER BY' in statement:
+                    search_statements.append((statement, parameters))
+
+            event.listen(db_engine.sync_engine, 'before_cursor_execute', record_search)
+            try:
+                results = await provider.search_by_vector(vector=random_vectors(1, seed=1)[0],
+                                                          collection_name=COLLECTION_NAME, top_k=5)
+            finally:
+                event.remove(db_engine.sync_engine, 'before_cursor_execute', record_search)
+
+            assert len(results) == 5
+            search_query, query_params = search_statements[-1]
+
+            # The table is small, seqscan is disabled so the plan shows whether the ORDER BY expression can use the index at all
+            async with db_engine.begin() as connection:
+                await connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+                plan = await connection.exec_driver_sql(f'EXPLAIN {search_query}', query_params)
+                plan = '\n'.join(row[0] for row in plan.fetchall())
+
+            assert f'Index Scan using {provider.get_index_name(COLLECTION_NAME)}' in plan, plan
+
+    asyncio.run(scenario())
+
+
+def test_collection_created_by_another_process_is_seen(db_client):
+
+    async def scenario():
+        async with pgvector_provider(db_client) as provider, pgvector_provider(db_client) as other_provider:
+            assert not await provider.is_collection_exist(collection_name=COLLECTION_NAME)
+
+            assert await other_provider.create_collection(collection_name=COLLECTION_NAME,
+                                                          embedding_dim=EMBEDDING_SIZE)
+
+            # The missing collection was not cached, the next lookup reads the catalog again
+            assert await provider.is_collection_exist(collection_name=COLLECTION_NAME)
+            assert await provider.insert_batch(collection_name=COLLECTION_NAME, vectors=random_vectors(3),
+                                               texts=['a', 'b', 'c'], vector_ids=[None] * 3)
+
+    asyncio.run(scenario())
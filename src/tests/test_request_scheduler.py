@@ -0,0 +1,100 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import asyncio
+
+import pytest
+
+
+class ProviderError(Exception):
+    '''
+    This class mimics the status errors of the provider SDKs: a status_code and the response headers
+    '''
+
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f'status {status_code}')
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture
+def request_scheduler_module():
+    return pytest.importorskip('stores.llm.RequestScheduler')
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # The retry delays are recorded instead of waited
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+
+    return delays
+
+
+def make_request(errors: list, result: str = 'ok'):
+    calls = []
+
+    async def request():
+        calls.append(len(calls))
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return request, calls
+
+
+def test_retry_after_of_the_provider_is_honoured(request_scheduler_module, sleeps):
+
+    scheduler = request_scheduler_module.RequestScheduler(name='test', max_retries=5,
+                                                          retry_base_delay=1.0, retry_max_delay=60.0)
+
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    request, calls = make_request(errors=[
+        ProviderError(429, headers={'retry-after': '7'}),
+        ProviderError(503, headers={'retry-after-ms': '1500'}),
+        ProviderError(429, headers={'retry-after': format_datetime(retry_at, usegmt=True)}),
+        ProviderError(429, headers={'retry-after': '3600'}),
+    ])
+
+    assert asyncio.run(scheduler.submit(request)) == 'ok'
+    assert len(calls) == 5
+
+    assert sleeps[0] == 7.0
+    assert sleeps[1] == 1.5
+    assert 25 <= sleeps[2] <= 30
+    # A Retry-After above retry_max_delay is capped
+    assert sleeps[3] == 60.0
+
+    metrics = scheduler.get_metrics()
+    assert metrics['throttled'] == 3
+    assert metrics['retries'] == 4
+    assert metrics['failures'] == 0
+
+
+def test_backoff_without_retry_after_and_failures(request_scheduler_module, sleeps):
+
+    scheduler = request_scheduler_module.RequestScheduler(name='test', max_retries=2,
+                                                          retry_base_delay=1.0, retry_max_delay=60.0)
+
+    # Without Retry-After the delay is a full jitter under base_delay * 2 ** attempt
+    request, calls = make_request(errors=[ProviderError(500), ProviderError(500), ProviderError(500)])
+    with pytest.raises(ProviderError):
+        asyncio.run(scheduler.submit(request))
+
+    assert len(calls) == 3
+    assert 0 <= sleeps[0] <= 1.0
+    assert 0 <= sleeps[1] <= 2.0
+
+    # A client error is not retried
+    request, calls = make_request(errors=[ProviderError(400, headers={'retry-after': '1'})])
+    with pytest.raises(ProviderError):
+        asyncio.run(scheduler.submit(request))
+
+    assert len(calls) == 1
+    assert scheduler.get_metrics()['failures'] == 2
@@ -0,0 +1,95 @@
+import importlib.util
+import os
+import random
+
+import pytest
+
+langchain_text_splitters = pytest.importorskip('langchain_text_splitters')
+
+# The splitter module is loaded on its own, the helpers package also imports the app settings
+spec = importlib.util.spec_from_file_location(
+    'text_splitter', os.path.join(os.path.dirname(__file__), '..', 'helpers', 'text_splitter.py')
+)
+text_splitter = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(text_splitter)
+TextSplitter = text_splitter.TextSplitter
+
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def random_text(rng: random.Random):
+    # Short words, runs of spaces and newlines, so every separator level and the merge edge cases are reached
+    pieces = []
+    for _ in range(rng.randint(0, 200)):
+        kind = rng.random()
+        if kind < 0.7:
+            pieces.append(''.join(rng.choice('abcdefghij') for _ in range(rng.randint(1, 25))))
+        elif kind < 0.85:
+            pieces.append(' ' * rng.randint(1, 3))
+        elif kind < 0.95:
+            pieces.append('\n' * rng.randint(1, 3))
+        else:
+            pieces.append(rng.choice([' \n ', '\n \n', '\t']))
+    return ''.join(pieces)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_split_text_matches_langchain(seed):
+    rng = random.Random(seed)
+
+    for _ in range(100):
+        chunk_size = rng.randint(1, 120)
+        chunk_overlap = rng.randint(0, chunk_size)
+        text = random_text(rng)
+
+        expected = langchain_text_splitters.RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=SEPARATORS,
+            length_function=len
+        ).split_text(text)
+
+        splitter = TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS)
+
+        assert splitter.split_text(text) == expected, (chunk_size, chunk_overlap, text)
+
+
+def test_split_offsets_point_into_the_text():
+    rng = random.Random(0)
+    text = random_text(rng) * 5
+
+    splitter = TextSplitter(chunk_size=50, chunk_overlap=10, separators=SEPARATORS)
+
+    for (start, end), chunk in zip(splitter.split_offsets(text), splitter.split_text(text)):
+        assert 0 <= start < end <= len(text)
+        assert text[start:end] == chunk
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_split_windows_matches_split_offsets(seed):
+    rng = random.Random(seed)
+
+    for _ in range(100):
+        chunk_size = rng.randint(1, 120)
+        chunk_overlap = rng.randint(0, chunk_size)
+        text = random_text(rng)
+        # Texts without paragraphs or without any separator are split on the next separators
+        if rng.random() < 0.2:
+            text = text.replace('\n\n', '\n')
+        if rng.random() < 0.1:
+            text = text.replace('\n', '').replace(' ', '')
+
+        window_size = rng.randint(1, 300)
+        windows = [text[idx:idx + window_size] for idx in range(0, len(text), window_size)]
+
+        splitter = TextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS)
+        separator, new_separators = splitter.get_separators(windows)
+
+        spans = [
+            (offset + start, offset + end)
+            for _, offset, window_spans in splitter.split_windows(windows, separator, new_separators)
+            for start, end in window_spans
+        ]
+
+        assert spans == splitter.split_offsets(text), (chunk_size, chunk_overlap, window_size, text)
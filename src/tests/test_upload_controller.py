@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+
+@pytest.fixture
+def upload_controller(app_settings, tmp_path, monkeypatch):
+    controllers = pytest.importorskip('controllers')
+
+    monkeypatch.setattr(controllers.ProjectController, 'get_project_path', lambda self, project_id: str(tmp_path))
+
+    return controllers.UploadController(project_id=1)
+
+
+async def iter_body(data: bytes, chunk_size: int = 1000):
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def test_ranges_are_tracked_and_finalized(upload_controller, tmp_path):
+
+    data = os.urandom(10_000)
+
+    upload_id, _ = upload_controller.create_session(file_name='file.pdf', file_size=len(data),
+                                                    content_type='application/pdf')
+    session = upload_controller.get_session(upload_id=upload_id)
+
+    async def write(start: int, end: int):
+        return await upload_controller.write_range(session=session, offset=start, body=iter_body(data[start:end]))
+
+    # Out of order and overlapping ranges
+    assert asyncio.run(write(6000, 10_000)) == (6000, 10_000)
+    assert asyncio.run(write(0, 2500)) == (0, 2500)
+    assert asyncio.run(write(2000, 4000)) == (2000, 4000)
+
+    received, missing = upload_controller.get_received_ranges(session=session)
+    assert received == [(0, 4000), (6000, 10_000)]
+    assert missing == [(4000, 6000)]
+
+    file_path = str(tmp_path / 'file.pdf')
+    assert upload_controller.finalize_session(session=session, file_path=file_path) is None
+    assert not os.path.exists(file_path)
+
+    # The client resumes with the missing range only
+    assert asyncio.run(write(4000, 6000)) == (4000, 6000)
+
+    received, missing = upload_controller.get_received_ranges(session=session)
+    assert received == [(0, 10_000)]
+    assert missing == []
+
+    file_hash = upload_controller.finalize_session(session=session, file_path=file_path)
+    assert file_hash == hashlib.sha256(data).hexdigest()
+
+    with open(file_path, 'rb') as f:
+        assert f.read() == data
+
+    assert upload_controller.get_session(upload_id=upload_id) is None
+
+
+def test_invalid_ranges_and_sessions_are_rejected(upload_controller):
+
+    upload_id, _ = upload_controller.create_session(file_name='file.txt', file_size=100,
+                                                    content_type='text/plain')
+    session = upload_controller.get_session(upload_id=upload_id)
+
+    assert asyncio.run(upload_controller.write_range(session=session, offset=100, body=iter_body(b'x'))) is None
+    assert asyncio.run(upload_controller.write_range(session=session, offset=90, body=iter_body(b'x' * 20))) is None
+
+    # A range that overflows the file is not marked as received
+    _, missing = upload_controller.get_received_ranges(session=session)
+    assert missing == [(0, 100)]
+
+    assert upload_controller.get_session(upload_id='../../etc') is None
+    assert upload_controller.create_session(file_name='file.exe', file_size=100,
+                                            content_type='application/octet-stream')[0] is None